@@ -0,0 +1,34 @@
+"""add_candles_series_covering_index
+
+Revision ID: 3f9c2a7d5e14
+Revises: 16546df84b7a
+Create Date: 2026-10-17 09:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d5e14'
+down_revision: Union[str, Sequence[str], None] = '16546df84b7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'candles_series_covering_idx',
+        'candles',
+        ['asset_id', 'timeframe', 'timestamp'],
+        unique=False,
+        postgresql_include=['open', 'high', 'low', 'close', 'volume'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('candles_series_covering_idx', table_name='candles')
@@ -0,0 +1,124 @@
+"""compact_partitioned_candles
+
+Revision ID: 8b2d41c6f0a9
+Revises: 3f9c2a7d5e14
+Create Date: 2026-10-17 14:03:27.611940
+
+Rebuilds `candles` as a range-partitioned table keyed by
+(asset_id, timeframe, timestamp) with BIGINT volume and no id/audit
+columns. The primary key INCLUDEs OHLCV and replaces the unique
+constraint, covering index, id index and timestamp index. Per-series
+refresh times move to `candle_series`. Existing rows are copied over.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d41c6f0a9'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a7d5e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIRST_PARTITION_YEAR = 2000
+OHLCV = "open, high, low, close, volume"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('candles', 'candles_legacy')
+    op.execute('ALTER TABLE candles_legacy RENAME CONSTRAINT candles_pkey TO candles_legacy_pkey')
+
+    op.create_table('candles',
+    sa.Column('asset_id', sa.Uuid(), nullable=False),
+    sa.Column('timeframe', sa.String(length=10), nullable=False),
+    sa.Column('timestamp', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('volume', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], name=op.f('candles_asset_id_fkey'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint(
+        'asset_id', 'timeframe', 'timestamp',
+        name=op.f('candles_pkey'),
+        postgresql_include=['open', 'high', 'low', 'close', 'volume'],
+    ),
+    postgresql_partition_by='RANGE (timestamp)',
+    )
+
+    op.execute(
+        "CREATE TABLE candles_history PARTITION OF candles "
+        f"FOR VALUES FROM (MINVALUE) TO ('{FIRST_PARTITION_YEAR}-01-01 00:00:00+00')"
+    )
+    for year in range(FIRST_PARTITION_YEAR, datetime.now(timezone.utc).year + 2):
+        op.execute(
+            f"CREATE TABLE candles_y{year} PARTITION OF candles "
+            f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+        )
+    op.execute("CREATE TABLE candles_default PARTITION OF candles DEFAULT")
+
+    op.create_table('candle_series',
+    sa.Column('asset_id', sa.Uuid(), nullable=False),
+    sa.Column('timeframe', sa.String(length=10), nullable=False),
+    sa.Column('refreshed_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], name=op.f('candle_series_asset_id_fkey'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('asset_id', 'timeframe', name=op.f('candle_series_pkey'))
+    )
+
+    op.execute(
+        "INSERT INTO candle_series (asset_id, timeframe, refreshed_at) "
+        "SELECT asset_id, timeframe, max(updated_at) FROM candles_legacy GROUP BY asset_id, timeframe"
+    )
+    op.execute(
+        f'INSERT INTO candles (asset_id, timeframe, "timestamp", {OHLCV}) '
+        f'SELECT asset_id, timeframe, "timestamp", {OHLCV} FROM candles_legacy'
+    )
+    op.drop_table('candles_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('candles', 'candles_compact')
+    op.execute('ALTER TABLE candles_compact RENAME CONSTRAINT candles_pkey TO candles_compact_pkey')
+
+    op.create_table('candles',
+    sa.Column('asset_id', sa.Uuid(), nullable=False),
+    sa.Column('timeframe', sa.String(length=10), nullable=False),
+    sa.Column('timestamp', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('volume', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], name=op.f('candles_asset_id_fkey'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('candles_pkey')),
+    sa.UniqueConstraint('asset_id', 'timeframe', 'timestamp', name='uq_candle_asset_tf_ts')
+    )
+    op.create_index(op.f('candles_id_idx'), 'candles', ['id'], unique=False)
+    op.create_index(op.f('candles_timestamp_idx'), 'candles', ['timestamp'], unique=False)
+    op.create_index(
+        'candles_series_covering_idx',
+        'candles',
+        ['asset_id', 'timeframe', 'timestamp'],
+        unique=False,
+        postgresql_include=['open', 'high', 'low', 'close', 'volume'],
+    )
+
+    # Volumes beyond the old INTEGER range are clamped
+    op.execute(
+        'INSERT INTO candles (id, created_at, updated_at, asset_id, timeframe, "timestamp", '
+        'open, high, low, close, volume) '
+        'SELECT gen_random_uuid(), now(), coalesce(s.refreshed_at, now()), c.asset_id, c.timeframe, c."timestamp", '
+        'c.open, c.high, c.low, c.close, least(c.volume, 2147483647)::integer '
+        'FROM candles_compact c LEFT JOIN candle_series s '
+        'ON s.asset_id = c.asset_id AND s.timeframe = c.timeframe'
+    )
+    op.drop_table('candle_series')
+    op.drop_table('candles_compact')
@@ -0,0 +1,36 @@
+"""add_symbol_metadata
+
+Revision ID: d47e0b9c2a61
+Revises: 8b2d41c6f0a9
+Create Date: 2026-10-17 16:22:05.304117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd47e0b9c2a61'
+down_revision: Union[str, Sequence[str], None] = '8b2d41c6f0a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('symbol_metadata',
+    sa.Column('symbol', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=True),
+    sa.Column('exchange', sa.String(length=50), nullable=True),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('market_cap', sa.Float(), nullable=True),
+    sa.Column('refreshed_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('symbol', name=op.f('symbol_metadata_pkey'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('symbol_metadata')
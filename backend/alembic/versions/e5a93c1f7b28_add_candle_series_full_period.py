@@ -0,0 +1,28 @@
+"""add_candle_series_full_period
+
+Revision ID: e5a93c1f7b28
+Revises: d47e0b9c2a61
+Create Date: 2026-10-18 10:04:37.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a93c1f7b28'
+down_revision: Union[str, Sequence[str], None] = 'd47e0b9c2a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('candle_series', sa.Column('full_period', sa.String(length=10), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('candle_series', 'full_period')
@@ -0,0 +1,153 @@
+"""Benchmark: candle table layout — size on disk and chart scan time.
+
+Builds both layouts side by side in a scratch schema and loads the same
+synthetic history into each:
+    legacy   — UUID id, created_at/updated_at, INTEGER volume, unique
+               constraint + covering index + id and timestamp indexes
+    compact  — (asset_id, timeframe, timestamp) primary key INCLUDE-ing
+               OHLCV, BIGINT volume, yearly range partitions
+
+Reports heap/index/total size and the best-of-N time of the chart query
+(one series, newest `--window-days`, as `service.read_candles` issues it).
+
+Needs Postgres configured through .env; the scratch schema is dropped
+afterwards.
+
+    python -m benchmarks.candle_storage --assets 50 --days 3650 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from src.core.database import engine
+
+SCHEMA = "bench_candle_storage"
+TIMEFRAMES = ("1d", "1h")
+
+LEGACY_DDL = f"""
+CREATE TABLE {SCHEMA}.legacy (
+    asset_id UUID NOT NULL,
+    timeframe VARCHAR(10) NOT NULL,
+    "timestamp" TIMESTAMPTZ NOT NULL,
+    open FLOAT NOT NULL, high FLOAT NOT NULL, low FLOAT NOT NULL, close FLOAT NOT NULL,
+    volume INTEGER NOT NULL,
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT legacy_pkey PRIMARY KEY (id),
+    CONSTRAINT legacy_uq UNIQUE (asset_id, timeframe, "timestamp")
+);
+CREATE INDEX legacy_id_idx ON {SCHEMA}.legacy (id);
+CREATE INDEX legacy_timestamp_idx ON {SCHEMA}.legacy ("timestamp");
+CREATE INDEX legacy_covering_idx ON {SCHEMA}.legacy (asset_id, timeframe, "timestamp")
+    INCLUDE (open, high, low, close, volume);
+"""
+
+COMPACT_DDL = f"""
+CREATE TABLE {SCHEMA}.compact (
+    asset_id UUID NOT NULL,
+    timeframe VARCHAR(10) NOT NULL,
+    "timestamp" TIMESTAMPTZ NOT NULL,
+    open FLOAT NOT NULL, high FLOAT NOT NULL, low FLOAT NOT NULL, close FLOAT NOT NULL,
+    volume BIGINT NOT NULL,
+    CONSTRAINT compact_pkey PRIMARY KEY (asset_id, timeframe, "timestamp")
+        INCLUDE (open, high, low, close, volume)
+) PARTITION BY RANGE ("timestamp");
+CREATE TABLE {SCHEMA}.compact_default PARTITION OF {SCHEMA}.compact DEFAULT;
+"""
+
+SCAN_SQL = """
+SELECT "timestamp", open, high, low, close, volume FROM {table}
+WHERE asset_id = $1 AND timeframe = '1d'
+  AND "timestamp" >= (SELECT max("timestamp") FROM {table} WHERE asset_id = $1 AND timeframe = '1d') - $2::interval
+ORDER BY "timestamp"
+"""
+
+SIZE_SQL = """
+SELECT coalesce(sum(pg_table_size(relid)), 0), coalesce(sum(pg_indexes_size(relid)), 0)
+FROM pg_partition_tree($1::regclass)
+"""
+
+
+def synthetic_records(asset_ids: list[uuid.UUID], days: int) -> list[tuple]:
+    """Daily bars plus 7 hourly bars per day for every asset."""
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    records = []
+    for n, asset_id in enumerate(asset_ids):
+        for d in range(days):
+            day = start + timedelta(days=d)
+            price = 100.0 + n + (d % 250) * 0.1
+            records.append((asset_id, "1d", day, price, price + 1, price - 1, price + 0.5, 1_000_000 + d))
+            for h in range(7):
+                records.append((
+                    asset_id, "1h", day + timedelta(hours=14 + h),
+                    price, price + 0.2, price - 0.2, price + 0.1, 100_000 + h,
+                ))
+    return records
+
+
+async def create_year_partitions(pg, first: int, last: int) -> None:
+    for year in range(first, last + 1):
+        await pg.execute(
+            f"CREATE TABLE {SCHEMA}.compact_y{year} PARTITION OF {SCHEMA}.compact "
+            f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+        )
+
+
+async def best_scan(pg, table: str, asset_id: uuid.UUID, window: timedelta, repeat: int) -> tuple[float, int]:
+    sql = SCAN_SQL.format(table=f"{SCHEMA}.{table}")
+    best, rows = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = len(await pg.fetch(sql, asset_id, window))
+        best = min(best, time.perf_counter() - t0)
+    return best, rows
+
+
+async def run(assets: int, days: int, window_days: int, repeat: int) -> None:
+    asset_ids = [uuid.uuid4() for _ in range(assets)]
+    records = synthetic_records(asset_ids, days)
+    columns = ("asset_id", "timeframe", "timestamp", "open", "high", "low", "close", "volume")
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection  # asyncpg.Connection
+        await pg.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+        try:
+            await pg.execute(LEGACY_DDL)
+            await pg.execute(COMPACT_DDL)
+            first_year = records[0][2].year
+            await create_year_partitions(pg, first_year, datetime.now(timezone.utc).year + 1)
+
+            print(f"{len(records):,} rows ({assets} assets, {days} days of 1d + 1h bars)")
+            for table in ("legacy", "compact"):
+                t0 = time.perf_counter()
+                await pg.copy_records_to_table(table, schema_name=SCHEMA, records=records, columns=columns)
+                load = time.perf_counter() - t0
+                await pg.execute(f"VACUUM ANALYZE {SCHEMA}.{table}")
+
+                heap, index = await pg.fetchrow(SIZE_SQL, f"{SCHEMA}.{table}")
+                scan, rows = await best_scan(pg, table, asset_ids[0], timedelta(days=window_days), repeat)
+                print(
+                    f"  {table:<8} heap {heap / 2**20:8.1f} MiB  index {index / 2**20:8.1f} MiB  "
+                    f"total {(heap + index) / 2**20:8.1f} MiB  "
+                    f"load {load:6.2f} s  scan {rows} rows {scan * 1000:7.2f} ms"
+                )
+        finally:
+            await pg.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--window-days", type=int, default=183)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.assets, args.days, args.window_days, args.repeat))
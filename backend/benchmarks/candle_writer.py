@@ -0,0 +1,85 @@
+"""Benchmark: candle write paths.
+
+Compares, for the same synthetic history:
+    orm     — one Candle object per row through the unit of work (old path)
+    insert  — multi-row INSERT ... ON CONFLICT batches (service.insert_candles)
+    copy    — COPY into a staging table + merge (bulk.copy_candles)
+
+Needs a migrated Postgres configured through .env. A throwaway asset is
+created per run and deleted afterwards.
+
+    python -m benchmarks.candle_writer --rows 20000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+
+from src.core.database import SessionLocal, engine
+from src.market.bulk import copy_candles
+from src.market.models import Asset, Candle
+from src.market.service import insert_candles
+
+
+def synthetic_candles(rows: int) -> list[dict]:
+    start = datetime(2000, 1, 3, tzinfo=timezone.utc)
+    candles = []
+    for i in range(rows):
+        ts = start + timedelta(minutes=i)
+        price = 100.0 + (i % 500) * 0.01
+        candles.append({
+            "time": ts.timestamp(), "timestamp": ts,
+            "open": price, "high": price + 0.5, "low": price - 0.5, "close": price + 0.1,
+            "volume": 1000 + i,
+        })
+    return candles
+
+
+async def write_orm(db, asset_id, timeframe, candles):
+    for c in candles:
+        db.add(Candle(
+            asset_id=asset_id, timeframe=timeframe, timestamp=c["timestamp"],
+            open=c["open"], high=c["high"], low=c["low"], close=c["close"], volume=c["volume"],
+        ))
+    await db.flush()
+
+
+WRITERS = {"orm": write_orm, "insert": insert_candles, "copy": copy_candles}
+
+
+async def run(rows: int, repeat: int) -> None:
+    candles = synthetic_candles(rows)
+    async with SessionLocal() as db:
+        asset = Asset(symbol=f"BENCH-{uuid.uuid4().hex[:8]}", asset_name=f"bench {uuid.uuid4()}", asset_type="unknown")
+        db.add(asset)
+        await db.commit()
+        try:
+            print(f"{rows} rows, best of {repeat}")
+            for name, writer in WRITERS.items():
+                best = float("inf")
+                for _ in range(repeat):
+                    await db.execute(delete(Candle).where(Candle.asset_id == asset.id))
+                    await db.commit()
+                    t0 = time.perf_counter()
+                    await writer(db, asset.id, "1m", candles)
+                    await db.commit()
+                    best = min(best, time.perf_counter() - t0)
+                print(f"  {name:<7} {best * 1000:9.1f} ms  {rows / best:12,.0f} rows/s")
+        finally:
+            await db.delete(asset)
+            await db.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
@@ -0,0 +1,173 @@
+"""Benchmark: `service.get_candles` / `service.get_quote` throughput.
+
+Runs offline against the replay provider (see `src/market/replay.py`),
+so it needs neither Yahoo Finance nor Postgres: symbols are served as
+unregistered assets and shared-cache entries stay in process. Without
+`--fixtures`, synthetic daily series are generated into a temporary
+directory.
+
+Each pass issues `--requests` calls over `--symbols` symbols with
+`--concurrency` in flight:
+    cold  — caches (quote, shared and ad-hoc candle tiers) cleared before the
+            pass; every symbol goes to the provider once
+    warm  — the same calls again, answered from the caches
+
+Reports requests/s and p50/p99 latency. `--min-rps` makes the run fail
+when a cold pass falls below it (for CI). The upstream rate limiter is
+lifted unless `--upstream-rate` is given.
+
+    python -m benchmarks.market_throughput --symbols 50 --requests 2000 --latency 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+from src.market import provider, service
+from src.market.adhoc import AdhocCandleCache
+from src.market.cache import SharedCache, quote_cache
+from src.market.registry import asset_registry
+from src.market.replay import ReplayProvider, fixture_path, write_fixture
+from src.market.upstream import TokenBucket
+
+
+def synthetic_fixtures(directory: Path, symbols: int, days: int, seed: int = 0) -> list[str]:
+    """A random-walk daily series per symbol, written as CSV fixtures."""
+    rng = np.random.default_rng(seed)
+    start = datetime(2020, 1, 2, 16, tzinfo=timezone.utc)
+    names = [f"SYM{i:03d}" for i in range(symbols)]
+    for name in names:
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+        candles = []
+        for d, c in enumerate(close.tolist()):
+            ts = start + timedelta(days=d)
+            candles.append({
+                "time": ts.timestamp(), "timestamp": ts,
+                "open": c, "high": c * 1.01, "low": c * 0.99, "close": c, "volume": 1_000_000 + d,
+            })
+        write_fixture(fixture_path(directory, name, "1d"), candles)
+    return names
+
+
+class ProviderMetadata:
+    """Metadata straight from the provider, standing in for the DB-backed store."""
+
+    async def get(self, symbol: str) -> dict:
+        return await provider.afetch_metadata(symbol) or {"symbol": symbol}
+
+
+def reset_caches() -> None:
+    quote_cache.invalidate()
+    service.market_cache = SharedCache(redis_factory=lambda: None)
+    service.adhoc_candles = AdhocCandleCache(promote_after=0)  # promotion would need a DB
+    service.negative_cache.clear()
+
+
+async def timed_pass(call, symbols: list[str], requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = np.empty(requests)
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                await call(symbols[i % len(symbols)])
+            except Exception:
+                errors += 1
+            latencies[i] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - t0
+    return {
+        "rps": requests / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "errors": errors,
+    }
+
+
+async def run(
+    fixtures: Path | None,
+    symbols: int,
+    days: int,
+    requests: int,
+    concurrency: int,
+    latency: float,
+    error_rate: float,
+    upstream_rate: float = 0.0,
+) -> dict[str, dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = fixtures or Path(tmp)
+        names = (
+            sorted({p.stem.rsplit("_", 1)[0] for p in directory.glob("*_1d.*")})
+            if fixtures else synthetic_fixtures(directory, symbols, days)
+        )
+        provider.set_provider(ReplayProvider(directory, latency=latency, error_rate=error_rate))
+        asset_registry.replace([])  # every symbol is unregistered; no DB reads
+        calls = {
+            "get_candles": lambda s: service.get_candles(None, s, "1d", "1y"),
+            "get_quote": service.get_quote,
+        }
+        results, limiter = {}, provider.upstream_limiter
+        shared, adhoc, metadata = service.market_cache, service.adhoc_candles, service.metadata_store
+        service.metadata_store = ProviderMetadata()
+        provider.upstream_limiter = TokenBucket(
+            rate=upstream_rate or 1e9, burst=limiter.burst, max_wait=limiter.max_wait,
+        )
+        try:
+            for name, call in calls.items():
+                reset_caches()
+                results[f"{name} cold"] = await timed_pass(call, names, len(names), concurrency)
+                results[f"{name} warm"] = await timed_pass(call, names, requests, concurrency)
+        finally:
+            provider.set_provider(None)
+            asset_registry.invalidate()
+            quote_cache.invalidate()
+            service.market_cache = shared
+            service.adhoc_candles = adhoc
+            service.metadata_store = metadata
+            provider.upstream_limiter = limiter
+    return results
+
+
+def report(results: dict[str, dict]) -> None:
+    for name, r in results.items():
+        print(
+            f"  {name:<17} {r['rps']:12,.0f} req/s  p50 {r['p50'] * 1000:8.2f} ms  "
+            f"p99 {r['p99'] * 1000:8.2f} ms  errors {r['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, help="directory of recorded fixtures (default: synthetic)")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated provider latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-rate", type=float, default=0.0, help="upstream calls/s (default: unlimited)")
+    parser.add_argument("--min-rps", type=float, default=0.0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(
+        args.fixtures, args.symbols, args.days, args.requests, args.concurrency, args.latency, args.error_rate,
+        args.upstream_rate,
+    ))
+    report(results)
+    slow = [name for name, r in results.items() if name.endswith("cold") and r["rps"] < args.min_rps]
+    if slow:
+        print(f"below {args.min_rps:,.0f} req/s: {', '.join(slow)}")
+        sys.exit(1)
@@ -0,0 +1,80 @@
+"""Microbenchmark: yfinance DataFrame -> candle dicts.
+
+Compares the old `df.iterrows()` loop with the column-wise
+`provider.frame_to_candles` on a synthetic tz-aware 1-minute frame.
+Runs offline (needs pandas, which yfinance pulls in).
+
+    python -m benchmarks.provider_frame --rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import timezone
+
+import numpy as np
+import pandas as pd
+
+from src.market.provider import frame_to_candles
+
+
+def iterrows_to_candles(df: pd.DataFrame) -> list[dict]:
+    """The pre-vectorisation conversion, kept for comparison."""
+    candles = []
+    for ts, row in df.iterrows():
+        candles.append({
+            "time": ts.timestamp(),
+            "timestamp": ts.to_pydatetime().replace(tzinfo=timezone.utc),
+            "open": round(row["Open"], 4),
+            "high": round(row["High"], 4),
+            "low": round(row["Low"], 4),
+            "close": round(row["Close"], 4),
+            "volume": int(row.get("Volume", 0)),
+        })
+    return candles
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, rows))
+    index = pd.date_range("2015-01-02 09:30", periods=rows, freq="min", tz="America/New_York")
+    return pd.DataFrame(
+        {
+            "Open": close + rng.normal(0, 0.05, rows),
+            "High": close + 0.2,
+            "Low": close - 0.2,
+            "Close": close,
+            "Volume": rng.integers(0, 1_000_000, rows),
+        },
+        index=index,
+    )
+
+
+def best_of(fn, df, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(rows: int, repeat: int) -> None:
+    df = synthetic_frame(rows)
+    assert iterrows_to_candles(df.iloc[:1000]) == frame_to_candles(df.iloc[:1000])
+
+    old = best_of(iterrows_to_candles, df, repeat)
+    new = best_of(frame_to_candles, df, repeat)
+    print(f"{rows:,} rows, best of {repeat}")
+    print(f"  iterrows          {old * 1000:9.1f} ms")
+    print(f"  frame_to_candles  {new * 1000:9.1f} ms")
+    print(f"  speedup           {old / new:9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
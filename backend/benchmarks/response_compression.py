@@ -0,0 +1,95 @@
+"""Microbenchmark: response compression on a 5-year daily candle response.
+
+Builds the `/market/candles/{symbol}` bodies for a synthetic daily series
+(rows and columnar JSON as the router renders them, plus the packed
+float64 transport for reference) and compresses each with every coding
+`CompressionMiddleware` can produce here, at the configured levels:
+
+    whole    — body compressed in one message (a regular JSONResponse)
+    chunked  — body sent as 64 KiB messages, each flushed on its own
+               (what a streamed response costs)
+
+Reports compressed size, bytes saved and CPU time per response (best
+of `--repeat`, `time.process_time`). Runs offline; zstd and brotli rows
+appear only when `zstandard` / `brotli` are installed.
+
+    python -m benchmarks.response_compression --days 1260
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from src.core.compression import available_encodings, make_encoder
+from src.market import series, transport
+from src.market.schemas import CandleResponse, CandlesResponse
+
+CHUNK = 64 * 1024
+
+
+def synthetic_columns(days: int, seed: int = 0) -> series.Columns:
+    rng = np.random.default_rng(seed)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.015, days))), 4)
+    start = datetime(2020, 1, 2, tzinfo=timezone.utc)
+    rows = [
+        (start + timedelta(days=i), round(c * (1 + rng.normal(0, 0.003)), 4), round(c * 1.01, 4),
+         round(c * 0.99, 4), float(c), int(rng.integers(1_000_000, 50_000_000)))
+        for i, c in enumerate(close)
+    ]
+    return series.rows_to_columns(rows)
+
+
+def bodies(cols: series.Columns) -> dict[str, bytes]:
+    rows = CandlesResponse(
+        symbol="AAPL", timeframe="1d", count=series.length(cols),
+        candles=[CandleResponse(**c) for c in series.columns_to_records(cols)],
+    )
+    columnar = {"symbol": "AAPL", "timeframe": "1d", "count": series.length(cols), **series.columns_to_lists(cols)}
+    return {
+        "rows json": JSONResponse(rows.model_dump()).body,
+        "columnar json": JSONResponse(columnar).body,
+        "packed f64": bytes(transport.encode_packed(cols)),
+    }
+
+
+def compress(coding: str, body: bytes, chunked: bool) -> bytes:
+    encoder = make_encoder(coding)
+    parts = [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)] if chunked else [body]
+    return b"".join(encoder.compress(part) for part in parts) + encoder.finish()
+
+
+def best_cpu(fn, repeat: int) -> tuple[float, bytes]:
+    best, out = float("inf"), b""
+    for _ in range(repeat):
+        t0 = time.process_time()
+        out = fn()
+        best = min(best, time.process_time() - t0)
+    return best, out
+
+
+def main(days: int, repeat: int) -> None:
+    cols = synthetic_columns(days)
+    print(f"{days:,} daily bars, best of {repeat}, codings: {', '.join(available_encodings())}")
+    for name, body in bodies(cols).items():
+        print(f"\n  {name}: {len(body):,} bytes")
+        for coding in available_encodings():
+            for chunked in (False, True):
+                cpu, out = best_cpu(lambda: compress(coding, body, chunked), repeat)
+                mode = "chunked" if chunked else "whole"
+                print(
+                    f"    {coding:5} {mode:8} {len(out):>10,} bytes  "
+                    f"saved {1 - len(out) / len(body):6.1%}  {cpu * 1000:7.2f} ms CPU"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=1260, help="bars in the series (1260 = 5 trading years)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.days, args.repeat)
@@ -16,7 +16,7 @@ blog and market data platform.
 Your capabilities:
 - Fetch live stock/crypto quotes
 - Analyze price history and trends
-- Compare multiple assets side-by-side
+- Compare multiple assets side-by-side, including returns, volatility and correlation
 - Explain financial concepts clearly
 - Discuss market news and strategies
 
@@ -110,7 +110,8 @@ async def run_agent(agent_config: dict, user_input: str, chat_history: list[dict
         for tc in tool_calls:
             tool_fn = tools.get(tc["name"])
             if tool_fn:
-                result = tool_fn.invoke(tc["args"])
+                # Sync tools (yfinance) run off the event loop; async ones are awaited directly
+                result = await tool_fn.ainvoke(tc["args"])
                 from langchain_core.messages import ToolMessage
                 messages.append(ToolMessage(content=str(result), tool_call_id=tc["id"]))
                 yield f"\n\n"  # Visual separator between tool result and final response
@@ -2,65 +2,75 @@
 
 from __future__ import annotations
 
+from fastapi import HTTPException
 from langchain_core.tools import tool
 
-from src.market.provider import fetch_candles, fetch_quote, VALID_TIMEFRAMES
+from src.core.database import SessionLocal
+from src.market import series, service
+from src.market.analytics import get_analytics
+
+# Tools go through the market service like the API does: caches, negative
+# cache, rate limiter, circuit breaker and the bounded provider pool.
 
 
 @tool
-def get_stock_quote(symbol: str) -> str:
+async def get_stock_quote(symbol: str) -> str:
     """Get the latest price quote for a stock or crypto symbol (e.g. AAPL, BTC-USD, TSLA).
     Returns current price, price change, percentage change, and volume."""
     try:
-        q = fetch_quote(symbol)
-        if not q:
+        try:
+            q = await service.get_quote(symbol)
+        except HTTPException:
             return f"Could not retrieve quote for {symbol}."
         direction = "📈" if q["change"] >= 0 else "📉"
+        # The name is the symbol itself when metadata was unavailable
+        name = f" ({q['name']})" if q.get("name") and q["name"] != q["symbol"] else ""
         return (
-            f"{direction} **{q['symbol']}** ({q['name']})\n"
+            f"{direction} **{q['symbol']}**{name}\n"
             f"Price: ${q['price']:,.2f}\n"
             f"Change: {'+' if q['change'] >= 0 else ''}{q['change']:.2f} "
             f"({'+' if q['change_percent'] >= 0 else ''}{q['change_percent']:.2f}%)\n"
             f"Volume: {q['volume']:,}"
         )
     except Exception as e:
-        return f"Error fetching quote for {symbol}: {e}"
+        return f"Error fetching quote for {symbol}: {getattr(e, 'detail', e)}"
 
 
 @tool
-def get_price_history(symbol: str, timeframe: str = "1d", period: str = "1mo") -> str:
+async def get_price_history(symbol: str, timeframe: str = "1d", period: str = "1mo") -> str:
     """Get historical OHLCV price data for a symbol. 
     Timeframes: 1m, 5m, 15m, 30m, 1h, 1d, 1wk, 1mo.
     Periods: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max.
     Returns a summary with recent candles and basic statistics."""
     try:
-        candles = fetch_candles(symbol, timeframe, period)
-        if not candles:
+        try:
+            async with SessionLocal() as db:
+                resolved, candles = await service.get_candles(db, symbol, timeframe, period)
+        except HTTPException as e:
+            if e.status_code in (404, 503):
+                return f"No price history found for {symbol}."
+            raise
+        if not series.length(candles):
             return f"No price history found for {symbol}."
-        
-        closes = [c["close"] for c in candles]
-        highs = [c["high"] for c in candles]
-        lows = [c["low"] for c in candles]
-        
-        latest = candles[-1]
-        first = candles[0]
-        change = latest["close"] - first["close"]
-        change_pct = (change / first["close"]) * 100
-        
+
+        closes = candles["close"].tolist()
+        change = closes[-1] - closes[0]
+        change_pct = (change / closes[0]) * 100
+
         return (
-            f"**{symbol.upper()}** — {len(candles)} candles ({timeframe}, {period})\n"
-            f"Current: ${latest['close']:,.2f}\n"
-            f"Period High: ${max(highs):,.2f} | Period Low: ${min(lows):,.2f}\n"
+            f"**{resolved}** — {len(closes)} candles ({timeframe}, {period})\n"
+            f"Current: ${closes[-1]:,.2f}\n"
+            f"Period High: ${candles['high'].max():,.2f} | Period Low: ${candles['low'].min():,.2f}\n"
             f"Period Change: {'+' if change >= 0 else ''}{change:.2f} ({change_pct:+.2f}%)\n"
             f"Avg Close: ${sum(closes)/len(closes):,.2f}\n"
             f"Last 5 closes: {', '.join(f'${c:.2f}' for c in closes[-5:])}"
         )
     except Exception as e:
-        return f"Error fetching price history for {symbol}: {e}"
+        return f"Error fetching price history for {symbol}: {getattr(e, 'detail', e)}"
 
 
 @tool
-def compare_stocks(symbols: str) -> str:
+async def compare_stocks(symbols: str) -> str:
     """Compare multiple stocks/crypto by their current prices.
     Pass comma-separated symbols like 'AAPL,MSFT,GOOGL'."""
     try:
@@ -68,9 +78,13 @@ def compare_stocks(symbols: str) -> str:
         if not syms:
             return "Please provide at least one symbol."
         
+        syms = list(dict.fromkeys(syms))[:5]  # Max 5
+        quotes, _ = await service.get_quotes(syms)
+        quotes = {q["symbol"]: q for q in quotes}
+
         results = []
-        for sym in syms[:5]:  # Max 5
-            q = fetch_quote(sym)
+        for sym in syms:
+            q = quotes.get(sym)
             if q:
                 direction = "🟢" if q["change"] >= 0 else "🔴"
                 results.append(
@@ -82,8 +96,40 @@ def compare_stocks(symbols: str) -> str:
         
         return "**Stock Comparison**\n" + "\n".join(results)
     except Exception as e:
-        return f"Error comparing stocks: {e}"
+        return f"Error comparing stocks: {getattr(e, 'detail', e)}"
+
+
+@tool
+async def analyze_stocks(symbols: str, period: str = "1y") -> str:
+    """Analyze how several stocks/crypto performed together over a period using daily closes:
+    total return, annualized volatility and the correlation between each pair.
+    Pass comma-separated symbols like 'AAPL,MSFT,GOOGL'.
+    Periods: 1mo, 3mo, 6mo, 1y, 2y, 5y."""
+    try:
+        syms = [s.strip().upper() for s in symbols.split(",") if s.strip()][:5]  # Max 5
+        if not syms:
+            return "Please provide at least one symbol."
+        result = await get_analytics(syms, "1d", period)
+
+        lines = [f"**Analysis** ({result['count']} common trading days, {period})"]
+        for sym, stats in result["summary"].items():
+            vol = f"{stats['volatility'] * 100:.1f}%" if stats["volatility"] is not None else "n/a"
+            lines.append(f"**{sym}**: return {stats['total_return'] * 100:+.2f}%, volatility {vol}")
+        analyzed = result["symbols"]
+        pairs = [
+            f"{a}/{b}: {result['correlation'][i][j]:.2f}"
+            for i, a in enumerate(analyzed)
+            for j, b in enumerate(analyzed)
+            if i < j and result["correlation"][i][j] is not None
+        ]
+        if pairs:
+            lines.append("Correlation: " + ", ".join(pairs))
+        for sym, reason in result["errors"].items():
+            lines.append(f"⚪ **{sym}**: {reason}")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error analyzing stocks: {getattr(e, 'detail', e)}"
 
 
 # All tools to register with the agent
-ALL_TOOLS = [get_stock_quote, get_price_history, compare_stocks]
+ALL_TOOLS = [get_stock_quote, get_price_history, compare_stocks, analyze_stocks]
@@ -2,7 +2,7 @@
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from src.auth.dependencies import get_current_user
 from src.auth.models import User
@@ -25,8 +25,18 @@ from src.blog.schemas import (
     TagResponse,
 )
 from src.blog.search import search_posts
+from src.core.config import settings
 from src.core.database import SessionDep
 from src.core.dependencies import require_admin, require_author
+from src.core.http_cache import (
+    PRIVATE_REVALIDATE,
+    REVALIDATE,
+    cache_headers,
+    etag_matches,
+    make_etag,
+    not_modified,
+    public,
+)
 from src.core.pagination import PaginatedResponse, PaginationParams
 from src.utils.og_meta import generate_og_meta, generate_share_urls
 
@@ -41,13 +51,32 @@ tag_route = APIRouter(prefix="/tags", tags=["Tags"])
 
 @blog_route.get("/", response_model=PaginatedResponse[PostResponse])
 async def list_posts(
+    request: Request,
+    response: Response,
     db: SessionDep,
     pagination: PaginationParams = Depends(),
     category: str | None = Query(None, description="Filter by category slug"),
     tag: str | None = Query(None, description="Filter by tag slug"),
     status: str = Query("published", description="Post status filter"),
 ):
-    """List published posts with optional category/tag filters."""
+    """
+    List published posts with optional category/tag filters.
+
+    The ETag follows the count and newest `updated_at` of the matching
+    posts and of the authors, categories and tags they embed (see
+    `service.latest_post_update`); clients revalidate on every use and get
+    a 304 when unchanged. Only published listings may be kept by shared
+    caches.
+    """
+    count, updated_at, related = await service.latest_post_update(
+        db, status_filter=status, category_slug=category, tag_slug=tag,
+    )
+    etag = make_etag(status, category, tag, pagination.page, pagination.per_page, count, updated_at, *related)
+    cache_control = REVALIDATE if status == "published" else PRIVATE_REVALIDATE
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control, updated_at)
+    response.headers.update(cache_headers(etag, cache_control, updated_at))
+
     posts, total = await service.list_posts(
         db,
         status_filter=status,
@@ -269,8 +298,9 @@ async def get_shares(post_id: UUID, db: SessionDep):
 # ══════════════════════════════════════════════════════════════
 
 @category_route.get("/", response_model=list[CategoryResponse])
-async def list_categories(db: SessionDep):
+async def list_categories(db: SessionDep, response: Response):
     """List all categories."""
+    response.headers["Cache-Control"] = public(settings.HTTP_PUBLIC_MAX_AGE)
     return await service.list_categories(db)
 
 
@@ -314,6 +344,7 @@ async def delete_category(category_id: UUID, db: SessionDep):
 # ══════════════════════════════════════════════════════════════
 
 @tag_route.get("/", response_model=list[TagResponse])
-async def list_tags(db: SessionDep):
+async def list_tags(db: SessionDep, response: Response):
     """List all tags."""
+    response.headers["Cache-Control"] = public(settings.HTTP_PUBLIC_MAX_AGE)
     return await service.list_tags(db)
@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 from typing import Sequence
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import Select, delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -170,20 +171,9 @@ async def list_posts(
     offset: int = 0,
 ) -> tuple[Sequence[Post], int]:
     """List posts with optional filters. Returns (posts, total_count)."""
-    stmt = select(Post).where(Post.status == status_filter)
-    count_stmt = select(func.count()).select_from(Post).where(Post.status == status_filter)
-
-    if category_slug:
-        stmt = stmt.join(Category).where(Category.slug == category_slug)
-        count_stmt = count_stmt.join(Category).where(Category.slug == category_slug)
-
-    if tag_slug:
-        stmt = stmt.join(PostTag).join(Tag).where(Tag.slug == tag_slug)
-        count_stmt = count_stmt.join(PostTag).join(Tag).where(Tag.slug == tag_slug)
-
-    if author_id:
-        stmt = stmt.where(Post.author_id == author_id)
-        count_stmt = count_stmt.where(Post.author_id == author_id)
+    filters = dict(status_filter=status_filter, category_slug=category_slug, tag_slug=tag_slug, author_id=author_id)
+    stmt = _filter_posts(select(Post), **filters)
+    count_stmt = _filter_posts(select(func.count()).select_from(Post), **filters)
 
     stmt = stmt.order_by(Post.created_at.desc()).offset(offset).limit(limit)
 
@@ -193,6 +183,56 @@ async def list_posts(
     return result.scalars().all(), count_result.scalar_one()
 
 
+async def latest_post_update(
+    db: AsyncSession,
+    *,
+    status_filter: str = "published",
+    category_slug: str | None = None,
+    tag_slug: str | None = None,
+    author_id: uuid.UUID | None = None,
+) -> tuple[int, datetime | None, tuple]:
+    """
+    (count, last modified, related) of the posts `list_posts` would page
+    through, in one query. `related` holds the row counts and newest
+    `updated_at` of what each listed post embeds (authors, categories,
+    tags and tag links), so editing any of them changes it too; last
+    modified is the newest `updated_at` across all of them.
+    """
+    filters = dict(status_filter=status_filter, category_slug=category_slug, tag_slug=tag_slug, author_id=author_id)
+    listed = _filter_posts(select(Post.id, Post.author_id), **filters).subquery()
+    related = (
+        select(func.max(User.updated_at)).where(User.id.in_(select(listed.c.author_id))).scalar_subquery(),
+        select(func.count()).select_from(Category).scalar_subquery(),
+        select(func.max(Category.updated_at)).scalar_subquery(),
+        select(func.count()).select_from(Tag).scalar_subquery(),
+        select(func.max(Tag.updated_at)).scalar_subquery(),
+        select(func.count()).where(PostTag.post_id.in_(select(listed.c.id))).scalar_subquery(),
+        select(func.max(PostTag.updated_at)).where(PostTag.post_id.in_(select(listed.c.id))).scalar_subquery(),
+    )
+    stmt = _filter_posts(select(func.count(), func.max(Post.updated_at), *related).select_from(Post), **filters)
+    count, updated_at, *markers = (await db.execute(stmt)).one()
+    updated_at = max((t for t in (updated_at, *markers) if isinstance(t, datetime)), default=None)
+    return count, updated_at, tuple(markers)
+
+
+def _filter_posts(
+    stmt: Select,
+    *,
+    status_filter: str,
+    category_slug: str | None,
+    tag_slug: str | None,
+    author_id: uuid.UUID | None,
+) -> Select:
+    stmt = stmt.where(Post.status == status_filter)
+    if category_slug:
+        stmt = stmt.join(Category).where(Category.slug == category_slug)
+    if tag_slug:
+        stmt = stmt.join(PostTag).join(Tag).where(Tag.slug == tag_slug)
+    if author_id:
+        stmt = stmt.where(Post.author_id == author_id)
+    return stmt
+
+
 async def increment_view_count(db: AsyncSession, post_id: uuid.UUID) -> None:
     post = await get_post_by_id(db, post_id)
     if post:
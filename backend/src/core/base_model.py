@@ -12,7 +12,8 @@ from src.utils.datetime_util import time_now
 metadata = MetaData(naming_convention=DB_NAMING_CONVENTION)
 
 
-class Base(DeclarativeBase):
+class TableBase(DeclarativeBase):
+    """Declarative root without the surrogate id and audit columns, for high-volume tables."""
     __abstract__ = True
     metadata = metadata
 
@@ -20,13 +21,17 @@ class Base(DeclarativeBase):
     def __tablename__(cls) -> str:
         return cls.__name__.lower()
 
+    def to_dict(self) -> dict:
+        return {
+            column.name: getattr(self, column.name) for column in self.__table__.columns
+        }
+
+
+class Base(TableBase):
+    __abstract__ = True
+
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, index=True, nullable=False, default=uuid.uuid4)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=time_now)
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), default=time_now, onupdate=time_now
-    )
-
-    def to_dict(self) -> dict:
-        return {
-            column.name: getattr(self, column.name) for column in self.__table__.columns
-        }
\ No newline at end of file
+    )
\ No newline at end of file
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import (EmailStr, PostgresDsn, 
                       computed_field)
 from pydantic_core import MultiHostUrl
@@ -26,6 +28,20 @@ class Settings(CustomBaseSettings):
     POSTGRES_HOST: str
     SQLALCHEMY_DATABASE_URL: str
 
+    # Redis (optional shared cache; in-process fallback when unset)
+    REDIS_URL: str | None = None
+    REDIS_TIMEOUT: float = 0.5  # seconds
+
+    # HTTP caching (see src/core/http_cache.py)
+    HTTP_PUBLIC_MAX_AGE: int = 60  # seconds clients may reuse public listings (assets, categories, tags)
+
+    # Response compression (see src/core/compression.py)
+    COMPRESSION_ENABLED: bool = True  # turn off when a reverse proxy compresses instead
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller responses are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11; higher costs far more CPU for a few % smaller
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
     # Authentication
     SECRET_KEY: str
     SECURITY_ALGORITHM: str
@@ -45,6 +61,52 @@ class Settings(CustomBaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
 
+    # Market data provider
+    MARKET_PROVIDER: Literal["yfinance", "replay"] = "yfinance"
+    MARKET_REPLAY_DIR: str = "fixtures/market"  # CSV/Parquet fixtures for the replay provider
+    MARKET_REPLAY_LATENCY: float = 0.0  # seconds added to every replayed call
+    MARKET_REPLAY_JITTER: float = 0.0  # extra random latency, up to this many seconds
+    MARKET_REPLAY_ERROR_RATE: float = 0.0  # fraction of replayed calls that fail
+    MARKET_REPLAY_SEED: int = 0
+    MARKET_PROVIDER_WORKERS: int = 8
+    MARKET_PROVIDER_MAX_PENDING: int = 64
+    MARKET_PROVIDER_TIMEOUT: float = 15.0  # seconds per upstream call
+    MARKET_UPSTREAM_RATE: float = 5.0  # upstream calls per second (token refill rate)
+    MARKET_UPSTREAM_BURST: int = 20
+    MARKET_UPSTREAM_MAX_WAIT: float = 5.0  # seconds a call may wait for a token before it is rejected
+    MARKET_BREAKER_THRESHOLD: int = 5  # consecutive upstream failures that open the circuit
+    MARKET_BREAKER_COOLDOWN: float = 30.0  # seconds open before a probe call is let through
+    MARKET_QUOTE_TTL: float = 15.0  # seconds a quote is served fresh
+    MARKET_QUOTE_STALE_TTL: float = 60.0  # extra seconds served stale while refreshing
+    MARKET_QUOTE_CACHE_SIZE: int = 2048
+    MARKET_MAX_BATCH_SYMBOLS: int = 25
+    MARKET_CANDLE_MAX_STALENESS: int = 15 * 60  # seconds before stored candles are topped up
+    MARKET_BULK_COPY_THRESHOLD: int = 2000  # rows; larger writes use COPY instead of INSERT
+    MARKET_CANDLE_CACHE_MAX_TTL: int = 5 * 60  # seconds a serialized candle payload is shared
+    MARKET_SHARED_CACHE_LOCAL_SIZE: int = 512  # entries kept in-process when Redis is absent
+    MARKET_STREAM_POLL_INTERVAL: float = 5.0  # seconds between quote polls per streamed symbol
+    MARKET_ADHOC_CACHE_SIZE: int = 256  # unregistered (symbol, timeframe) series kept in process, LRU-evicted
+    MARKET_ADHOC_PROMOTE_AFTER: int = 20  # requests within the window that register a symbol; 0 disables
+    MARKET_ADHOC_PROMOTE_WINDOW: int = 60 * 60  # seconds
+    MARKET_NEGATIVE_TTL: int = 120  # seconds a symbol with no data is answered without an upstream call
+    MARKET_NEGATIVE_CACHE_SIZE: int = 4096
+    MARKET_SYMBOL_INDEX_PATH: str | None = None  # optional file of valid symbols; others are rejected
+    MARKET_METADATA_MAX_AGE: int = 7 * 24 * 60 * 60  # seconds before stored symbol metadata is refetched
+    MARKET_METADATA_CACHE_TTL: int = 60 * 60  # seconds in process before re-reading the stored row
+    MARKET_METADATA_CACHE_SIZE: int = 4096
+    MARKET_ASSET_REGISTRY_TTL: int = 60  # seconds before the in-process asset registry reloads
+    MARKET_INDICATOR_CACHE_TTL: int = 24 * 60 * 60  # seconds an unused indicator result is kept
+    MARKET_INDICATOR_CACHE_SIZE: int = 512  # (symbol, timeframe, indicator) results kept in-process
+    MARKET_CANDLE_STREAM_INTERVAL: float = 10.0  # seconds between forming-bar fetches per streamed series
+
+    # Background candle refresher
+    MARKET_REFRESH_ENABLED: bool = True
+    MARKET_REFRESH_TIMEFRAMES: list[str] = ["5m", "1h", "1d"]
+    MARKET_REFRESH_CONCURRENCY: int = 4
+    MARKET_REFRESH_MAX_BACKOFF: int = 60 * 60  # seconds
+    MARKET_REFRESH_ASSET_RELOAD: int = 60  # seconds between asset list reloads
+    MARKET_PARTITION_CHECK_INTERVAL: int = 24 * 60 * 60  # seconds between candle partition checks
+
     @computed_field
     @property
     def ASYNC_DATABASE_URI(self) -> PostgresDsn:
@@ -0,0 +1,56 @@
+"""Conditional GET and Cache-Control helpers for public read endpoints.
+
+Responses under /api/ and /auth/ default to `no-store` (see the security
+middleware in `main.py`); endpoints serving public data opt in by setting
+their own Cache-Control, and, where a cheap validator exists, an ETag:
+
+    etag = make_etag(symbol, timeframe, last_bar_time, ...)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+
+ETags are weak (`W/"..."`): they identify the content, not the bytes, so
+they survive response compression.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi import Request, Response
+
+NO_STORE = "no-store, no-cache, must-revalidate"
+REVALIDATE = "public, no-cache"  # may be stored, but revalidated on every use
+PRIVATE_REVALIDATE = "private, no-cache"  # as REVALIDATE, but never in shared caches
+
+
+def public(max_age: float) -> str:
+    return f"public, max-age={int(max_age)}"
+
+
+def make_etag(*parts: object) -> str:
+    """Weak ETag over the `str()` of each part."""
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether `If-None-Match` lists `etag` (weak comparison) or is `*`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    opaque = etag.removeprefix("W/")
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == opaque for tag in tags)
+
+
+def cache_headers(etag: str, cache_control: str, last_modified: datetime | None = None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def not_modified(etag: str, cache_control: str, last_modified: datetime | None = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control, last_modified))
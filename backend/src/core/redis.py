@@ -0,0 +1,28 @@
+"""Shared async Redis client."""
+
+from redis.asyncio import Redis
+
+from src.core.config import settings
+
+_client: Redis | None = None
+
+
+def get_redis() -> Redis | None:
+    """Process-wide Redis client, or None when REDIS_URL is not configured."""
+    global _client
+    if not settings.REDIS_URL:
+        return None
+    if _client is None:
+        _client = Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_TIMEOUT,
+            socket_timeout=settings.REDIS_TIMEOUT,
+        )
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
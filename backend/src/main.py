@@ -7,16 +7,38 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 from starlette.middleware.cors import CORSMiddleware
 
+from src.core.compression import CompressionMiddleware
 from src.core.config import settings
+from src.core.database import SessionLocal
+from src.core.http_cache import NO_STORE
+from src.core.redis import close_redis
 from src.router import api_router
 from src.auth.router import auth_route
+from src.market.partitions import ensure_candle_partitions
+from src.market.metadata import metadata_store
+from src.market.registry import asset_registry
+from src.market.refresher import market_refresher
+from src.market.stream import candle_hub, quote_hub
 
 THIS_DIR = Path(__file__).parent
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Application startup")
+    try:
+        async with SessionLocal() as db:
+            await ensure_candle_partitions(db)
+            await asset_registry.load(db)
+            await metadata_store.preload(db)
+    except Exception as e:
+        logger.warning(f"Market startup tasks skipped: {e!r}")
+    if settings.MARKET_REFRESH_ENABLED:
+        market_refresher.start()
     yield
+    await market_refresher.stop()
+    await quote_hub.close()
+    await candle_hub.close()
+    await close_redis()
 
 # ── OpenAPI tags for docs grouping ──
 tags_metadata = [
@@ -47,9 +69,9 @@ async def add_security_headers(request: Request, call_next):
     response.headers["X-XSS-Protection"] = "1; mode=block"
     response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
     response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    # Prevent caching on API responses
+    # API responses are not cached unless the endpoint sets its own policy (see src/core/http_cache.py)
     if request.url.path.startswith("/api/") or request.url.path.startswith("/auth/"):
-        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate"
+        response.headers.setdefault("Cache-Control", NO_STORE)
     return response
 
 
@@ -62,6 +84,9 @@ app.add_middleware(
     allow_headers=settings.CORS_HEADERS,
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(
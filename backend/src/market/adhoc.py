@@ -0,0 +1,157 @@
+"""In-process candle tier for ad-hoc (unregistered) symbols.
+
+Registered assets are served from the `candles` table; anything else a
+user looks up used to be refetched in full from the provider on every
+request. `AdhocCandleCache` keeps those series in memory instead, one
+entry per (symbol, timeframe) holding the longest period fetched so far,
+evicting the least recently used beyond MARKET_ADHOC_CACHE_SIZE series.
+`service.get_candles` tops entries up incrementally once stale and slices
+shorter periods out of longer ones.
+
+It also counts requests per symbol: once a symbol is requested
+MARKET_ADHOC_PROMOTE_AFTER times within MARKET_ADHOC_PROMOTE_WINDOW
+seconds, `record_request` reports it once so the service can register it
+and move its cached series into the persistent store.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.core.config import settings
+from src.market import series
+from src.market.provider import PERIOD_DELTAS
+from src.market.series import Columns
+
+
+@dataclass
+class AdhocSeries:
+    cols: Columns  # series columns plus "timestamp" (datetime64[us], the stored convention)
+    period: str    # longest period fetched
+    fetched_at: datetime
+
+    @classmethod
+    def from_candles(cls, candles: list[dict], period: str, fetched_at: datetime) -> AdhocSeries:
+        cols = series.records_to_columns(candles)
+        cols["timestamp"] = np.array([c["timestamp"].replace(tzinfo=None) for c in candles], dtype="datetime64[us]")
+        return cls(cols, period, fetched_at)
+
+    @property
+    def last_timestamp(self) -> datetime:
+        return self.cols["timestamp"][-1].item().replace(tzinfo=timezone.utc)
+
+    def covers(self, period: str) -> bool:
+        have, want = PERIOD_DELTAS[self.period], PERIOD_DELTAS[period]
+        return have is None or (want is not None and want <= have)
+
+    def extended(self, candles: list[dict], fetched_at: datetime) -> AdhocSeries:
+        """Copy with `candles` (fetched from the last bar on) replacing any bars they overlap."""
+        if not candles:
+            return AdhocSeries(self.cols, self.period, fetched_at)
+        new = AdhocSeries.from_candles(candles, self.period, fetched_at).cols
+        keep = int(np.searchsorted(self.cols["timestamp"], new["timestamp"][0]))
+        cols = {k: np.concatenate((v[:keep], new[k])) for k, v in self.cols.items()}
+        return AdhocSeries(cols, self.period, fetched_at)
+
+    def window(self, period: str, local_time: bool = False) -> Columns:
+        """
+        Series columns for the `period` window ending at the last bar. With
+        `local_time`, `time` is the exchange-local wall-clock time read as
+        UTC, the clock of series served from the candle store.
+        """
+        t = self.cols["time"]
+        delta = PERIOD_DELTAS[period]
+        lo = 0 if delta is None or not t.size else int(np.searchsorted(t, t[-1] - delta.total_seconds()))
+        cols = {k: self.cols[k][lo:] for k in series.CANDLE_FIELDS}
+        if local_time:
+            cols["time"] = self.cols["timestamp"][lo:].astype(np.int64) / 1e6
+        return cols
+
+    def records(self) -> list[dict]:
+        """Provider-style candle dicts, for writing to the candle store."""
+        stamps = [t.replace(tzinfo=timezone.utc) for t in self.cols["timestamp"].tolist()]
+        rows = zip(stamps, *(self.cols[k].tolist() for k in series.CANDLE_FIELDS))
+        return [{"timestamp": ts, **dict(zip(series.CANDLE_FIELDS, values))} for ts, *values in rows]
+
+
+class AdhocCandleCache:
+    def __init__(
+        self,
+        maxsize: int | None = None,
+        promote_after: int | None = None,
+        promote_window: float | None = None,
+    ):
+        self.maxsize = maxsize or settings.MARKET_ADHOC_CACHE_SIZE
+        self.promote_after = settings.MARKET_ADHOC_PROMOTE_AFTER if promote_after is None else promote_after
+        self.promote_window = promote_window or settings.MARKET_ADHOC_PROMOTE_WINDOW
+        self._series: OrderedDict[tuple[str, str], AdhocSeries] = OrderedDict()
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._requests: OrderedDict[str, deque[float]] = OrderedDict()
+        self._promoted: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def get(self, symbol: str, timeframe: str) -> AdhocSeries | None:
+        key = (symbol.upper(), timeframe)
+        entry = self._series.get(key)
+        if entry is not None:
+            self._series.move_to_end(key)
+        return entry
+
+    def set(self, symbol: str, timeframe: str, entry: AdhocSeries) -> None:
+        key = (symbol.upper(), timeframe)
+        self._series[key] = entry
+        self._series.move_to_end(key)
+        while len(self._series) > self.maxsize:
+            self._series.popitem(last=False)
+
+    def series_of(self, symbol: str) -> dict[str, AdhocSeries]:
+        symbol = symbol.upper()
+        return {tf: entry for (sym, tf), entry in self._series.items() if sym == symbol}
+
+    def drop(self, symbol: str) -> None:
+        symbol = symbol.upper()
+        for key in [key for key in self._series if key[0] == symbol]:
+            del self._series[key]
+        self._requests.pop(symbol, None)
+
+    def lock(self, symbol: str, timeframe: str) -> asyncio.Lock:
+        """Per-series lock so concurrent misses share one fetch."""
+        key = (symbol.upper(), timeframe)
+        if key not in self._locks and len(self._locks) >= 2 * self.maxsize:
+            self._locks = {k: v for k, v in self._locks.items() if v.locked()}
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def record_request(self, symbol: str) -> bool:
+        """Count a request; True exactly once, when `symbol` first becomes popular enough to promote."""
+        symbol = symbol.upper()
+        if not self.promote_after or symbol in self._promoted:
+            return False
+        now = time.monotonic()
+        hits = self._requests.setdefault(symbol, deque())
+        self._requests.move_to_end(symbol)
+        hits.append(now)
+        while hits and hits[0] <= now - self.promote_window:
+            hits.popleft()
+        while len(self._requests) > self.maxsize:
+            self._requests.popitem(last=False)
+        if len(hits) < self.promote_after:
+            return False
+        self._promoted.add(symbol)
+        return True
+
+    def promotion_failed(self, symbol: str) -> None:
+        """Let `symbol` be reported again after a failed promotion."""
+        symbol = symbol.upper()
+        self._promoted.discard(symbol)
+        self._requests.pop(symbol, None)
+
+
+adhoc_candles = AdhocCandleCache()
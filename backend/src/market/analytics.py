@@ -0,0 +1,173 @@
+"""Cross-symbol analytics: cumulative returns, rolling volatility, correlation.
+
+Closes for every symbol are read concurrently through `service.get_candles`
+(so the shared candle cache and DB store are used), all on the exchange-local
+clock of the candle store whether a symbol is registered or ad-hoc, aligned
+on the bars all symbols have in common, and processed as one
+(bars x symbols) NumPy matrix.
+
+Results are memoised per (symbols, timeframe, period, window) within time
+buckets one bar long (capped, see `candle_cache_ttl`). The REST endpoint
+and the AI agent's `analyze_stocks` tool both go through `get_analytics`,
+so they share those results and concurrent identical requests share one
+computation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.market import service
+from src.market.cache import TTLCache
+from src.market.exceptions import InvalidPeriod, InvalidSymbols, InvalidTimeframe, MarketDataUnavailable, UnknownSymbol
+from src.market.provider import TIMEFRAME_SECONDS, VALID_PERIODS, VALID_TIMEFRAMES
+from src.market.series import Columns
+
+READ_CONCURRENCY = 8  # concurrent candle reads per request, each on its own session
+TRADING_DAYS = 252
+_DAY = 24 * 60 * 60
+_SESSION_SECONDS = 6.5 * 60 * 60  # regular US equity session
+
+analytics_cache = TTLCache(ttl=settings.MARKET_CANDLE_CACHE_MAX_TTL, maxsize=256)
+
+
+def periods_per_year(timeframe: str) -> float:
+    """Bars per year used to annualise volatility."""
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    if seconds < _DAY:
+        return TRADING_DAYS * _SESSION_SECONDS / seconds
+    return {"1d": TRADING_DAYS, "1wk": 52, "1mo": 12}[timeframe]
+
+
+def align_closes(candles: dict[str, Columns], timeframe: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (time, closes) for the bars every symbol has, closes shaped (bars, symbols)
+    in `candles` order. All series must be on the same clock (`_read_closes`
+    reads them exchange-local). Daily and coarser bars are matched by
+    calendar date, since exchanges stamp them with different times of day.
+    """
+    daily = TIMEFRAME_SECONDS[timeframe] >= _DAY
+    keys = {
+        sym: (cols["time"] // _DAY * _DAY if daily else cols["time"])
+        for sym, cols in candles.items()
+    }
+    common = None
+    for k in keys.values():
+        common = k if common is None else np.intersect1d(common, k)
+    closes = np.empty((common.size, len(candles)))
+    for j, (sym, cols) in enumerate(candles.items()):
+        # Keep the last bar per key if a series has duplicates
+        k = keys[sym]
+        last = np.append(k[1:] != k[:-1], True)
+        idx = np.searchsorted(k[last], common)
+        closes[:, j] = cols["close"][last][idx]
+    return common, closes
+
+
+def _json(values: np.ndarray) -> list:
+    return [None if v != v else v for v in values.tolist()]  # NaN -> null
+
+
+def compute_analytics(
+    symbols: list[str], bar_time: np.ndarray, closes: np.ndarray, timeframe: str, window: int,
+) -> dict:
+    """Cumulative returns, rolling and full-period annualised volatility, and the return correlation matrix."""
+    returns = np.diff(np.log(closes), axis=0)
+    scale = np.sqrt(periods_per_year(timeframe))
+
+    rolling = np.full(closes.shape, np.nan)
+    if returns.shape[0] >= window:
+        rolling[window:] = sliding_window_view(returns, window, axis=0).std(axis=-1, ddof=1) * scale
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.corrcoef(returns, rowvar=False) if returns.shape[0] > 1 else np.full((len(symbols),) * 2, np.nan)
+        volatility = returns.std(axis=0, ddof=1) * scale if returns.shape[0] > 1 else np.full(len(symbols), np.nan)
+    corr = np.atleast_2d(corr)
+    cumulative = closes / closes[0] - 1.0
+
+    return {
+        "symbols": symbols,
+        "timeframe": timeframe,
+        "window": window,
+        "count": int(bar_time.size),
+        "time": bar_time.tolist(),
+        "cumulative_returns": {s: _json(cumulative[:, j]) for j, s in enumerate(symbols)},
+        "rolling_volatility": {s: _json(rolling[:, j]) for j, s in enumerate(symbols)},
+        "correlation": [_json(row) for row in corr],
+        "summary": {
+            s: {"total_return": float(cumulative[-1, j]), "volatility": _json(volatility[j:j + 1])[0]}
+            for j, s in enumerate(symbols)
+        },
+    }
+
+
+async def _read_closes(
+    symbols: list[str],
+    timeframe: str,
+    period: str,
+    session_factory: Callable[[], AsyncSession],
+) -> tuple[dict[str, Columns], dict[str, str]]:
+    semaphore = asyncio.Semaphore(READ_CONCURRENCY)
+
+    async def read(symbol: str) -> Columns:
+        async with semaphore, session_factory() as db:
+            return (await service.get_candles(db, symbol, timeframe, period, local_time=True))[1]
+
+    results = await asyncio.gather(*(read(s) for s in symbols), return_exceptions=True)
+    candles, errors = {}, {}
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, (MarketDataUnavailable, UnknownSymbol)):
+            errors[symbol] = result.detail
+        elif isinstance(result, BaseException):
+            raise result
+        elif result["time"].size:
+            candles[symbol] = result
+        else:
+            errors[symbol] = f"No data available for {symbol}"
+    return candles, errors
+
+
+async def get_analytics(
+    symbols: list[str],
+    timeframe: str = "1d",
+    period: str = "1y",
+    window: int = 20,
+    session_factory: Callable[[], AsyncSession] = SessionLocal,
+) -> dict:
+    """
+    Analytics for `symbols` (see `compute_analytics`), memoised. Symbols
+    whose data is unavailable are listed under "errors" and left out.
+    """
+    symbols = sorted(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    if not symbols:
+        raise InvalidSymbols("Provide at least one symbol")
+    if len(symbols) > settings.MARKET_MAX_BATCH_SYMBOLS:
+        raise InvalidSymbols(f"At most {settings.MARKET_MAX_BATCH_SYMBOLS} symbols per request")
+    if timeframe not in VALID_TIMEFRAMES:
+        raise InvalidTimeframe()
+    if period not in VALID_PERIODS:
+        raise InvalidPeriod()
+
+    async def load() -> dict:
+        candles, errors = await _read_closes(symbols, timeframe, period, session_factory)
+        if not candles:
+            raise MarketDataUnavailable("No data available for any requested symbol")
+        bar_time, closes = align_closes(candles, timeframe)
+        if not bar_time.size:
+            raise MarketDataUnavailable("The requested symbols have no bars in common")
+        result = compute_analytics(list(candles), bar_time, closes, timeframe, window)
+        result["period"] = period
+        result["errors"] = errors
+        return result
+
+    bucket = int(time.time() // service.candle_cache_ttl(timeframe))
+    key = f"analytics:{','.join(symbols)}:{timeframe}:{period}:{window}:{bucket}"
+    return await analytics_cache.get_or_load(key, load)
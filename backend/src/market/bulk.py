@@ -0,0 +1,74 @@
+"""Bulk candle writer using PostgreSQL COPY via asyncpg.
+
+Large backfills (`period=max`, multi-year intraday) are streamed into a
+temporary staging table with `copy_records_to_table`, then merged into
+`candles` with a single INSERT ... SELECT ... ON CONFLICT. Staged rows
+are numbered in COPY order, so when a batch repeats a timestamp the last
+row wins, as in `service.insert_candles`.
+"""
+
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STAGING_TABLE = "_candles_staging"
+STAGING_SEQ = "_staged"  # staging-only column numbering rows in COPY order
+
+COPY_COLUMNS = (
+    "asset_id", "timeframe", "timestamp",
+    "open", "high", "low", "close", "volume",
+)
+
+_COLUMN_LIST = ", ".join(f'"{c}"' for c in COPY_COLUMNS)
+
+_MERGE_SQL = f"""
+INSERT INTO candles ({_COLUMN_LIST})
+SELECT DISTINCT ON ("timestamp") {_COLUMN_LIST}
+FROM {STAGING_TABLE}
+ORDER BY "timestamp", {STAGING_SEQ} DESC
+ON CONFLICT (asset_id, timeframe, "timestamp") DO UPDATE SET
+    open = EXCLUDED.open,
+    high = EXCLUDED.high,
+    low = EXCLUDED.low,
+    close = EXCLUDED.close,
+    volume = EXCLUDED.volume
+"""
+
+
+def candle_records(asset_id: uuid.UUID, timeframe: str, candles: list[dict]) -> list[tuple]:
+    """Build COPY records in COPY_COLUMNS order."""
+    return [
+        (
+            asset_id, timeframe, c["timestamp"],
+            c["open"], c["high"], c["low"], c["close"], c["volume"],
+        )
+        for c in candles
+    ]
+
+
+async def copy_candles(db: AsyncSession, asset_id: uuid.UUID, timeframe: str, candles: list[dict]) -> int:
+    """
+    Upsert candles through COPY into a staging table. Runs inside the
+    session's current transaction; does not commit.
+    """
+    if not candles:
+        return 0
+
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    pg = raw.driver_connection  # asyncpg.Connection
+
+    await pg.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    await pg.execute(
+        f"CREATE TEMP TABLE {STAGING_TABLE} (LIKE candles INCLUDING DEFAULTS, {STAGING_SEQ} bigserial) ON COMMIT DROP"
+    )
+    await pg.copy_records_to_table(
+        STAGING_TABLE,
+        records=candle_records(asset_id, timeframe, candles),
+        columns=COPY_COLUMNS,
+    )
+    await pg.execute(_MERGE_SQL)
+    await pg.execute(f"DROP TABLE {STAGING_TABLE}")
+    return len(candles)
@@ -0,0 +1,212 @@
+"""Async caches for market data: in-process TTL cache and a shared Redis tier."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import struct
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+from src.core.config import settings
+from src.core.redis import get_redis
+
+
+class TTLCache:
+    """
+    Async TTL cache with stale-while-revalidate and single-flight loading.
+
+    - Fresh hit (age < ttl): returned as is.
+    - Stale hit (age < ttl + stale_ttl): returned immediately while one
+      background refresh runs.
+    - Miss: concurrent callers for the same key share a single loader call.
+
+    Loader results of None are not stored. Entries are evicted oldest-first
+    once `maxsize` is exceeded.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        """Return the value if still fresh, else None. Never loads."""
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def peek(self, key: str) -> Any | None:
+        """Return the stored value regardless of age, without loading."""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str | None = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any | None:
+        entry = self._entries.get(key)
+        if entry:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._load(key, loader)
+                return value
+        # shield: a cancelled caller must not cancel the load other callers share
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_loader(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return task
+
+    async def _run_loader(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any | None:
+        value = await loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Cache load failed for {key}: {task.exception()!r}")
+
+
+class LocalBytesStore:
+    """Bounded in-process byte store with per-key expiry (Redis stand-in)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class SharedCache:
+    """
+    Byte cache shared across workers through Redis.
+
+    Falls back to a LocalBytesStore when REDIS_URL is unset, and for
+    RETRY_AFTER seconds after a Redis error so an outage costs one
+    timeout rather than one per request.
+    """
+
+    RETRY_AFTER = 30.0
+
+    def __init__(
+        self,
+        prefix: str = "marketpulse:",
+        redis_factory: Callable[[], Any] = get_redis,
+        local_maxsize: int = settings.MARKET_SHARED_CACHE_LOCAL_SIZE,
+    ):
+        self.prefix = prefix
+        self._redis_factory = redis_factory
+        self._local = LocalBytesStore(local_maxsize)
+        self._down_until = 0.0
+
+    def _redis(self):
+        if time.monotonic() < self._down_until:
+            return None
+        return self._redis_factory()
+
+    def _mark_down(self, e: Exception) -> None:
+        logger.warning(f"Redis unavailable, using in-process cache for {self.RETRY_AFTER:.0f}s: {e!r}")
+        self._down_until = time.monotonic() + self.RETRY_AFTER
+
+    async def get(self, key: str) -> bytes | None:
+        redis = self._redis()
+        if redis is None:
+            return self._local.get(key)
+        try:
+            return await redis.get(self.prefix + key)
+        except Exception as e:
+            self._mark_down(e)
+            return self._local.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        redis = self._redis()
+        if redis is None:
+            self._local.set(key, value, ttl)
+            return
+        try:
+            await redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            self._mark_down(e)
+            self._local.set(key, value, ttl)
+
+
+# ─── Quote codec ──────────────────────────────────────────
+# price, change, change_percent, market_cap (NaN = None), timestamp, volume; then "SYMBOL\0name"
+_QUOTE = struct.Struct("<dddddq")
+
+
+def pack_quote(q: dict) -> bytes:
+    market_cap = q.get("market_cap")
+    head = _QUOTE.pack(
+        q["price"], q["change"], q["change_percent"],
+        math.nan if market_cap is None else float(market_cap),
+        q["timestamp"].timestamp(), q["volume"],
+    )
+    return head + f"{q['symbol']}\0{q['name']}".encode()
+
+
+def unpack_quote(data: bytes) -> dict:
+    price, change, change_percent, market_cap, ts, volume = _QUOTE.unpack_from(data)
+    symbol, name = data[_QUOTE.size:].decode().split("\0", 1)
+    return {
+        "symbol": symbol,
+        "name": name,
+        "price": price,
+        "change": change,
+        "change_percent": change_percent,
+        "volume": volume,
+        "market_cap": None if math.isnan(market_cap) else market_cap,
+        "timestamp": datetime.fromtimestamp(ts, timezone.utc),
+    }
+
+
+quote_cache = TTLCache(
+    ttl=settings.MARKET_QUOTE_TTL,
+    stale_ttl=settings.MARKET_QUOTE_STALE_TTL,
+    maxsize=settings.MARKET_QUOTE_CACHE_SIZE,
+)
+
+market_cache = SharedCache()
@@ -24,3 +24,26 @@ class InvalidTimeframe(HTTPException):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Invalid timeframe. Valid: 1m, 5m, 15m, 30m, 1h, 1d, 1wk, 1mo",
         )
+
+
+class InvalidPeriod(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid period. Valid: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, max",
+        )
+
+
+class InvalidSymbols(HTTPException):
+    def __init__(self, msg: str = "Invalid symbols list"):
+        super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=msg)
+
+
+class InvalidIndicators(HTTPException):
+    def __init__(self, msg: str = "Invalid indicator set"):
+        super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=msg)
+
+
+class UnknownSymbol(HTTPException):
+    def __init__(self, symbol: str):
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown symbol: {symbol}")
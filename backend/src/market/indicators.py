@@ -0,0 +1,306 @@
+"""Technical indicators over candle close prices, vectorised with NumPy.
+
+Supported (`name:params`, defaults in brackets):
+    sma:N            simple moving average            [sma:20]
+    ema:N            exponential moving average       [ema:20]
+    rsi:N            Wilder's relative strength index [rsi:14]
+    macd:F:S:G       MACD line, signal and histogram  [macd:12:26:9]
+    bb:N:K           Bollinger bands, K std devs      [bb:20:2]
+
+Every indicator is computed by `compute(spec, close, start, prior)`, which
+returns its lines for bars `start:` given the lines already computed for
+bars `:start` (`prior`). Windowed indicators recompute from the last N
+closes; recursive ones (EMA, RSI, MACD) continue from the value at
+`start - 1`. `IndicatorCache` uses this to extend a cached result when new
+bars arrive, or to revise only the forming bar, instead of recomputing
+the whole history.
+
+Lines are float64 arrays aligned with the input; bars before the
+indicator has warmed up are NaN. Lines prefixed with "_" are internal
+state (e.g. RSI's smoothed gains) kept for incremental updates.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.core.config import settings
+from src.market.cache import TTLCache
+
+Lines = dict[str, np.ndarray]
+
+DEFAULT_PARAMS: dict[str, tuple[float, ...]] = {
+    "sma": (20,),
+    "ema": (20,),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "bb": (20, 2),
+}
+MAX_WINDOW = 500
+_EWM_BLOCK = 256  # keeps w**-k finite for any smoothing factor up to 2/3
+EWM_SETTLE = 4  # recursive lines forget their seed after ~4 windows (weight e**-8)
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    params: tuple[float, ...]
+
+    @property
+    def key(self) -> str:
+        return ":".join([self.name, *(f"{p:g}" for p in self.params)])
+
+    @property
+    def windows(self) -> tuple[int, ...]:
+        """Integer lookback parameters (Bollinger's K is a multiplier, not a window)."""
+        return tuple(int(p) for p in (self.params[:1] if self.name == "bb" else self.params))
+
+    @property
+    def warmup(self) -> int:
+        """Bars of history needed before the first value matches one computed from the full series."""
+        if self.name in ("sma", "bb"):
+            return self.windows[0] - 1
+        if self.name == "macd":
+            _, slow, signal = self.windows
+            return EWM_SETTLE * (slow + signal)
+        return EWM_SETTLE * self.windows[0]
+
+
+def parse_indicator_set(raw: str) -> list[IndicatorSpec]:
+    """Parse "sma:20,rsi:14,macd" into specs. Raises ValueError on anything invalid."""
+    specs: dict[str, IndicatorSpec] = {}
+    for item in (part.strip().lower() for part in raw.split(",")):
+        if not item:
+            continue
+        name, *params = item.split(":")
+        if name not in DEFAULT_PARAMS:
+            raise ValueError(f"Unknown indicator '{name}'. Valid: {', '.join(DEFAULT_PARAMS)}")
+        defaults = DEFAULT_PARAMS[name]
+        if len(params) > len(defaults):
+            raise ValueError(f"'{name}' takes at most {len(defaults)} parameters")
+        try:
+            values = tuple(float(p) for p in params) + defaults[len(params):]
+        except ValueError:
+            raise ValueError(f"Invalid parameters in '{item}'")
+        spec = IndicatorSpec(name, values)
+        if any(w != p or not 1 <= w <= MAX_WINDOW for w, p in zip(spec.windows, values)):
+            raise ValueError(f"Windows in '{item}' must be whole numbers between 1 and {MAX_WINDOW}")
+        if name == "bb" and not 0 < values[1] <= 10:
+            raise ValueError("Bollinger width must be between 0 and 10")
+        if name == "macd" and values[0] >= values[1]:
+            raise ValueError("MACD fast period must be shorter than the slow period")
+        specs[spec.key] = spec
+    if not specs:
+        raise ValueError("Provide at least one indicator")
+    return list(specs.values())
+
+
+# ─── Kernels ──────────────────────────────────────────────
+def _nan(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+
+def _ewm(x: np.ndarray, alpha: float, prev: float) -> np.ndarray:
+    """
+    y[t] = alpha * x[t] + (1 - alpha) * y[t-1], with y[-1] = prev.
+
+    Solved in closed form per block: y[j] = w^(j+1) prev + alpha w^j cumsum(x[i] w^-i).
+    """
+    w = 1.0 - alpha
+    out = np.empty_like(x, dtype=np.float64)
+    if w == 0.0:
+        out[:] = x
+        return out
+    for lo in range(0, x.size, _EWM_BLOCK):
+        block = x[lo:lo + _EWM_BLOCK]
+        powers = w ** np.arange(block.size)
+        out[lo:lo + block.size] = w * powers * prev + alpha * powers * np.cumsum(block / powers)
+        prev = out[lo + block.size - 1]
+    return out
+
+
+def _first_valid(x: np.ndarray) -> int:
+    valid = np.flatnonzero(~np.isnan(x))
+    return int(valid[0]) if valid.size else x.size
+
+
+def ema(x: np.ndarray, n: int, prev: float | None = None) -> np.ndarray:
+    """EMA with alpha = 2/(n+1). Seeded with the SMA of the first n valid values, or continues from `prev`."""
+    alpha = 2.0 / (n + 1)
+    if prev is not None:
+        return _ewm(x, alpha, prev)
+    out = _nan(x.size)
+    seed = _first_valid(x) + n - 1
+    if seed < x.size:
+        out[seed] = x[seed - n + 1:seed + 1].mean()
+        out[seed + 1:] = _ewm(x[seed + 1:], alpha, out[seed])
+    return out
+
+
+def sma(x: np.ndarray, n: int) -> np.ndarray:
+    out = _nan(x.size)
+    if x.size >= n:
+        c = np.concatenate(([0.0], np.cumsum(x)))
+        out[n - 1:] = (c[n:] - c[:-n]) / n
+    return out
+
+
+def rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    """Population standard deviation over a trailing window of n."""
+    out = _nan(x.size)
+    if x.size >= n:
+        out[n - 1:] = sliding_window_view(x, n).std(axis=1)
+    return out
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0.0, np.where(avg_gain == 0.0, 50.0, 100.0), rsi)
+
+
+# ─── Indicators ───────────────────────────────────────────
+def _windowed(close: np.ndarray, start: int, window: int, fn) -> Lines:
+    """Run a windowed `fn(close) -> Lines` on just enough history to produce bars `start:`."""
+    lo = max(0, start - window + 1)
+    return {k: v[start - lo:] for k, v in fn(close[lo:]).items()}
+
+
+def _seed(prior: Lines | None, start: int, *names: str) -> list[float] | None:
+    """Values of `names` at bar start-1, or None when a full computation is needed."""
+    if prior is None or start == 0:
+        return None
+    seeds = [float(prior[name][start - 1]) for name in names]
+    return None if any(np.isnan(s) for s in seeds) else seeds
+
+
+def _compute_sma(close, start, prior, n):
+    return _windowed(close, start, n, lambda x: {"sma": sma(x, n)})
+
+
+def _compute_ema(close, start, prior, n):
+    seed = _seed(prior, start, "ema")
+    if seed is None:
+        return {"ema": ema(close, n)[start:]}
+    return {"ema": ema(close[start:], n, prev=seed[0])}
+
+
+def _compute_bb(close, start, prior, n, k):
+    def bands(x):
+        mid, std = sma(x, n), rolling_std(x, n)
+        return {"middle": mid, "upper": mid + k * std, "lower": mid - k * std}
+    return _windowed(close, start, n, bands)
+
+
+def _compute_rsi(close, start, prior, n):
+    seed = _seed(prior, start, "_avg_gain", "_avg_loss")
+    if seed is None:
+        delta = np.diff(close, prepend=np.nan)
+        gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+        avg_gain, avg_loss = _nan(close.size), _nan(close.size)
+        if close.size > n:
+            avg_gain[n] = gain[1:n + 1].mean()
+            avg_loss[n] = loss[1:n + 1].mean()
+            avg_gain[n + 1:] = _ewm(gain[n + 1:], 1.0 / n, avg_gain[n])
+            avg_loss[n + 1:] = _ewm(loss[n + 1:], 1.0 / n, avg_loss[n])
+        avg_gain, avg_loss = avg_gain[start:], avg_loss[start:]
+    else:
+        delta = np.diff(close[start - 1:])
+        avg_gain = _ewm(np.clip(delta, 0, None), 1.0 / n, seed[0])
+        avg_loss = _ewm(np.clip(-delta, 0, None), 1.0 / n, seed[1])
+    return {"rsi": _rsi_from_averages(avg_gain, avg_loss), "_avg_gain": avg_gain, "_avg_loss": avg_loss}
+
+
+def _compute_macd(close, start, prior, fast, slow, signal):
+    seed = _seed(prior, start, "_fast", "_slow", "signal")
+    if seed is None:
+        ema_fast, ema_slow = ema(close, fast), ema(close, slow)
+        line = ema_fast - ema_slow
+        sig = ema(line, signal)
+        ema_fast, ema_slow, line, sig = ema_fast[start:], ema_slow[start:], line[start:], sig[start:]
+    else:
+        ema_fast = ema(close[start:], fast, prev=seed[0])
+        ema_slow = ema(close[start:], slow, prev=seed[1])
+        line = ema_fast - ema_slow
+        sig = ema(line, signal, prev=seed[2])
+    return {"macd": line, "signal": sig, "hist": line - sig, "_fast": ema_fast, "_slow": ema_slow}
+
+
+_COMPUTE = {
+    "sma": _compute_sma,
+    "ema": _compute_ema,
+    "rsi": _compute_rsi,
+    "macd": _compute_macd,
+    "bb": _compute_bb,
+}
+
+
+def compute(spec: IndicatorSpec, close: np.ndarray, start: int = 0, prior: Lines | None = None) -> Lines:
+    """Lines of `spec` for bars `start:` of `close`, continuing from `prior` (bars `:start`) when given."""
+    params = (*spec.windows, *spec.params[len(spec.windows):])
+    return _COMPUTE[spec.name](np.asarray(close, dtype=np.float64), start, prior, *params)
+
+
+def public_lines(lines: Lines) -> Lines:
+    return {k: v for k, v in lines.items() if not k.startswith("_")}
+
+
+# ─── Incremental cache ────────────────────────────────────
+@dataclass
+class _Entry:
+    time: np.ndarray
+    close: np.ndarray
+    lines: Lines
+
+
+class IndicatorCache:
+    """
+    Indicator results per (symbol, timeframe, indicator), valid for the
+    exact bar times and closes they were computed from.
+
+    On a lookup with newer bars, only bars from the previously last one
+    (which may have been forming) onwards are computed and appended. The
+    earlier bars are compared with the cached ones first (a vectorised
+    array comparison, far cheaper than the indicator itself); a change
+    anywhere in that history, e.g. a backfill or a revised close, falls
+    back to a full computation.
+    """
+
+    def __init__(self, ttl: float | None = None, maxsize: int | None = None):
+        self._entries = TTLCache(
+            ttl=ttl or settings.MARKET_INDICATOR_CACHE_TTL,
+            maxsize=maxsize or settings.MARKET_INDICATOR_CACHE_SIZE,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, symbol: str, timeframe: str, spec: IndicatorSpec, time: np.ndarray, close: np.ndarray) -> Lines:
+        key = f"{symbol}:{timeframe}:{spec.key}"
+        entry: _Entry | None = self._entries.get(key)
+        n = time.size
+
+        start = 0
+        if entry is not None and 0 < entry.time.size <= n:
+            m = entry.time.size
+            if np.array_equal(time[:m], entry.time) and np.array_equal(close[:m - 1], entry.close[:m - 1]):
+                if m == n and close[-1] == entry.close[-1]:
+                    return entry.lines
+                start = m - 1
+
+        if start == 0 or n == 0:
+            lines = compute(spec, close)
+        else:
+            prior = {k: v[:start] for k, v in entry.lines.items()}
+            tail = compute(spec, close, start, prior)
+            lines = {k: np.concatenate((prior[k], tail[k])) for k in tail}
+
+        if n:
+            self._entries.set(key, _Entry(time=time, close=close, lines=lines))
+        return lines
+
+
+indicator_cache = IndicatorCache()
@@ -0,0 +1,99 @@
+"""Long-lived symbol metadata: name, exchange, currency and market cap.
+
+Quotes only fetch live price fields; the descriptive fields come from
+here. Metadata is fetched upstream (`provider.afetch_metadata`, a heavy
+`ticker.info` request on Yahoo) once per symbol, stored in
+`symbol_metadata`, and refetched when the stored row is older than
+MARKET_METADATA_MAX_AGE.
+
+In process, entries are served for MARKET_METADATA_CACHE_TTL seconds and
+then, for up to MARKET_METADATA_MAX_AGE more, served while the stored row
+is re-read in the background, so a quote only ever waits for metadata
+the first time a process sees a symbol. All stored rows are preloaded at
+startup.
+
+Symbols the upstream knows nothing about, and failed fetches with nothing
+stored, are remembered as `{"symbol": ...}` for MARKET_METADATA_CACHE_TTL.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.market.cache import TTLCache
+from src.market.models import SymbolMetadata
+from src.market.provider import afetch_metadata
+from src.utils.datetime_util import time_now
+
+METADATA_FIELDS = ("name", "exchange", "currency", "market_cap")
+
+
+def _row_dict(row: SymbolMetadata) -> dict:
+    return {"symbol": row.symbol, **{field: getattr(row, field) for field in METADATA_FIELDS}}
+
+
+class MetadataStore:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+        max_age: float | None = None,
+        cache_ttl: float | None = None,
+        maxsize: int | None = None,
+    ):
+        self.session_factory = session_factory
+        self.max_age = max_age or settings.MARKET_METADATA_MAX_AGE
+        self._entries = TTLCache(
+            ttl=cache_ttl or settings.MARKET_METADATA_CACHE_TTL,
+            stale_ttl=self.max_age,
+            maxsize=maxsize or settings.MARKET_METADATA_CACHE_SIZE,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, symbol: str) -> dict | None:
+        """Metadata already in process, whatever its age. Never loads."""
+        return self._entries.peek(symbol.upper())
+
+    async def preload(self, db: AsyncSession) -> None:
+        """Read every stored row into the in-process cache."""
+        for row in (await db.execute(select(SymbolMetadata))).scalars():
+            self._entries.set(row.symbol, _row_dict(row))
+
+    async def get(self, symbol: str) -> dict:
+        """Metadata for `symbol`; see the module docstring for where it comes from."""
+        symbol = symbol.upper()
+        return await self._entries.get_or_load(symbol, lambda: self._load(symbol))
+
+    async def _load(self, symbol: str) -> dict:
+        async with self.session_factory() as db:
+            row = await db.get(SymbolMetadata, symbol)
+            if row is not None and time_now() - row.refreshed_at < timedelta(seconds=self.max_age):
+                return _row_dict(row)
+            try:
+                meta = await afetch_metadata(symbol)
+            except Exception as e:
+                logger.warning(f"Metadata for {symbol} not refreshed: {e!r}")
+                meta = None
+            if meta is None:
+                return _row_dict(row) if row is not None else {"symbol": symbol}
+
+            values = {field: meta.get(field) for field in METADATA_FIELDS}
+            stmt = pg_insert(SymbolMetadata).values(symbol=symbol, refreshed_at=time_now(), **values)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[SymbolMetadata.symbol],
+                set_={**values, "refreshed_at": stmt.excluded.refreshed_at},
+            ))
+            await db.commit()
+            return {"symbol": symbol, **values}
+
+
+metadata_store = MetadataStore()
@@ -1,10 +1,10 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Enum, Float, Integer, ForeignKey, UniqueConstraint, TIMESTAMP
+from sqlalchemy import String, Enum, Float, BigInteger, ForeignKey, PrimaryKeyConstraint, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from src.core.base_model import Base
+from src.core.base_model import Base, TableBase
 from src.market.constants import AssetType
 
 
@@ -20,26 +20,70 @@ class Asset(Base):
     )
 
     # Relationships
-    candles: Mapped[list["Candle"]] = relationship(back_populates="asset", cascade="all, delete-orphan")
+    # Candles are removed by the FK's ON DELETE CASCADE rather than loaded and deleted row by row
+    candles: Mapped[list["Candle"]] = relationship(
+        back_populates="asset", cascade="all, delete-orphan", passive_deletes=True
+    )
+
 
+class Candle(TableBase):
+    """
+    OHLCV candlestick data for a given asset and timeframe.
 
-class Candle(Base):
-    """OHLCV candlestick data for a given asset and timeframe."""
+    Compact layout: keyed by (asset_id, timeframe, timestamp) with no
+    surrogate id or audit columns, and range-partitioned by `timestamp`
+    (yearly partitions, see `src/market/partitions.py`). The primary key
+    index INCLUDEs the OHLCV columns, so chart reads are index-only scans.
+    Refresh bookkeeping lives once per series in `CandleSeries`.
+    """
     __tablename__ = 'candles'
     __table_args__ = (
-        UniqueConstraint("asset_id", "timeframe", "timestamp", name="uq_candle_asset_tf_ts"),
+        PrimaryKeyConstraint(
+            "asset_id", "timeframe", "timestamp",
+            name="candles_pkey",
+            postgresql_include=["open", "high", "low", "close", "volume"],
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
 
     asset_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("assets.id", ondelete="CASCADE"), nullable=False
     )
     timeframe: Mapped[str] = mapped_column(String(10), nullable=False)  # 1d, 1h, 5m, etc.
-    timestamp: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    timestamp: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
     open: Mapped[float] = mapped_column(Float, nullable=False)
     high: Mapped[float] = mapped_column(Float, nullable=False)
     low: Mapped[float] = mapped_column(Float, nullable=False)
     close: Mapped[float] = mapped_column(Float, nullable=False)
-    volume: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    volume: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
 
     # Relationships
-    asset: Mapped["Asset"] = relationship(back_populates="candles")
\ No newline at end of file
+    asset: Mapped["Asset"] = relationship(back_populates="candles")
+
+
+class CandleSeries(TableBase):
+    """When each stored (asset, timeframe) series was last written; drives staleness checks."""
+    __tablename__ = 'candle_series'
+
+    asset_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("assets.id", ondelete="CASCADE"), primary_key=True
+    )
+    timeframe: Mapped[str] = mapped_column(String(10), primary_key=True)
+    refreshed_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    # Longest period fetched in full: stored history shorter than it is all the provider has
+    full_period: Mapped[str | None] = mapped_column(String(10))
+
+
+class SymbolMetadata(TableBase):
+    """
+    Slow-changing descriptive data per symbol, registered or not. Kept out
+    of the quote path, which only fetches live prices; see `src/market/metadata.py`.
+    """
+    __tablename__ = 'symbol_metadata'
+
+    symbol: Mapped[str] = mapped_column(String(50), primary_key=True)
+    name: Mapped[str | None] = mapped_column(String(200))
+    exchange: Mapped[str | None] = mapped_column(String(50))
+    currency: Mapped[str | None] = mapped_column(String(10))
+    market_cap: Mapped[float | None] = mapped_column(Float)
+    refreshed_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
@@ -0,0 +1,55 @@
+"""Yearly range partitions for `candles`.
+
+`candles` is partitioned by `timestamp`: `candles_y<YEAR>` covers
+[YEAR-01-01, YEAR+1-01-01) UTC, `candles_history` holds everything before
+FIRST_PARTITION_YEAR and `candles_default` catches bars outside every
+range. Chart reads touch only the partitions their time range overlaps.
+
+Partitions must exist before rows for their range arrive: once the default
+partition holds rows for a year, that year can no longer be attached
+without moving them. `ensure_candle_partitions` therefore runs at startup
+and then every MARKET_PARTITION_CHECK_INTERVAL from the market refresher,
+creating the current and next year ahead of time, so a long-running
+process crosses New Year with its partitions in place.
+"""
+
+from __future__ import annotations
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.utils.datetime_util import time_now
+
+FIRST_PARTITION_YEAR = 2000
+
+
+def partition_name(year: int) -> str:
+    return f"candles_y{year}"
+
+
+def create_partition_sql(year: int) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(year)} PARTITION OF candles "
+        f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+    )
+
+
+async def ensure_candle_partitions(db: AsyncSession, years_ahead: int = 1) -> list[str]:
+    """Create missing yearly partitions through `years_ahead` past this year. Returns the names created."""
+    created = []
+    year = time_now().year
+    for y in range(year, year + years_ahead + 1):
+        name = partition_name(y)
+        if await db.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+            continue
+        try:
+            await db.execute(text(create_partition_sql(y)))
+            await db.commit()
+            created.append(name)
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Could not create candle partition {name}: {e!r}")
+    if created:
+        logger.info(f"Created candle partitions {created}")
+    return created
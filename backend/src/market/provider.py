@@ -1,11 +1,26 @@
-"""Yahoo Finance data provider using yfinance library."""
+"""
+Market data providers and the async facade used by the service layer.
+
+The default provider is Yahoo Finance through the yfinance library
+(`fetch_candles` / `fetch_quote` / `fetch_quotes` below). MARKET_PROVIDER=replay
+switches to `ReplayProvider` (see `src/market/replay.py`), which serves
+recorded fixtures for offline and load testing.
+"""
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Protocol
 
+import numpy as np
 from loguru import logger
 
+from src.core.config import settings
+from src.market.upstream import CircuitOpen, UpstreamUnavailable, upstream_breaker, upstream_limiter
+
 
 def _yf():
     """Lazy import yfinance to avoid slow pandas startup at module load time."""
@@ -16,17 +31,86 @@ def _yf():
 VALID_TIMEFRAMES = {"1m", "5m", "15m", "30m", "1h", "1d", "1wk", "1mo"}
 VALID_PERIODS = {"1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "max"}
 
+# Look-back window per period, used to slice cached candles. "max" has no bound.
+PERIOD_DELTAS: dict[str, timedelta | None] = {
+    "1d": timedelta(days=1),
+    "5d": timedelta(days=5),
+    "1mo": timedelta(days=31),
+    "3mo": timedelta(days=92),
+    "6mo": timedelta(days=183),
+    "1y": timedelta(days=366),
+    "2y": timedelta(days=731),
+    "5y": timedelta(days=1827),
+    "10y": timedelta(days=3653),
+    "max": None,
+}
+
+# Nominal bar length per timeframe, used to decide when stored candles are stale
+TIMEFRAME_SECONDS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+    "1wk": 7 * 24 * 60 * 60,
+    "1mo": 30 * 24 * 60 * 60,
+}
+
+
+CANDLE_KEYS = ("time", "timestamp", "open", "high", "low", "close", "volume")
+
+
+def frame_to_candles(df, since: datetime | None = None) -> list[dict]:
+    """
+    Convert a yfinance history DataFrame into candle dicts, column-wise.
+
+    `time` is Unix seconds of the bar; `timestamp` is the exchange-local
+    wall-clock time tagged as UTC (the convention stored in `candles`).
+    Prices are rounded to 4 decimals, rows with missing prices are dropped
+    and missing volume counts as 0. With `since`, only bars whose
+    `timestamp` is >= since are kept.
+    """
+    idx = df.index
+    local = idx.tz_localize(None) if idx.tz is not None else idx
+
+    prices = np.round(df[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64), 4)
+    if "Volume" in df:
+        volume = np.nan_to_num(df["Volume"].to_numpy(dtype=np.float64), nan=0.0).astype(np.int64)
+    else:
+        volume = np.zeros(len(df), dtype=np.int64)
+
+    keep = ~np.isnan(prices).any(axis=1)
+    if since is not None:
+        since_ns = round(since.replace(tzinfo=since.tzinfo or timezone.utc).timestamp() * 1e6) * 1000
+        keep &= local.as_unit("ns").asi8 >= since_ns
+    if not keep.all():
+        idx, local, prices, volume = idx[keep], local[keep], prices[keep], volume[keep]
+
+    times = (idx.as_unit("ns").asi8 / 1e9).tolist()
+    stamps = local.tz_localize(timezone.utc).to_pydatetime().tolist()
+    opens, highs, lows, closes = prices.T.tolist()
+    return [
+        dict(zip(CANDLE_KEYS, row))
+        for row in zip(times, stamps, opens, highs, lows, closes, volume.tolist())
+    ]
+
 
 def fetch_candles(
     symbol: str,
     timeframe: str = "1d",
     period: str = "6mo",
+    start: datetime | None = None,
 ) -> list[dict]:
     """
     Fetch OHLCV candle data from Yahoo Finance.
 
+    When `start` is given, only bars from `start` onwards are fetched and
+    `period` is ignored (incremental ingestion). `start` is a stored bar
+    `timestamp`: exchange-local wall-clock time, whatever its tzinfo says.
+
     Returns a list of dicts with keys:
-        time (float), open, high, low, close, volume
+        time (float), timestamp (datetime), open, high, low, close, volume
     """
     if timeframe not in VALID_TIMEFRAMES:
         raise ValueError(f"Invalid timeframe: {timeframe}")
@@ -35,27 +119,19 @@ def fetch_candles(
 
     try:
         ticker = _yf().Ticker(symbol)
-        df = ticker.history(period=period, interval=timeframe)
+        if start is not None:
+            # yfinance converts aware datetimes to the exchange zone but reads naive ones as exchange-local
+            df = ticker.history(start=start.replace(tzinfo=None), interval=timeframe)
+        else:
+            df = ticker.history(period=period, interval=timeframe)
 
         if df.empty:
-            logger.warning(f"No data returned for {symbol} ({timeframe}, {period})")
+            logger.warning(f"No data returned for {symbol} ({timeframe}, {start or period})")
             return []
 
-        candles = []
-        for ts, row in df.iterrows():
-            # Convert pandas Timestamp to Unix seconds
-            unix_ts = ts.timestamp()
-            candles.append({
-                "time": unix_ts,
-                "timestamp": ts.to_pydatetime().replace(tzinfo=timezone.utc),
-                "open": round(row["Open"], 4),
-                "high": round(row["High"], 4),
-                "low": round(row["Low"], 4),
-                "close": round(row["Close"], 4),
-                "volume": int(row.get("Volume", 0)),
-            })
-
-        logger.info(f"Fetched {len(candles)} candles for {symbol} ({timeframe}, {period})")
+        candles = frame_to_candles(df, since=start)
+
+        logger.info(f"Fetched {len(candles)} candles for {symbol} ({timeframe}, {start or period})")
         return candles
 
     except Exception as e:
@@ -63,25 +139,298 @@ def fetch_candles(
         raise
 
 
-def fetch_quote(symbol: str) -> dict | None:
-    """Fetch latest quote info for a symbol."""
+def is_upstream_failure(e: BaseException) -> bool:
+    """Throttling, timeouts and transport errors, as opposed to a symbol having no data."""
+    if isinstance(e, OSError):  # includes TimeoutError, ConnectionError and HTTP client errors
+        return True
+    return type(e).__name__ == "YFRateLimitError"  # by name, so yfinance stays lazily imported
+
+
+def fetch_quote(symbol: str, strict: bool = False) -> dict | None:
+    """
+    Fetch the latest price fields for a symbol from `fast_info`. Name and
+    market cap are left to the metadata store (see `fetch_metadata`), so
+    `name` is the symbol and `market_cap` None.
+
+    Errors give None, except that upstream failures (see
+    `is_upstream_failure`) are raised with `strict`.
+    """
     try:
-        ticker = _yf().Ticker(symbol)
-        info = ticker.fast_info
+        info = _yf().Ticker(symbol).fast_info
+        price = info["lastPrice"]
+        previous = info["previousClose"]
 
         return {
             "symbol": symbol.upper(),
-            "name": getattr(ticker, "info", {}).get("shortName", symbol),
-            "price": round(info.get("lastPrice", 0), 4),
-            "change": round(info.get("lastPrice", 0) - info.get("previousClose", 0), 4),
-            "change_percent": round(
-                ((info.get("lastPrice", 0) - info.get("previousClose", 1)) / info.get("previousClose", 1)) * 100,
-                2,
-            ),
-            "volume": int(info.get("lastVolume", 0)),
-            "market_cap": info.get("marketCap"),
+            "name": symbol.upper(),
+            "price": round(price, 4),
+            "change": round(price - previous, 4),
+            "change_percent": round((price - previous) / previous * 100, 2) if previous else 0.0,
+            "volume": int(info["lastVolume"] or 0),
+            "market_cap": None,
             "timestamp": datetime.now(timezone.utc),
         }
     except Exception as e:
         logger.error(f"Quote error for {symbol}: {e}")
+        if strict and is_upstream_failure(e):
+            raise
+        return None
+
+
+def fetch_metadata(symbol: str) -> dict | None:
+    """
+    Fetch descriptive data (name, exchange, currency, market cap) from
+    `ticker.info`, a much heavier request than a quote. None when Yahoo
+    knows nothing about the symbol; upstream errors propagate.
+    """
+    info = _yf().Ticker(symbol).info or {}
+    name = info.get("shortName") or info.get("longName")
+    if not name:
+        return None
+    return {
+        "symbol": symbol.upper(),
+        "name": name,
+        "exchange": info.get("exchange"),
+        "currency": info.get("currency"),
+        "market_cap": info.get("marketCap"),
+    }
+
+
+def fetch_quotes(symbols: list[str], strict: bool = False) -> dict[str, dict | None]:
+    """
+    Fetch quotes for several symbols, one after another on the calling
+    thread; `afetch_quotes` spreads a batch over the provider pool.
+
+    Returns {SYMBOL: quote or None}; a failed symbol never fails the batch.
+    With `strict`, an upstream failure is raised when no symbol succeeded.
+    """
+    results, error = {}, None
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        try:
+            results[symbol] = fetch_quote(symbol, strict=strict)
+        except Exception as e:
+            results[symbol], error = None, e
+    if error is not None and not any(q is not None for q in results.values()):
+        raise error
+    return results
+
+
+# ─── Provider interface ───────────────────────────────────
+class MarketDataProvider(Protocol):
+    """A blocking upstream data source. Calls run on the provider pool (see below)."""
+
+    name: str
+
+    def fetch_candles(
+        self, symbol: str, timeframe: str = "1d", period: str = "6mo", start: datetime | None = None,
+    ) -> list[dict]:
+        """
+        Candle dicts (CANDLE_KEYS), oldest first; [] when there is no data. Raises on upstream errors.
+        `start` is exchange-local wall-clock time (the stored `timestamp` convention).
+        """
+        ...
+
+    def fetch_quote(self, symbol: str) -> dict | None:
+        """Quote dict, or None when there is none. Raises on upstream failures (see `is_upstream_failure`)."""
+        ...
+
+    def fetch_quotes(self, symbols: list[str]) -> dict[str, dict | None]:
+        """{SYMBOL: quote or None}. Raises on an upstream failure only when no symbol succeeded."""
+        ...
+
+    def fetch_metadata(self, symbol: str) -> dict | None:
+        """Metadata dict (symbol, name, exchange, currency, market_cap), or None for an unknown symbol."""
+        ...
+
+
+class YFinanceProvider:
+    name = "yfinance"
+
+    def fetch_candles(self, symbol, timeframe="1d", period="6mo", start=None):
+        return fetch_candles(symbol, timeframe, period, start)
+
+    def fetch_quote(self, symbol):
+        return fetch_quote(symbol, strict=True)
+
+    def fetch_quotes(self, symbols):
+        return fetch_quotes(symbols, strict=True)
+
+    def fetch_metadata(self, symbol):
+        return fetch_metadata(symbol)
+
+
+_provider: MarketDataProvider | None = None
+
+
+def get_provider() -> MarketDataProvider:
+    """The configured provider (MARKET_PROVIDER), created on first use."""
+    global _provider
+    if _provider is None:
+        if settings.MARKET_PROVIDER == "replay":
+            from src.market.replay import ReplayProvider
+            _provider = ReplayProvider.from_settings()
+        else:
+            _provider = YFinanceProvider()
+        logger.info(f"Market data provider: {_provider.name}")
+    return _provider
+
+
+def set_provider(provider: MarketDataProvider | None) -> None:
+    """Install a provider (benchmarks, tests). None restores the configured one on next use."""
+    global _provider
+    _provider = provider
+
+
+# ─── Async facade ─────────────────────────────────────────
+# Providers are blocking; every upstream call goes through this bounded pool so
+# a slow Yahoo response never stalls the event loop.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.MARKET_PROVIDER_WORKERS,
+    thread_name_prefix="market-provider",
+)
+_stats_lock = threading.Lock()
+_queued = 0    # submitted, waiting for a worker
+_running = 0   # currently executing in a worker thread
+
+
+class ProviderBusy(RuntimeError):
+    """Raised when the provider queue is full and the call is rejected outright."""
+
+
+def provider_stats() -> dict:
+    """Snapshot of the provider pool: worker count, running calls and queue depth."""
+    with _stats_lock:
+        return {"workers": settings.MARKET_PROVIDER_WORKERS, "running": _running, "queued": _queued}
+
+
+def _tracked(state: dict, fn: Callable[..., Any], *args: Any) -> Any:
+    global _queued, _running
+    with _stats_lock:
+        if state["abandoned"]:
+            return None  # caller already gave up while this sat in the queue
+        state["started"] = True
+        _queued -= 1
+        _running += 1
+    try:
+        return fn(*args)
+    finally:
+        with _stats_lock:
+            _running -= 1
+
+
+async def run_in_provider(fn: Callable[..., Any], *args: Any, timeout: float | None = None) -> Any:
+    """
+    Run a blocking provider function on the market provider pool.
+
+    Raises ProviderBusy when MARKET_PROVIDER_MAX_PENDING calls are already
+    waiting for a worker, and TimeoutError when the call exceeds `timeout`
+    seconds (defaults to MARKET_PROVIDER_TIMEOUT). A call that times out while
+    queued is dropped; one that is already running keeps its worker until
+    yfinance returns.
+    """
+    global _queued
+    state = {"started": False, "abandoned": False}
+    with _stats_lock:
+        if _queued >= settings.MARKET_PROVIDER_MAX_PENDING:
+            raise ProviderBusy("Market provider queue is full")
+        _queued += 1
+    try:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_executor, _tracked, state, fn, *args)
+        return await asyncio.wait_for(future, timeout or settings.MARKET_PROVIDER_TIMEOUT)
+    finally:
+        with _stats_lock:
+            if not state["started"]:
+                state["abandoned"] = True
+                _queued -= 1
+
+
+async def _call_upstream(fn: Callable[..., Any], *args: Any, cost: int = 1) -> Any:
+    """
+    `run_in_provider` behind the circuit breaker and rate limiter (see
+    `upstream`). `cost` is the number of upstream requests the call makes.
+    Raises CircuitOpen or Throttled when the call is not sent.
+    """
+    if not upstream_breaker.allow():
+        raise CircuitOpen("Upstream circuit is open")
+    await upstream_limiter.acquire(cost)
+    try:
+        result = await run_in_provider(fn, *args)
+    except Exception as e:
+        if is_upstream_failure(e):
+            upstream_breaker.record_failure()
+        raise
+    upstream_breaker.record_success()
+    return result
+
+
+def is_unavailable(e: BaseException) -> bool:
+    """An upstream failure, or a call that was never sent (saturated pool, throttled, open circuit)."""
+    return is_upstream_failure(e) or isinstance(e, (ProviderBusy, UpstreamUnavailable))
+
+
+def upstream_stats() -> dict:
+    """Provider pool, rate limiter and circuit breaker metrics."""
+    return {
+        "provider": get_provider().name,
+        "pool": provider_stats(),
+        "limiter": upstream_limiter.stats(),
+        "breaker": upstream_breaker.stats(),
+    }
+
+
+async def afetch_candles(
+    symbol: str,
+    timeframe: str = "1d",
+    period: str = "6mo",
+    start: datetime | None = None,
+) -> list[dict]:
+    """Non-blocking `fetch_candles` on the configured provider."""
+    return await _call_upstream(get_provider().fetch_candles, symbol, timeframe, period, start)
+
+
+async def afetch_quote(symbol: str, strict: bool = False) -> dict | None:
+    """
+    Non-blocking `fetch_quote` on the configured provider. Returns None on
+    upstream failure, timeout, a saturated queue, throttling or an open
+    circuit (see `is_unavailable`), unless `strict`: then those raise and
+    None means the provider has no quote for the symbol.
+    """
+    try:
+        return await _call_upstream(get_provider().fetch_quote, symbol)
+    except Exception as e:
+        if strict or not is_unavailable(e):
+            raise
+        logger.warning(f"Quote for {symbol} not fetched: {e!r}")
         return None
+
+
+async def afetch_quotes(symbols: list[str]) -> dict[str, dict | None]:
+    """
+    Non-blocking `fetch_quotes` on the configured provider. The batch is
+    split into at most MARKET_PROVIDER_WORKERS chunks fetched in parallel
+    on the provider pool, so it never runs wider than the pool. A chunk
+    that fails maps its symbols to None.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    if not symbols:
+        return {}
+    size = -(-len(symbols) // settings.MARKET_PROVIDER_WORKERS)
+    chunks = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+    results = await asyncio.gather(*(_afetch_quote_chunk(chunk) for chunk in chunks))
+    return {s: q for result in results for s, q in result.items()}
+
+
+async def _afetch_quote_chunk(symbols: list[str]) -> dict[str, dict | None]:
+    try:
+        return await _call_upstream(get_provider().fetch_quotes, symbols, cost=len(symbols))
+    except Exception as e:
+        if not is_unavailable(e):
+            raise
+        logger.warning(f"Quotes for {symbols} not fetched: {e!r}")
+        return dict.fromkeys(symbols)
+
+
+async def afetch_metadata(symbol: str) -> dict | None:
+    """Non-blocking `fetch_metadata` on the configured provider. Errors propagate."""
+    return await _call_upstream(get_provider().fetch_metadata, symbol)
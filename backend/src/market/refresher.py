@@ -0,0 +1,161 @@
+"""Background market data refresher.
+
+Keeps stored candles for every registered asset warm so user requests are
+served from the DB instead of paying yfinance latency. Each
+(symbol, timeframe) pair is refreshed on a cadence matching its bar size,
+with jitter to spread upstream calls, a global concurrency limit and
+exponential backoff on failure.
+
+Started from the application lifespan. With several workers each runs its
+own refresher; `ingest_candles` is idempotent and skips series that are
+not yet stale, so the overlap only costs a cheap DB lookup.
+
+It also re-runs `partitions.ensure_candle_partitions` every
+MARKET_PARTITION_CHECK_INTERVAL seconds (also idempotent).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import time
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.market import service
+from src.market.models import Asset
+from src.market.partitions import ensure_candle_partitions
+from src.market.provider import TIMEFRAME_SECONDS
+
+# History fetched the first time a series is seeded
+REFRESH_PERIODS = {
+    "1m": "5d",
+    "5m": "1mo",
+    "15m": "1mo",
+    "30m": "1mo",
+    "1h": "3mo",
+    "1d": "1y",
+    "1wk": "5y",
+    "1mo": "max",
+}
+
+TICK_SECONDS = 5.0
+JITTER = 0.1  # fraction of the interval added at random to each next run
+
+
+def refresh_interval(timeframe: str) -> float:
+    """Seconds between refreshes: one bar, capped like the read-path staleness check."""
+    return float(min(TIMEFRAME_SECONDS[timeframe], settings.MARKET_CANDLE_MAX_STALENESS))
+
+
+class MarketRefresher:
+    def __init__(
+        self,
+        timeframes: list[str] | None = None,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+    ):
+        self.timeframes = timeframes or settings.MARKET_REFRESH_TIMEFRAMES
+        self._session_factory = session_factory
+        self._semaphore = asyncio.Semaphore(settings.MARKET_REFRESH_CONCURRENCY)
+        self._assets: list[Asset] = []
+        self._assets_loaded_at = -math.inf
+        self._partitions_checked_at = time.monotonic()  # the lifespan has just checked
+        self._next_due: dict[tuple[str, str], float] = {}
+        self._failures: dict[tuple[str, str], int] = {}
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self._task: asyncio.Task | None = None
+
+    # ─── Lifecycle ────────────────────────────────────────
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="market-refresher")
+            logger.info(f"Market refresher started for timeframes {self.timeframes}")
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._inflight.values()) if t is not None]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        logger.info("Market refresher stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Market refresher tick failed: {e!r}")
+            await asyncio.sleep(TICK_SECONDS)
+
+    # ─── Scheduling ───────────────────────────────────────
+    async def _load_assets(self) -> None:
+        async with self._session_factory() as db:
+            self._assets = await service.list_assets(db)
+        self._assets_loaded_at = time.monotonic()
+        live = {(a.symbol, tf) for a in self._assets for tf in self.timeframes}
+        for key in set(self._next_due) - live:
+            self._next_due.pop(key, None)
+            self._failures.pop(key, None)
+
+    async def _ensure_partitions(self) -> None:
+        self._partitions_checked_at = time.monotonic()
+        async with self._session_factory() as db:
+            await ensure_candle_partitions(db)
+
+    async def tick(self) -> list[asyncio.Task]:
+        """Launch refreshes for every due (symbol, timeframe). Returns the new tasks."""
+        now = time.monotonic()
+        if now - self._partitions_checked_at >= settings.MARKET_PARTITION_CHECK_INTERVAL:
+            await self._ensure_partitions()
+        if now - self._assets_loaded_at >= settings.MARKET_REFRESH_ASSET_RELOAD:
+            await self._load_assets()
+
+        launched = []
+        for asset in self._assets:
+            for tf in self.timeframes:
+                key = (asset.symbol, tf)
+                if key in self._inflight:
+                    continue
+                if key not in self._next_due:
+                    # Spread the first round instead of hitting Yahoo for every series at once
+                    self._next_due[key] = now + random.uniform(0, min(refresh_interval(tf), 30.0))
+                if self._next_due[key] > now:
+                    continue
+                task = asyncio.create_task(self._refresh(asset, tf))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+                launched.append(task)
+        return launched
+
+    def next_delay(self, timeframe: str, failures: int) -> float:
+        """Delay before the next run: the interval, doubled per consecutive failure, capped."""
+        base = refresh_interval(timeframe)
+        delay = min(base * 2 ** failures, max(base, settings.MARKET_REFRESH_MAX_BACKOFF))
+        return delay + random.uniform(0, delay * JITTER)
+
+    async def _refresh(self, asset: Asset, timeframe: str) -> None:
+        key = (asset.symbol, timeframe)
+        async with self._semaphore:
+            try:
+                async with self._session_factory() as db:
+                    written = await service.ingest_candles(db, asset, timeframe, REFRESH_PERIODS[timeframe])
+                self._failures.pop(key, None)
+                if written:
+                    logger.debug(f"Refreshed {len(written)} {timeframe} candles for {asset.symbol}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures[key] = self._failures.get(key, 0) + 1
+                logger.warning(
+                    f"Refresh failed for {asset.symbol} ({timeframe}), "
+                    f"attempt {self._failures[key]}: {e!r}"
+                )
+        self._next_due[key] = time.monotonic() + self.next_delay(timeframe, self._failures.get(key, 0))
+
+
+market_refresher = MarketRefresher()
@@ -0,0 +1,89 @@
+"""In-process registry of tracked assets.
+
+Symbol lookups and type-filtered listings are answered from memory instead
+of querying `assets` on every chart request. The registry is loaded at
+startup, reloaded after `invalidate()` (called by `create_asset` and
+`delete_asset`) and at most MARKET_ASSET_REGISTRY_TTL seconds after the
+last load, which is how changes made by other workers are picked up.
+
+Assets are held as detached ORM instances with every column loaded; treat
+them as read-only snapshots.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.market.models import Asset
+
+
+class AssetRegistry:
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl if ttl is not None else settings.MARKET_ASSET_REGISTRY_TTL
+        self._by_symbol: dict[str, Asset] = {}
+        self._by_type: dict[str, list[Asset]] = {}
+        self._all: list[Asset] = []
+        self._loaded_at = -math.inf
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self._loaded_at < self.ttl
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._loaded_at = -math.inf
+
+    async def load(self, db: AsyncSession) -> None:
+        """Read every asset into memory. Detaches them from `db`."""
+        generation = self._generation
+        assets = list((await db.execute(select(Asset).order_by(Asset.symbol))).scalars().all())
+        for asset in assets:
+            db.expunge(asset)
+        self._index(assets)
+        # An invalidation during the read means the rows may predate it; reload next time
+        if generation == self._generation:
+            self._loaded_at = time.monotonic()
+
+    def replace(self, assets: list[Asset]) -> None:
+        """Serve `assets` without reading the DB until the next reload (benchmarks, tests)."""
+        self._index(sorted(assets, key=lambda a: a.symbol))
+        self._loaded_at = time.monotonic()
+
+    def _index(self, assets: list[Asset]) -> None:
+        by_type: dict[str, list[Asset]] = {}
+        for asset in assets:
+            by_type.setdefault(asset.asset_type, []).append(asset)
+        self._all = assets
+        self._by_symbol = {a.symbol: a for a in assets}
+        self._by_type = by_type
+
+    async def _ensure_loaded(self, db: AsyncSession) -> None:
+        if self.is_fresh:
+            return
+        async with self._lock:
+            if not self.is_fresh:  # another caller may have reloaded while we waited
+                await self.load(db)
+
+    def contains(self, symbol: str) -> bool:
+        """Whether `symbol` is in the current snapshot. Never loads."""
+        return symbol.upper() in self._by_symbol
+
+    async def get(self, db: AsyncSession, symbol: str) -> Asset | None:
+        await self._ensure_loaded(db)
+        return self._by_symbol.get(symbol.upper())
+
+    async def list(self, db: AsyncSession, asset_type: str | None = None) -> list[Asset]:
+        """Assets ordered by symbol, optionally of one type."""
+        await self._ensure_loaded(db)
+        return list(self._by_type.get(asset_type, ()) if asset_type else self._all)
+
+
+asset_registry = AssetRegistry()
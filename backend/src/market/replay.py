@@ -0,0 +1,250 @@
+"""Deterministic replay provider serving recorded candle fixtures.
+
+Selected with MARKET_PROVIDER=replay. Fixtures live in MARKET_REPLAY_DIR,
+one file per series named `{SYMBOL}_{timeframe}.parquet` or `.csv`, with
+columns:
+
+    timestamp   exchange-local wall clock (stored as UTC, see `frame_to_candles`)
+    time        Unix seconds of the bar (optional, defaults to `timestamp`)
+    open, high, low, close, volume
+
+Periods are measured back from a fixture's last bar rather than from now,
+so a recording answers the same way whenever it is replayed. Quotes are
+derived from the last two daily bars. Symbol metadata comes from an
+optional `metadata.csv` (symbol, name, exchange, currency, market_cap).
+
+Every call sleeps MARKET_REPLAY_LATENCY plus up to MARKET_REPLAY_JITTER
+seconds and fails with probability MARKET_REPLAY_ERROR_RATE, both drawn
+from a generator seeded with MARKET_REPLAY_SEED: a given sequence of
+calls always sees the same delays and failures. Injected failures raise
+ReplayError, a ConnectionError, so they count as upstream failures.
+
+Record fixtures from Yahoo Finance with `record`; Parquet needs pyarrow.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from src.core.config import settings
+from src.market.provider import (
+    CANDLE_KEYS,
+    PERIOD_DELTAS,
+    VALID_PERIODS,
+    VALID_TIMEFRAMES,
+    YFinanceProvider,
+)
+
+FIXTURE_SUFFIXES = (".parquet", ".csv")
+METADATA_FILE = "metadata.csv"
+METADATA_KEYS = ("symbol", "name", "exchange", "currency", "market_cap")
+_OHLCV = ("open", "high", "low", "close", "volume")
+
+
+class ReplayError(ConnectionError):
+    """An injected upstream failure."""
+
+
+def fixture_path(directory: str | Path, symbol: str, timeframe: str, fmt: str = "csv") -> Path:
+    return Path(directory) / f"{symbol.upper()}_{timeframe}.{fmt}"
+
+
+def write_fixture(path: str | Path, candles: list[dict]) -> Path:
+    """Write candle dicts (CANDLE_KEYS) as a fixture; the format follows the suffix."""
+    import pandas as pd
+
+    path = Path(path)
+    df = pd.DataFrame(candles, columns=CANDLE_KEYS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def read_fixture(path: str | Path) -> dict[str, np.ndarray]:
+    """Fixture columns: timestamp (datetime64[ns], UTC-naive), time, OHLC (float64), volume (int64)."""
+    import pandas as pd
+
+    path = Path(path)
+    df = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+    stamps = pd.to_datetime(df["timestamp"], utc=True).dt.tz_localize(None).to_numpy("datetime64[ns]")
+    order = np.argsort(stamps, kind="stable")
+    cols = {"timestamp": stamps[order]}
+    if "time" in df:
+        cols["time"] = df["time"].to_numpy(np.float64)[order]
+    else:
+        cols["time"] = cols["timestamp"].astype(np.int64) / 1e9
+    for key in _OHLCV:
+        cols[key] = df[key].to_numpy(np.int64 if key == "volume" else np.float64)[order]
+    return cols
+
+
+def record(
+    directory: str | Path,
+    symbols: list[str],
+    timeframes: tuple[str, ...] = ("1d",),
+    period: str = "1y",
+    fmt: str = "csv",
+) -> list[Path]:
+    """Fetch series and metadata from Yahoo Finance and save them as fixtures."""
+    import pandas as pd
+
+    upstream = YFinanceProvider()
+    written, metadata = [], []
+    for symbol in symbols:
+        for timeframe in timeframes:
+            candles = upstream.fetch_candles(symbol, timeframe, period)
+            if candles:
+                written.append(write_fixture(fixture_path(directory, symbol, timeframe, fmt), candles))
+        if (meta := upstream.fetch_metadata(symbol)) is not None:
+            metadata.append(meta)
+    if metadata:
+        path = Path(directory) / METADATA_FILE
+        pd.DataFrame(metadata, columns=METADATA_KEYS).to_csv(path, index=False)
+        written.append(path)
+    return written
+
+
+class ReplayProvider:
+    name = "replay"
+
+    def __init__(
+        self,
+        directory: str | Path,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.directory = Path(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._fixtures: dict[tuple[str, str], dict[str, np.ndarray] | None] = {}
+        self._fixtures_lock = threading.Lock()
+        self._metadata: dict[str, dict] | None = None
+
+    @classmethod
+    def from_settings(cls) -> ReplayProvider:
+        return cls(
+            settings.MARKET_REPLAY_DIR,
+            latency=settings.MARKET_REPLAY_LATENCY,
+            jitter=settings.MARKET_REPLAY_JITTER,
+            error_rate=settings.MARKET_REPLAY_ERROR_RATE,
+            seed=settings.MARKET_REPLAY_SEED,
+        )
+
+    def _roll(self) -> tuple[float, bool]:
+        """(delay, fail) for the next call."""
+        with self._random_lock:
+            delay = self.latency + (self._random.uniform(0.0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        return delay, fail
+
+    def _simulate(self, what: str) -> None:
+        delay, fail = self._roll()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise ReplayError(f"Injected failure for {what}")
+
+    def _fixture(self, symbol: str, timeframe: str) -> dict[str, np.ndarray] | None:
+        key = (symbol.upper(), timeframe)
+        if key not in self._fixtures:
+            with self._fixtures_lock:
+                if key not in self._fixtures:
+                    self._fixtures[key] = self._read(*key)
+        return self._fixtures[key]
+
+    def _read(self, symbol: str, timeframe: str) -> dict[str, np.ndarray] | None:
+        for suffix in FIXTURE_SUFFIXES:
+            path = self.directory / f"{symbol}_{timeframe}{suffix}"
+            if path.exists():
+                return read_fixture(path)
+        return None
+
+    def _read_metadata(self) -> dict[str, dict]:
+        import pandas as pd
+
+        path = self.directory / METADATA_FILE
+        if not path.exists():
+            return {}
+        df = pd.read_csv(path).astype(object)
+        rows = df.where(df.notna(), None).to_dict("records")
+        return {row["symbol"].upper(): {k: row.get(k) for k in METADATA_KEYS} for row in rows}
+
+    # MarketDataProvider
+    def fetch_candles(
+        self, symbol: str, timeframe: str = "1d", period: str = "6mo", start: datetime | None = None,
+    ) -> list[dict]:
+        if timeframe not in VALID_TIMEFRAMES:
+            raise ValueError(f"Invalid timeframe: {timeframe}")
+        if period not in VALID_PERIODS:
+            raise ValueError(f"Invalid period: {period}")
+        self._simulate(f"{symbol} ({timeframe})")
+
+        cols = self._fixture(symbol, timeframe)
+        if cols is None or not cols["time"].size:
+            return []
+        stamps = cols["timestamp"]
+        if start is not None:
+            since = np.datetime64(round(start.replace(tzinfo=start.tzinfo or timezone.utc).timestamp() * 1e6), "us")
+            lo = int(np.searchsorted(stamps, since))
+        elif PERIOD_DELTAS[period] is not None:
+            lo = int(np.searchsorted(stamps, stamps[-1] - np.timedelta64(PERIOD_DELTAS[period])))
+        else:
+            lo = 0
+
+        utc = [t.replace(tzinfo=timezone.utc) for t in stamps[lo:].astype("datetime64[us]").tolist()]
+        return [
+            dict(zip(CANDLE_KEYS, row))
+            for row in zip(cols["time"][lo:].tolist(), utc, *(cols[k][lo:].tolist() for k in _OHLCV))
+        ]
+
+    def _quote(self, symbol: str) -> dict | None:
+        cols = self._fixture(symbol, "1d")
+        if cols is None or not cols["time"].size:
+            return None
+        close = cols["close"]
+        price = float(close[-1])
+        previous = float(close[-2]) if close.size > 1 else price
+        return {
+            "symbol": symbol.upper(),
+            "name": symbol.upper(),
+            "price": round(price, 4),
+            "change": round(price - previous, 4),
+            "change_percent": round((price - previous) / previous * 100, 2) if previous else 0.0,
+            "volume": int(cols["volume"][-1]),
+            "market_cap": None,
+            "timestamp": datetime.now(timezone.utc),
+        }
+
+    def fetch_quote(self, symbol: str) -> dict | None:
+        self._simulate(symbol)
+        return self._quote(symbol)
+
+    def fetch_quotes(self, symbols: list[str]) -> dict[str, dict | None]:
+        """One simulated round trip for the whole batch."""
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if not symbols:
+            return {}
+        self._simulate(", ".join(symbols))
+        return {symbol: self._quote(symbol) for symbol in symbols}
+
+    def fetch_metadata(self, symbol: str) -> dict | None:
+        self._simulate(f"{symbol} metadata")
+        if self._metadata is None:
+            with self._fixtures_lock:
+                if self._metadata is None:
+                    self._metadata = self._read_metadata()
+        return self._metadata.get(symbol.upper())
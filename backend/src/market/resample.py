@@ -0,0 +1,66 @@
+"""Vectorised OHLCV resampling from a finer stored timeframe to a coarser one.
+
+Bars are grouped into buckets and aggregated with NumPy `reduceat`:
+open = first, high = max, low = min, close = last, volume = sum.
+
+Bucket alignment follows Yahoo's conventions:
+    intraday  anchored at each day's first bar (e.g. 09:30, 10:30 for 1h)
+    1wk       weeks starting Monday
+    1mo       calendar months
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from src.market.provider import TIMEFRAME_SECONDS
+from src.market.series import Columns, empty_columns, length
+
+# Derived timeframe -> base timeframes it can be built from, coarsest first
+RESAMPLE_BASES: dict[str, tuple[str, ...]] = {
+    "5m": ("1m",),
+    "15m": ("5m", "1m"),
+    "30m": ("15m", "5m", "1m"),
+    "1h": ("30m", "15m", "5m", "1m"),
+    "1wk": ("1d",),
+    "1mo": ("1d",),
+}
+
+_DAY = 24 * 60 * 60
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """Index of the first element of each run of equal keys (keys must be sorted)."""
+    return np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+
+
+def bucket_keys(time: np.ndarray, target: str) -> np.ndarray:
+    """Bucket start (Unix seconds) for every bar in `time` (sorted ascending)."""
+    t = time.astype(np.int64)
+    if target == "1mo":
+        return t.astype("datetime64[s]").astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+    if target == "1wk":
+        days = t // _DAY
+        return ((days + 3) // 7 * 7 - 3) * _DAY  # 1970-01-01 was a Thursday
+    width = TIMEFRAME_SECONDS[target]
+    days = t // _DAY
+    starts = _group_starts(days)
+    session_open = np.repeat(t[starts], np.diff(np.append(starts, t.size)))
+    return session_open + (t - session_open) // width * width
+
+
+def resample(cols: Columns, target: str) -> Columns:
+    """Aggregate sorted base-timeframe columns into `target` bars."""
+    if not length(cols):
+        return empty_columns()
+    keys = bucket_keys(cols["time"], target)
+    starts = _group_starts(keys)
+    ends = np.append(starts[1:], keys.size) - 1
+    return {
+        "time": keys[starts].astype(np.float64),
+        "open": cols["open"][starts],
+        "high": np.maximum.reduceat(cols["high"], starts),
+        "low": np.minimum.reduceat(cols["low"], starts),
+        "close": cols["close"][ends],
+        "volume": np.add.reduceat(cols["volume"], starts),
+    }
@@ -1,19 +1,34 @@
 """Market data API router — assets, candles, quotes."""
 
+import asyncio
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from loguru import logger
+from starlette.status import WS_1011_INTERNAL_ERROR
 
 from src.auth.dependencies import get_current_user
-from src.core.database import SessionDep
+from src.core.config import settings
+from src.core.database import SessionDep, get_session
 from src.core.dependencies import require_admin
-from src.market import service
+from src.core.http_cache import cache_headers, etag_matches, make_etag, not_modified, public
+from src.market import analytics, series, service, transport
+from src.market.provider import upstream_stats
+from src.market.exceptions import UnknownSymbol
+from src.market.stream import Subscription, candle_hub, ordered_bars, quote_hub
+from src.market.symbols import check_symbol, negative_cache
 from src.market.schemas import (
+    AnalyticsResponse,
     AssetCreate,
     AssetResponse,
     AssetQuote,
+    CandlesColumnarResponse,
     CandlesResponse,
     CandleResponse,
+    IndicatorsResponse,
+    QuotesResponse,
 )
 
 market_route = APIRouter(prefix="/market", tags=["Market Data"])
@@ -26,9 +41,11 @@ market_route = APIRouter(prefix="/market", tags=["Market Data"])
 @market_route.get("/assets", response_model=list[AssetResponse])
 async def list_assets(
     db: SessionDep,
+    response: Response,
     asset_type: str | None = Query(None, description="Filter by type: stock, crypto, forex, etc."),
 ):
     """List all tracked assets."""
+    response.headers["Cache-Control"] = public(settings.HTTP_PUBLIC_MAX_AGE)
     return await service.list_assets(db, asset_type)
 
 
@@ -53,29 +70,328 @@ async def delete_asset(asset_id: UUID, db: SessionDep):
 #  CANDLES (OHLCV chart data)
 # ═══════════════════════════════════════════════════════════
 
-@market_route.get("/candles/{symbol}", response_model=CandlesResponse)
+# Binary transports negotiated via Accept, documented alongside the JSON shapes
+_BINARY_CANDLES = {
+    200: {
+        "content": {
+            media_type: {"schema": {"type": "string", "format": "binary"}}
+            for media_type in (transport.PACKED_F64, transport.ARROW_STREAM)
+        },
+    },
+}
+
+
+@market_route.get(
+    "/candles/{symbol}",
+    response_model=CandlesResponse | CandlesColumnarResponse,
+    responses=_BINARY_CANDLES,
+)
 async def get_candles(
     symbol: str,
+    request: Request,
+    response: Response,
     db: SessionDep,
     timeframe: str = Query("1d", description="1d, 1h, 5m, etc."),
     period: str = Query("6mo", description="1d, 5d, 1mo, 3mo, 6mo, 1y, 5y, max"),
+    limit: int | None = Query(None, ge=1, le=100_000, description="Return only the newest N candles"),
+    format: Literal["rows", "columnar"] = Query(
+        "rows",
+        description="rows: list of candle objects. columnar: parallel time/open/high/low/close/volume arrays",
+    ),
 ):
-    """Get OHLCV candle data for a symbol. Uses DB cache when available."""
-    resolved_symbol, candles = await service.get_candles(db, symbol, timeframe, period)
+    """
+    Get OHLCV candle data for a symbol. Uses DB cache when available.
+
+    `format=columnar` returns `CandlesColumnarResponse` — one array per field
+    instead of one object per bar — which is several times smaller and
+    cheaper to build for long histories.
+
+    Binary transports are negotiated via `Accept` and take precedence over
+    `format`: `application/vnd.apache.arrow.stream` (Arrow IPC) or
+    `application/vnd.marketpulse.candles+f64` (packed float64, see
+    `src/market/transport.py` for the layout).
+
+    Responses carry an ETag and may be reused for one bar (capped);
+    `If-None-Match` with a current ETag gets a 304. For registered assets
+    the ETag is the stored series' version (see `service.series_version`),
+    checked before any rows are read while the series is fresh; ad-hoc
+    series are tagged by their newest bar.
+    """
+    media_type = transport.negotiate(request.headers.get("accept"), transport.offered_media_types())
+    request_parts = (symbol.strip().upper(), timeframe, period, limit, format, media_type)
+    version = await service.candles_version(db, symbol, timeframe)
+    if version is not None and version[1]:
+        etag = make_etag(*request_parts, version[0])
+        if etag_matches(request, etag):
+            return not_modified(etag, public(service.candle_cache_ttl(timeframe)))
+
+    resolved_symbol, candles = await service.get_candles(db, symbol, timeframe, period, limit)
+    version = await service.candles_version(db, resolved_symbol, timeframe)
+    if version is not None:
+        etag = make_etag(*request_parts, version[0])
+    else:
+        etag = _candles_etag(candles, *request_parts)
+    cache_control = public(service.candle_cache_ttl(timeframe))
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    headers = {**cache_headers(etag, cache_control), "Vary": "Accept"}
+
+    if media_type != transport.JSON:
+        binary = transport.binary_candles_response(media_type, candles, resolved_symbol, timeframe)
+        binary.headers.update(headers)
+        return binary
+    if format == "columnar":
+        # Built straight from the arrays; bypasses per-bar model validation
+        return JSONResponse({
+            "symbol": resolved_symbol,
+            "timeframe": timeframe,
+            "count": series.length(candles),
+            **series.columns_to_lists(candles),
+        }, headers=headers)
+    response.headers.update(headers)
     return CandlesResponse(
         symbol=resolved_symbol,
         timeframe=timeframe,
-        count=len(candles),
-        candles=[CandleResponse(**c) for c in candles],
+        count=series.length(candles),
+        candles=[CandleResponse(**c) for c in series.columns_to_records(candles)],
     )
 
 
+def _candles_etag(candles: series.Columns, *request_parts) -> str:
+    """Newest bar time and values (the forming bar changes in place), window start and length."""
+    n = series.length(candles)
+    newest = [candles[k][-1] for k in series.CANDLE_FIELDS] if n else []
+    oldest = candles["time"][0] if n else None
+    return make_etag(*request_parts, n, oldest, *newest)
+
+
+@market_route.websocket("/candles/{symbol}/stream")
+async def candle_stream(
+    websocket: WebSocket,
+    symbol: str,
+    timeframe: str = Query("1d"),
+    period: str = Query("6mo"),
+    limit: int | None = Query(None, ge=1, le=100_000),
+):
+    """
+    WebSocket endpoint for a live chart.
+
+    Connect: ws://host/api/v1/market/candles/{symbol}/stream?timeframe=5m&period=1d
+
+    Server sends: {"type": "snapshot", "symbol", "timeframe", "count", time: [...], open: [...], ...}
+                  (same shape as `format=columnar`), then
+                  {"type": "bars", "symbol": "...", "bars": [{time, open, high, low, close, volume}, ...]}
+                  with the forming bar and any bars that closed since the last message,
+                  oldest first. Apply each bar as an upsert keyed by `time`.
+                  {"type": "error", "content": "..."} is sent before closing on failure
+                  (close code 1011 for unexpected errors).
+    """
+    await websocket.accept()
+    try:
+        async for session in get_session():
+            resolved, candles = await service.get_candles(session, symbol, timeframe, period, limit)
+            registered = await service.get_asset_by_symbol(session, resolved) is not None
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "content": e.detail})
+        await websocket.close()
+        return
+    except Exception as e:
+        await _close_on_error(websocket, f"candle stream {symbol} ({timeframe})", e)
+        return
+
+    # Stored series carry exchange-local bar times; match them in the updates
+    key = (resolved, timeframe, "timestamp" if registered else "time")
+    sub = Subscription()
+    sender = None
+    try:
+        await websocket.send_json({
+            "type": "snapshot",
+            "symbol": resolved,
+            "timeframe": timeframe,
+            "count": series.length(candles),
+            **series.columns_to_lists(candles),
+        })
+        candle_hub.subscribe(sub, [key])
+        sender = asyncio.create_task(_pump_bars(websocket, sub))
+        while True:
+            await websocket.receive_text()  # nothing expected; detects disconnects
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await _close_on_error(websocket, f"candle stream {resolved} ({timeframe})", e)
+    finally:
+        candle_hub.unsubscribe(sub)
+        if sender is not None:
+            sender.cancel()
+
+
+async def _close_on_error(websocket: WebSocket, stream: str, error: Exception) -> None:
+    """Report an unexpected failure to the client and close with 1011."""
+    logger.exception(f"Market {stream} failed: {error!r}")
+    try:
+        await websocket.send_json({"type": "error", "content": "Internal error"})
+        await websocket.close(code=WS_1011_INTERNAL_ERROR)
+    except Exception:
+        pass  # the connection is already gone
+
+
+async def _pump_bars(websocket: WebSocket, sub: Subscription) -> None:
+    while True:
+        for message in await sub.next_batch():
+            await websocket.send_json(ordered_bars(message))
+
+
+# ═══════════════════════════════════════════════════════════
+#  INDICATORS
+# ═══════════════════════════════════════════════════════════
+
+def _json_floats(values) -> list[float | None]:
+    return [None if v != v else v for v in values.tolist()]  # NaN -> null
+
+
+@market_route.get("/indicators/{symbol}", response_model=IndicatorsResponse)
+async def get_indicators(
+    symbol: str,
+    db: SessionDep,
+    indicator_set: str = Query(
+        ...,
+        alias="set",
+        description="Comma-separated name:params, e.g. sma:20,ema:50,rsi:14,macd:12:26:9,bb:20:2",
+    ),
+    timeframe: str = Query("1d", description="1d, 1h, 5m, etc."),
+    period: str = Query("6mo", description="1d, 5d, 1mo, 3mo, 6mo, 1y, 5y, max"),
+    limit: int | None = Query(None, ge=1, le=100_000, description="Return only the newest N bars"),
+):
+    """Technical indicators over the stored candle series, as arrays aligned with `time`."""
+    resolved, time, results = await service.get_indicators(db, symbol, indicator_set, timeframe, period, limit)
+    return JSONResponse({
+        "symbol": resolved,
+        "timeframe": timeframe,
+        "count": int(time.size),
+        "time": time.tolist(),
+        "indicators": {
+            key: {line: _json_floats(values) for line, values in lines.items()}
+            for key, lines in results.items()
+        },
+    })
+
+
+# ═══════════════════════════════════════════════════════════
+#  ANALYTICS (multi-symbol)
+# ═══════════════════════════════════════════════════════════
+
+@market_route.get("/analytics", response_model=AnalyticsResponse)
+async def get_analytics(
+    symbols: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT,BTC-USD"),
+    timeframe: str = Query("1d", description="1d, 1h, 5m, etc."),
+    period: str = Query("1y", description="1d, 5d, 1mo, 3mo, 6mo, 1y, 5y, max"),
+    window: int = Query(20, ge=2, le=252, description="Rolling volatility window, in bars"),
+):
+    """Correlation matrix, rolling volatility and cumulative returns across symbols (memoised)."""
+    return JSONResponse(await analytics.get_analytics(symbols.split(","), timeframe, period, window))
+
+
 # ═══════════════════════════════════════════════════════════
 #  QUOTES (live prices)
 # ═══════════════════════════════════════════════════════════
 
+@market_route.get("/quotes", response_model=QuotesResponse)
+async def get_quotes(
+    response: Response,
+    symbols: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT,BTC-USD"),
+):
+    """Get latest quotes for several symbols in one round-trip. Partial results on failure."""
+    quotes, errors = await service.get_quotes(symbols.split(","))
+    response.headers["Cache-Control"] = public(settings.MARKET_QUOTE_TTL)
+    return QuotesResponse(quotes=[AssetQuote(**q) for q in quotes], errors=errors)
+
+
 @market_route.get("/quote/{symbol}", response_model=AssetQuote)
-async def get_quote(symbol: str):
-    """Get latest live quote for a symbol."""
+async def get_quote(symbol: str, response: Response):
+    """Get latest quote for a symbol (cached for a few seconds)."""
     quote = await service.get_quote(symbol)
-    return AssetQuote(**quote)
\ No newline at end of file
+    response.headers["Cache-Control"] = public(settings.MARKET_QUOTE_TTL)
+    return AssetQuote(**quote)
+
+
+@market_route.get("/upstream", dependencies=[Depends(require_admin)])
+async def get_upstream_status():
+    """Upstream provider metrics: pool load, rate limiter waits and circuit breaker state."""
+    return upstream_stats()
+
+
+# ═══════════════════════════════════════════════════════════
+#  STREAM (live quotes over WebSocket)
+# ═══════════════════════════════════════════════════════════
+
+async def _pump(websocket: WebSocket, sub: Subscription) -> None:
+    while True:
+        for message in await sub.next_batch():
+            await websocket.send_json(message)
+
+
+@market_route.websocket("/stream")
+async def quote_stream(websocket: WebSocket):
+    """
+    WebSocket endpoint for live quotes.
+
+    Connect: ws://host/api/v1/market/stream
+
+    Client sends: {"action": "subscribe" | "unsubscribe", "symbols": ["AAPL", ...]}
+    Server sends: {"type": "snapshot", "symbol": "...", "data": {full quote}}
+                  {"type": "delta", "symbol": "...", "data": {changed fields + timestamp}}
+                  {"type": "error", "content": "..."}
+                  {"type": "error", "symbol": "...", "content": "..."} for a rejected symbol
+
+    Subscribed symbols are checked like REST quote requests (see
+    `symbols.check_symbol` and `negative_cache`); rejected ones get an
+    error each and the rest are subscribed.
+    """
+    await websocket.accept()
+    sub = Subscription()
+    sender = asyncio.create_task(_pump(websocket, sub))
+    try:
+        while True:
+            try:
+                data = await websocket.receive_json()
+            except (ValueError, KeyError):  # malformed JSON, or a binary frame (no "text")
+                await websocket.send_json({"type": "error", "content": "Expected a JSON message"})
+                continue
+            action = data.get("action") if isinstance(data, dict) else None
+            raw = data.get("symbols") if isinstance(data, dict) else None
+            if action not in ("subscribe", "unsubscribe") or not isinstance(raw, list):
+                await websocket.send_json({"type": "error", "content": "Expected {action, symbols}"})
+                continue
+
+            symbols = list(dict.fromkeys(str(s).strip().upper() for s in raw if str(s).strip()))
+            if action == "unsubscribe":
+                quote_hub.unsubscribe(sub, symbols)
+                continue
+
+            valid = []
+            for symbol in symbols:
+                try:
+                    check_symbol(symbol)
+                except UnknownSymbol as e:
+                    await websocket.send_json({"type": "error", "symbol": symbol, "content": e.detail})
+                    continue
+                if (reason := negative_cache.get(f"quote:{symbol}")) is not None:
+                    await websocket.send_json({"type": "error", "symbol": symbol, "content": reason})
+                    continue
+                valid.append(symbol)
+            if not valid:
+                continue
+            if len(sub.keys | set(valid)) > settings.MARKET_MAX_BATCH_SYMBOLS:
+                await websocket.send_json({
+                    "type": "error",
+                    "content": f"At most {settings.MARKET_MAX_BATCH_SYMBOLS} symbols per connection",
+                })
+            else:
+                quote_hub.subscribe(sub, valid)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await _close_on_error(websocket, "quote stream", e)
+    finally:
+        quote_hub.unsubscribe(sub)
+        sender.cancel()
@@ -47,6 +47,56 @@ class CandlesResponse(BaseModel):
     candles: list[CandleResponse]
 
 
+class CandlesColumnarResponse(BaseModel):
+    """Candles as parallel arrays (`format=columnar`); index i across arrays is one bar."""
+    symbol: str
+    timeframe: str
+    count: int
+    time: list[float]
+    open: list[float]
+    high: list[float]
+    low: list[float]
+    close: list[float]
+    volume: list[int]
+
+
+class IndicatorsResponse(BaseModel):
+    """
+    Indicator lines aligned with `time`. `indicators` maps each requested
+    indicator (e.g. "macd:12:26:9") to its lines (e.g. macd, signal, hist);
+    values are null until the indicator has warmed up.
+    """
+    symbol: str
+    timeframe: str
+    count: int
+    time: list[float]
+    indicators: dict[str, dict[str, list[float | None]]]
+
+
+class AssetAnalytics(BaseModel):
+    total_return: float
+    volatility: float | None  # annualised, over the whole window
+
+
+class AnalyticsResponse(BaseModel):
+    """
+    Cross-symbol analytics on the bars all `symbols` have in common.
+    `correlation[i][j]` is the correlation of log returns of symbols i and j;
+    rolling volatility is annualised over `window` bars.
+    """
+    symbols: list[str]
+    timeframe: str
+    period: str
+    window: int
+    count: int
+    time: list[float]
+    cumulative_returns: dict[str, list[float]]
+    rolling_volatility: dict[str, list[float | None]]
+    correlation: list[list[float | None]]
+    summary: dict[str, AssetAnalytics]
+    errors: dict[str, str] = {}
+
+
 class AssetQuote(BaseModel):
     """Real-time or latest price quote."""
     symbol: str
@@ -57,3 +107,9 @@ class AssetQuote(BaseModel):
     volume: int
     market_cap: float | None = None
     timestamp: datetime
+
+
+class QuotesResponse(BaseModel):
+    """Batch quote result. Symbols that failed are listed in `errors`."""
+    quotes: list[AssetQuote]
+    errors: dict[str, str] = Field(default_factory=dict)
@@ -0,0 +1,69 @@
+"""Columnar candle series helpers.
+
+Candles move through the service as a dict of parallel NumPy arrays
+(`time`, `open`, `high`, `low`, `close`, `volume`) instead of one dict or
+model per bar. `time` is Unix seconds (float64), prices are float64 and
+volume is int64.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import numpy as np
+
+CANDLE_FIELDS = ("time", "open", "high", "low", "close", "volume")
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+Columns = dict[str, np.ndarray]
+
+
+def empty_columns() -> Columns:
+    cols = {k: np.empty(0, dtype=np.float64) for k in CANDLE_FIELDS}
+    cols["volume"] = np.empty(0, dtype=np.int64)
+    return cols
+
+
+def rows_to_columns(rows: Sequence[Sequence]) -> Columns:
+    """Build columns from DB rows shaped (timestamp, open, high, low, close, volume)."""
+    n = len(rows)
+    if not n:
+        return empty_columns()
+    ts, o, h, l, c, v = zip(*rows)
+    return {
+        "time": np.fromiter((t.timestamp() for t in ts), dtype=np.float64, count=n),
+        "open": np.array(o, dtype=np.float64),
+        "high": np.array(h, dtype=np.float64),
+        "low": np.array(l, dtype=np.float64),
+        "close": np.array(c, dtype=np.float64),
+        "volume": np.array(v, dtype=np.int64),
+    }
+
+
+def records_to_columns(candles: Iterable[dict]) -> Columns:
+    """Build columns from provider candle dicts."""
+    candles = list(candles)
+    if not candles:
+        return empty_columns()
+    cols = {k: np.array([c[k] for c in candles], dtype=np.float64) for k in CANDLE_FIELDS}
+    cols["volume"] = cols["volume"].astype(np.int64)
+    return cols
+
+
+def columns_to_records(cols: Columns) -> list[dict]:
+    """Expand columns into chart-ready dicts (time, open, high, low, close, volume)."""
+    values = [cols[k].tolist() for k in CANDLE_FIELDS]
+    return [dict(zip(CANDLE_FIELDS, row)) for row in zip(*values)]
+
+
+def columns_to_lists(cols: Columns) -> dict[str, list]:
+    """Plain-list view of the columns, ready for JSON encoding."""
+    return {k: cols[k].tolist() for k in CANDLE_FIELDS}
+
+
+def length(cols: Columns) -> int:
+    return int(cols["time"].shape[0])
+
+
+def tail(cols: Columns, n: int) -> Columns:
+    return {k: v[-n:] for k, v in cols.items()}
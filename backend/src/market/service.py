@@ -2,15 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
 import uuid
+from datetime import datetime, timedelta
+from typing import Callable
 
-from sqlalchemy import select, delete
+import numpy as np
+from loguru import logger
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.market.models import Asset, Candle
-from src.market.provider import fetch_candles, fetch_quote
-from src.market.exceptions import AssetNotFound, AssetAlreadyExists, MarketDataUnavailable, InvalidTimeframe
-from src.market.provider import VALID_TIMEFRAMES
+from src.core.database import SessionLocal
+from src.market import series, transport
+from src.market.adhoc import AdhocSeries, adhoc_candles
+from src.market.bulk import copy_candles
+from src.market.cache import market_cache, pack_quote, quote_cache, unpack_quote
+from src.market.metadata import metadata_store
+from src.market.indicators import Lines, indicator_cache, parse_indicator_set, public_lines
+from src.market.constants import AssetType
+from src.market.models import Asset, Candle, CandleSeries
+from src.market.registry import asset_registry
+from src.market.resample import RESAMPLE_BASES, resample
+from src.market.provider import afetch_candles, afetch_quote, afetch_quotes, is_unavailable
+from src.market.symbols import check_symbol, negative_cache
+from src.market.upstream import upstream_breaker
+from src.market.exceptions import (
+    AssetNotFound,
+    AssetAlreadyExists,
+    MarketDataUnavailable,
+    InvalidTimeframe,
+    InvalidPeriod,
+    InvalidSymbols,
+    InvalidIndicators,
+    UnknownSymbol,
+)
+from src.market.provider import VALID_TIMEFRAMES, VALID_PERIODS, PERIOD_DELTAS, TIMEFRAME_SECONDS
+from src.core.config import settings
+from src.utils.datetime_util import time_now
 
 
 # ─── Assets ───────────────────────────────────────────────
@@ -22,21 +52,19 @@ async def create_asset(db: AsyncSession, symbol: str, asset_name: str, asset_typ
     asset = Asset(symbol=symbol.upper(), asset_name=asset_name, asset_type=asset_type)
     db.add(asset)
     await db.commit()
+    asset_registry.invalidate()
     await db.refresh(asset)
     return asset
 
 
 async def get_asset_by_symbol(db: AsyncSession, symbol: str) -> Asset | None:
-    result = await db.execute(select(Asset).where(Asset.symbol == symbol.upper()))
-    return result.scalar_one_or_none()
+    """Registered asset for `symbol`, from the in-process registry (see `registry`)."""
+    return await asset_registry.get(db, symbol)
 
 
 async def list_assets(db: AsyncSession, asset_type: str | None = None) -> list[Asset]:
-    query = select(Asset).order_by(Asset.symbol)
-    if asset_type:
-        query = query.where(Asset.asset_type == asset_type)
-    result = await db.execute(query)
-    return list(result.scalars().all())
+    """Registered assets ordered by symbol, from the in-process registry."""
+    return await asset_registry.list(db, asset_type)
 
 
 async def delete_asset(db: AsyncSession, asset_id: uuid.UUID) -> None:
@@ -45,84 +73,621 @@ async def delete_asset(db: AsyncSession, asset_id: uuid.UUID) -> None:
         raise AssetNotFound()
     await db.delete(asset)
     await db.commit()
+    asset_registry.invalidate()
 
 
 # ─── Candles ──────────────────────────────────────────────
+PACKED_ROW_BYTES = 8 * len(series.CANDLE_FIELDS)
+UPSERT_BATCH_SIZE = 1000  # rows per INSERT; keeps bind params well under asyncpg's 32767 limit
+
+
+CANDLE_KEY = ("asset_id", "timeframe", "timestamp")
+
+
+def _upsert_candles_stmt(asset_id: uuid.UUID, timeframe: str, candles: list[dict]):
+    """INSERT ... ON CONFLICT (asset_id, timeframe, timestamp) DO UPDATE for a batch of candles."""
+    stmt = pg_insert(Candle).values([
+        {
+            "asset_id": asset_id,
+            "timeframe": timeframe,
+            "timestamp": c["timestamp"],
+            "open": c["open"],
+            "high": c["high"],
+            "low": c["low"],
+            "close": c["close"],
+            "volume": c["volume"],
+        }
+        for c in candles
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=CANDLE_KEY,
+        set_={
+            "open": stmt.excluded.open,
+            "high": stmt.excluded.high,
+            "low": stmt.excluded.low,
+            "close": stmt.excluded.close,
+            "volume": stmt.excluded.volume,
+        },
+    )
+
+
+async def insert_candles(db: AsyncSession, asset_id: uuid.UUID, timeframe: str, candles: list[dict]) -> int:
+    """Upsert candles with multi-row INSERT ... ON CONFLICT batches. Does not commit."""
+    # ON CONFLICT DO UPDATE may not touch the same row twice in one statement
+    candles = list({c["timestamp"]: c for c in candles}.values())
+    for i in range(0, len(candles), UPSERT_BATCH_SIZE):
+        await db.execute(_upsert_candles_stmt(asset_id, timeframe, candles[i:i + UPSERT_BATCH_SIZE]))
+    return len(candles)
+
+
+async def upsert_candles(
+    db: AsyncSession,
+    asset_id: uuid.UUID,
+    timeframe: str,
+    candles: list[dict],
+    full_period: str | None = None,
+) -> int:
+    """
+    Upsert candles and mark the series refreshed. Large backfills
+    (>= MARKET_BULK_COPY_THRESHOLD rows) go through COPY into a staging
+    table; smaller writes use INSERT batches. Pass `full_period` when
+    `candles` is everything the provider returned for that period (see
+    `mark_series_refreshed`). Does not commit.
+    """
+    if len(candles) >= settings.MARKET_BULK_COPY_THRESHOLD:
+        written = await copy_candles(db, asset_id, timeframe, candles)
+    else:
+        written = await insert_candles(db, asset_id, timeframe, candles)
+    await mark_series_refreshed(db, asset_id, timeframe, full_period)
+    return written
+
+
+async def mark_series_refreshed(
+    db: AsyncSession, asset_id: uuid.UUID, timeframe: str, full_period: str | None = None,
+) -> None:
+    """
+    Record that (asset, timeframe) was just written and, with
+    `full_period`, that the whole period was fetched; the caller passes
+    the widest such period (see `covers_period`). Does not commit.
+    """
+    values = {"refreshed_at": time_now()}
+    if full_period is not None:
+        values["full_period"] = full_period
+    stmt = pg_insert(CandleSeries).values(asset_id=asset_id, timeframe=timeframe, **values)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=("asset_id", "timeframe"),
+        set_={key: getattr(stmt.excluded, key) for key in values},
+    ))
+
+
+async def latest_candle(
+    db: AsyncSession, asset_id: uuid.UUID, timeframe: str,
+) -> tuple[datetime, datetime | None, str | None] | None:
+    """(timestamp, refreshed_at, full_period) of the newest stored candle and its series, or None."""
+    result = await db.execute(
+        select(Candle.timestamp, CandleSeries.refreshed_at, CandleSeries.full_period)
+        .outerjoin(
+            CandleSeries,
+            (CandleSeries.asset_id == Candle.asset_id) & (CandleSeries.timeframe == Candle.timeframe),
+        )
+        .where(Candle.asset_id == asset_id, Candle.timeframe == timeframe)
+        .order_by(Candle.timestamp.desc())
+        .limit(1)
+    )
+    row = result.first()
+    return (row.timestamp, row.refreshed_at, row.full_period) if row else None
+
+
+def is_stale(refreshed_at: datetime | None, timeframe: str, now: datetime | None = None) -> bool:
+    """
+    True once the stored series is due a refresh: one bar length after the
+    last write, capped at MARKET_CANDLE_MAX_STALENESS so the forming daily
+    or weekly bar still moves during the session. A series with no
+    recorded write is always stale.
+    """
+    if refreshed_at is None:
+        return True
+    now = now or time_now()
+    interval = min(TIMEFRAME_SECONDS[timeframe], settings.MARKET_CANDLE_MAX_STALENESS)
+    return (now - refreshed_at).total_seconds() >= interval
+
+
+def period_within(period: str, fetched: str | None) -> bool:
+    """Whether a full fetch of `fetched` includes everything `period` asks for."""
+    if fetched is None:
+        return False
+    have, want = PERIOD_DELTAS[fetched], PERIOD_DELTAS[period]
+    return have is None or (want is not None and want <= have)
+
+
+def covers_period(
+    earliest: datetime, latest: datetime, timeframe: str, period: str, full_period: str | None = None,
+) -> bool:
+    """
+    Whether stored candles reach back far enough for `period`. A few days of
+    slack absorb weekends and holidays; "max" is treated as the longest
+    bounded period since the listing date is unknown. A series already
+    fetched in full for `period` or longer (`full_period`) covers it even
+    when the provider's history is shorter (young listings, intraday caps).
+    """
+    if period_within(period, full_period):
+        return True
+    delta = PERIOD_DELTAS[period] or PERIOD_DELTAS["10y"]
+    slack = timedelta(seconds=max(TIMEFRAME_SECONDS[timeframe], 4 * 24 * 60 * 60))
+    return earliest <= latest - delta + slack
+
+
+async def earliest_candle_time(db: AsyncSession, asset_id: uuid.UUID, timeframe: str) -> datetime | None:
+    result = await db.execute(
+        select(func.min(Candle.timestamp))
+        .where(Candle.asset_id == asset_id, Candle.timeframe == timeframe)
+    )
+    return result.scalar_one_or_none()
+
+
+async def ingest_candles(
+    db: AsyncSession,
+    asset: Asset,
+    timeframe: str,
+    period: str = "6mo",
+) -> list[dict]:
+    """
+    Bring stored candles for (asset, timeframe) up to date and commit.
+
+    When nothing is stored, or the stored range does not reach back to
+    `period`, the full period is fetched, however recently the series was
+    refreshed. Otherwise, once the series is stale, only bars from the
+    latest stored timestamp onwards are fetched (the last stored bar is
+    re-fetched because it may still have been forming) and upserted, so
+    write cost scales with new bars rather than history length.
+
+    Returns the candles that were written. Provider errors propagate.
+    """
+    latest = await latest_candle(db, asset.id, timeframe)
+    start = None
+    full_period = latest[2] if latest is not None else None
+    if latest is not None:
+        earliest = await earliest_candle_time(db, asset.id, timeframe)
+        if covers_period(earliest, latest[0], timeframe, period, full_period):
+            if not is_stale(latest[1], timeframe):
+                return []
+            start = latest[0].replace(tzinfo=None)  # exchange-local; see provider.fetch_candles
+
+    candles = await afetch_candles(asset.symbol, timeframe, period, start=start)
+    if candles:
+        if start is None:  # a full fetch: record how far the provider's history goes
+            full_period = full_period if period_within(period, full_period) else period
+        await upsert_candles(db, asset.id, timeframe, candles, full_period=full_period if start is None else None)
+        await db.commit()
+    return candles
+
+
+async def read_candles(
+    db: AsyncSession,
+    asset_id: uuid.UUID,
+    timeframe: str,
+    period: str = "max",
+    limit: int | None = None,
+) -> series.Columns:
+    """
+    Read stored candles for the `period` window ending at the latest stored
+    bar, oldest first, as columns. Range and limit are applied in SQL and only the chart
+    columns are selected, so the covering index serves the scan.
+    """
+    same_series = (Candle.asset_id == asset_id, Candle.timeframe == timeframe)
+    query = select(
+        Candle.timestamp, Candle.open, Candle.high, Candle.low, Candle.close, Candle.volume,
+    ).where(*same_series)
+
+    delta = PERIOD_DELTAS[period]
+    if delta is not None:
+        latest = select(func.max(Candle.timestamp)).where(*same_series).scalar_subquery()
+        query = query.where(Candle.timestamp >= latest - delta)
+
+    if limit:
+        query = query.order_by(Candle.timestamp.desc()).limit(limit)
+    else:
+        query = query.order_by(Candle.timestamp)
+
+    rows = (await db.execute(query)).all()
+    if limit:
+        rows.reverse()
+    return series.rows_to_columns(rows)
+
+
+async def find_resample_base(db: AsyncSession, asset: Asset, timeframe: str, period: str) -> str | None:
+    """
+    Coarsest stored timeframe that `timeframe` can be resampled from and
+    whose stored range covers `period`, or None. Only the stored span
+    counts: a base fetched in full may still be capped far shorter than
+    `timeframe`'s own history (Yahoo keeps ~60 days of 5m bars but 730 of 1h).
+    """
+    for base in RESAMPLE_BASES.get(timeframe, ()):
+        latest = await latest_candle(db, asset.id, base)
+        if latest is None:
+            continue
+        earliest = await earliest_candle_time(db, asset.id, base)
+        if covers_period(earliest, latest[0], base, period):
+            return base
+    return None
+
+
+async def series_version(db: AsyncSession, asset_id: uuid.UUID, timeframe: str) -> tuple[str, bool] | None:
+    """
+    (version, fresh) of the stored series `get_candles` builds `timeframe`
+    from: the series itself and its resample bases. Every write goes
+    through `mark_series_refreshed`, so their refresh times identify the
+    stored rows; `fresh` is True when none of them is due a refresh, i.e.
+    a read will not write. None when nothing is stored.
+    """
+    result = await db.execute(
+        select(CandleSeries.timeframe, CandleSeries.refreshed_at)
+        .where(
+            CandleSeries.asset_id == asset_id,
+            CandleSeries.timeframe.in_((timeframe, *RESAMPLE_BASES.get(timeframe, ()))),
+        )
+        .order_by(CandleSeries.timeframe)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    version = ",".join(f"{tf}@{refreshed_at.timestamp() if refreshed_at else ''}" for tf, refreshed_at in rows)
+    return version, not any(is_stale(refreshed_at, tf) for tf, refreshed_at in rows)
+
+
+async def candles_version(db: AsyncSession, symbol: str, timeframe: str) -> tuple[str, bool] | None:
+    """`series_version` for a symbol; None for unregistered symbols and unstored series."""
+    asset = await get_asset_by_symbol(db, check_symbol(symbol))
+    return await series_version(db, asset.id, timeframe) if asset is not None else None
+
+
+async def refresh_candles(db: AsyncSession, asset: Asset, timeframe: str, period: str) -> None:
+    """`ingest_candles` that logs and rolls back on failure, so cached rows can still be served."""
+    try:
+        await ingest_candles(db, asset, timeframe, period)
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Candle refresh failed for {asset.symbol} ({timeframe}): {e!r}")
+
+
 async def get_candles(
     db: AsyncSession,
     symbol: str,
     timeframe: str = "1d",
     period: str = "6mo",
-) -> tuple[str, list[dict]]:
+    limit: int | None = None,
+    local_time: bool = False,
+) -> tuple[str, series.Columns]:
     """
-    Get candle data for a symbol. First checks DB cache,
-    falls back to yfinance fetch + cache.
+    Get candle data for a symbol as columns (see `series`).
+
+    Results are shared across workers for a short, timeframe-dependent TTL
+    (see `market_cache`). Registered assets are served from the DB cache,
+    which is topped up incrementally when stale. Coarser timeframes are resampled from a finer
+    stored series when one covers the period, instead of being fetched and
+    stored separately. Unregistered symbols are served from the ad-hoc
+    tier (see `load_adhoc_candles`) and registered automatically once
+    popular. `limit` keeps only the newest bars. Malformed or unknown
+    symbols are rejected up front (see `symbols.check_symbol`).
+
+    Stored series are timed by the exchange-local wall clock read as UTC;
+    ad-hoc series by the true bar time unless `local_time` asks for the
+    stored convention, so series from both tiers can be compared.
     """
     if timeframe not in VALID_TIMEFRAMES:
         raise InvalidTimeframe()
+    if period not in VALID_PERIODS:
+        raise InvalidPeriod()
+    symbol = check_symbol(symbol)
 
     asset = await get_asset_by_symbol(db, symbol)
+    # Counted before the shared cache, which would otherwise hide most requests
+    if asset is None and adhoc_candles.record_request(symbol):
+        _spawn(promote_symbol(symbol))
 
-    # Try DB cache first if asset is registered
-    if asset:
-        result = await db.execute(
-            select(Candle)
-            .where(Candle.asset_id == asset.id, Candle.timeframe == timeframe)
-            .order_by(Candle.timestamp)
-        )
-        cached = list(result.scalars().all())
-        if cached:
-            return symbol.upper(), [
-                {
-                    "time": c.timestamp.timestamp(),
-                    "open": c.open,
-                    "high": c.high,
-                    "low": c.low,
-                    "close": c.close,
-                    "volume": c.volume,
-                }
-                for c in cached
-            ]
-
-    # Fetch from provider
+    # Stored series are keyed by their version, so a payload never outlives the rows it was read from
+    key = f"candles:{symbol.upper()}:{timeframe}:{period}:{limit or ''}{':local' if local_time else ''}"
+    version = await series_version(db, asset.id, timeframe) if asset is not None else None
+    payload = await market_cache.get(f"{key}:{version[0]}" if version else key)
+    if payload is not None:
+        return symbol.upper(), transport.decode_packed(payload, len(payload) // PACKED_ROW_BYTES)
+
+    resolved, candles = await _load_candles(db, asset, symbol, timeframe, period, limit, local_time)
+    if asset is not None:
+        version = await series_version(db, asset.id, timeframe)
+    payload = bytes(transport.encode_packed(candles))
+    await market_cache.set(f"{key}:{version[0]}" if version else key, payload, candle_cache_ttl(timeframe))
+    return resolved, candles
+
+
+def candle_cache_ttl(timeframe: str) -> float:
+    """Seconds a serialized candle payload is shared: one bar, capped."""
+    return float(min(TIMEFRAME_SECONDS[timeframe], settings.MARKET_CANDLE_CACHE_MAX_TTL))
+
+
+async def _load_candles(
+    db: AsyncSession,
+    asset: Asset | None,
+    symbol: str,
+    timeframe: str,
+    period: str,
+    limit: int | None,
+    local_time: bool = False,
+) -> tuple[str, series.Columns]:
+    if not asset:
+        candles = await load_adhoc_candles(symbol, timeframe, period, local_time)
+        if limit:
+            candles = series.tail(candles, limit)
+        return symbol.upper(), candles
+
+    base = await find_resample_base(db, asset, timeframe, period)
+    if base:
+        await refresh_candles(db, asset, base, period)
+        candles = resample(await read_candles(db, asset.id, base, period), timeframe)
+        if limit:
+            candles = series.tail(candles, limit)
+    else:
+        await refresh_candles(db, asset, timeframe, period)
+        candles = await read_candles(db, asset.id, timeframe, period, limit)
+
+    if not series.length(candles):
+        raise MarketDataUnavailable(f"No data available for {symbol}")
+    return symbol.upper(), candles
+
+
+# ─── Ad-hoc symbols ───────────────────────────────────────
+_background: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def load_adhoc_candles(symbol: str, timeframe: str, period: str, local_time: bool = False) -> series.Columns:
+    """
+    Candles for an unregistered symbol from the ad-hoc tier (see `adhoc`).
+
+    A cached series covering `period` is served as is while fresh (same
+    rule as `is_stale`) and topped up from its last bar once stale; if the
+    top-up fails the cached bars are served. Otherwise the full period is
+    fetched and cached. A fetch that comes back empty, or fails for any
+    reason but the upstream being unavailable, is remembered in
+    `negative_cache` and answered from there until it expires. See
+    `AdhocSeries.window` for `local_time`.
+    """
+    negative_key = f"candles:{symbol.upper()}:{timeframe}:{period}"
+    if (reason := negative_cache.get(negative_key)) is not None:
+        raise MarketDataUnavailable(reason)
+
+    async with adhoc_candles.lock(symbol, timeframe):
+        entry = adhoc_candles.get(symbol, timeframe)
+        if entry is not None and entry.covers(period):
+            if is_stale(entry.fetched_at, timeframe):
+                try:
+                    start = entry.last_timestamp.replace(tzinfo=None)  # exchange-local; see provider.fetch_candles
+                    fetched = await afetch_candles(symbol, timeframe, period, start=start)
+                    entry = entry.extended(fetched, time_now())
+                    adhoc_candles.set(symbol, timeframe, entry)
+                except Exception as e:
+                    logger.warning(f"Ad-hoc top-up failed for {symbol} ({timeframe}), serving cached bars: {e!r}")
+            return entry.window(period, local_time)
+
+        try:
+            candles = await afetch_candles(symbol, timeframe, period)
+        except Exception as e:
+            reason = f"Could not fetch data for {symbol}"
+            if not is_unavailable(e):
+                negative_cache.add(negative_key, reason)
+            raise MarketDataUnavailable(reason)
+        if not candles:
+            reason = f"No data available for {symbol}"
+            negative_cache.add(negative_key, reason)
+            raise MarketDataUnavailable(reason)
+        entry = AdhocSeries.from_candles(candles, period, time_now())
+        adhoc_candles.set(symbol, timeframe, entry)
+        return entry.window(period, local_time)
+
+
+async def promote_symbol(
+    symbol: str,
+    session_factory: Callable[[], AsyncSession] = SessionLocal,
+) -> Asset | None:
+    """
+    Register a popular ad-hoc symbol as an asset and write its cached
+    series to the candle store, so it is served and refreshed like any
+    registered asset from then on. The asset is named from the metadata
+    store, falling back to the symbol. Returns None if it already exists
+    or promotion failed.
+    """
+    symbol = symbol.upper()
+    if not adhoc_candles.series_of(symbol):  # requested, but nothing was ever served (e.g. a typo)
+        adhoc_candles.promotion_failed(symbol)
+        return None
     try:
-        candles = fetch_candles(symbol, timeframe, period)
+        name = (await metadata_store.get(symbol)).get("name") or symbol
     except Exception:
-        raise MarketDataUnavailable(f"Could not fetch data for {symbol}")
+        name = symbol
+    try:
+        async with session_factory() as db:
+            try:
+                asset = await create_asset(db, symbol, name[:100], AssetType.UNK.value)
+            except AssetAlreadyExists:
+                adhoc_candles.drop(symbol)
+                return None
+            except IntegrityError:  # asset names are unique; another symbol has this one
+                await db.rollback()
+                asset = await create_asset(db, symbol, symbol, AssetType.UNK.value)
+            for timeframe, entry in adhoc_candles.series_of(symbol).items():
+                await upsert_candles(db, asset.id, timeframe, entry.records(), full_period=entry.period)
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Promoting {symbol} failed: {e!r}")
+        adhoc_candles.promotion_failed(symbol)
+        return None
+    adhoc_candles.drop(symbol)
+    logger.info(f"Promoted {symbol} to a registered asset")
+    return asset
 
-    if not candles:
-        raise MarketDataUnavailable(f"No data available for {symbol}")
 
-    # Cache if asset is registered
-    if asset:
-        # Clear old candles for this timeframe
-        await db.execute(
-            delete(Candle).where(Candle.asset_id == asset.id, Candle.timeframe == timeframe)
-        )
-        for c in candles:
-            db.add(Candle(
-                asset_id=asset.id,
-                timeframe=timeframe,
-                timestamp=c["timestamp"],
-                open=c["open"],
-                high=c["high"],
-                low=c["low"],
-                close=c["close"],
-                volume=c["volume"],
-            ))
-        await db.commit()
+# ─── Indicators ───────────────────────────────────────────
+# Wall time per bar of warm-up: equity sessions cover ~6.5 of 24 hours on
+# 5 of 7 days, so intraday and daily bars span more than their nominal length.
+_WARMUP_SLACK = {"1m": 5.5, "5m": 5.5, "15m": 5.5, "30m": 5.5, "1h": 5.5, "1d": 1.5, "1wk": 1.0, "1mo": 1.0}
 
-    # Return chart-ready data (without the timestamp datetime object)
-    chart_data = [
-        {"time": c["time"], "open": c["open"], "high": c["high"], "low": c["low"], "close": c["close"], "volume": c["volume"]}
-        for c in candles
-    ]
-    return symbol.upper(), chart_data
+
+def indicator_lookback(period: str, timeframe: str, warmup: int) -> str:
+    """Shortest period that covers `period` plus `warmup` bars before it ("max" if none does)."""
+    delta = PERIOD_DELTAS[period]
+    if delta is None:
+        return period
+    needed = delta + timedelta(seconds=warmup * TIMEFRAME_SECONDS[timeframe] * _WARMUP_SLACK[timeframe])
+    bounded = sorted((d, p) for p, d in PERIOD_DELTAS.items() if d is not None)
+    return next((p for d, p in bounded if d >= needed), "max")
+
+
+async def get_indicators(
+    db: AsyncSession,
+    symbol: str,
+    indicator_set: str,
+    timeframe: str = "1d",
+    period: str = "6mo",
+    limit: int | None = None,
+) -> tuple[str, np.ndarray, dict[str, Lines]]:
+    """
+    Compute indicators (see `indicators`) and return the bars in `period`
+    (and the newest `limit`).
+
+    Candles are read for `period` plus the longest indicator warm-up (see
+    `indicator_lookback`), so lines are settled at the start of the window
+    without pulling the full history. Results come from `indicator_cache`,
+    which only computes bars added since the last call.
+
+    Returns (SYMBOL, time, {indicator key: {line: values}}).
+    """
+    try:
+        specs = parse_indicator_set(indicator_set)
+    except ValueError as e:
+        raise InvalidIndicators(str(e))
+    if timeframe not in VALID_TIMEFRAMES:
+        raise InvalidTimeframe()
+    if period not in VALID_PERIODS:
+        raise InvalidPeriod()
+
+    lookback = indicator_lookback(period, timeframe, max(spec.warmup for spec in specs))
+    resolved, cols = await get_candles(db, symbol, timeframe, lookback)
+    time, close = cols["time"], cols["close"]
+    results = {spec.key: indicator_cache.get(resolved, timeframe, spec, time, close) for spec in specs}
+
+    lo = 0
+    delta = PERIOD_DELTAS[period]
+    if delta is not None and time.size:
+        lo = int(np.searchsorted(time, time[-1] - delta.total_seconds()))
+    if limit:
+        lo = max(lo, time.size - limit)
+    return resolved, time[lo:], {
+        key: {line: values[lo:] for line, values in public_lines(lines).items()}
+        for key, lines in results.items()
+    }
+
+
+async def _with_metadata(quote: dict) -> dict:
+    """Fill name and market cap from the metadata store (see `metadata`). A metadata failure never fails the quote."""
+    try:
+        meta = await metadata_store.get(quote["symbol"])
+    except Exception as e:
+        logger.warning(f"Metadata unavailable for {quote['symbol']}: {e!r}")
+        return quote
+    return {**quote, "name": meta.get("name") or quote["name"], "market_cap": meta.get("market_cap")}
+
+
+async def _load_quote(symbol: str) -> dict | None:
+    """
+    Quote from the shared cache, else upstream with metadata filled in (and
+    share it). A symbol the provider has no quote for is remembered in
+    `negative_cache`; an unavailable upstream is not held against it.
+    """
+    key = f"quote:{symbol}"
+    data = await market_cache.get(key)
+    if data is not None:
+        return unpack_quote(data)
+    try:
+        quote = await afetch_quote(symbol, strict=True)
+    except Exception as e:
+        if not is_unavailable(e):
+            raise
+        return None
+    if quote is None:
+        negative_cache.add(key, f"Quote unavailable for {symbol}")
+        return None
+    quote = await _with_metadata(quote)
+    await market_cache.set(key, pack_quote(quote), settings.MARKET_QUOTE_TTL)
+    return quote
 
 
 async def get_quote(symbol: str) -> dict:
-    """Get latest quote (always live, never cached)."""
-    quote = fetch_quote(symbol)
+    """
+    Get latest quote. Served from the in-process quote cache for
+    MARKET_QUOTE_TTL seconds, then from the shared cache; concurrent misses
+    share one upstream fetch. While the upstream circuit is open, the last
+    known quote is served however old it is. Malformed or unknown symbols,
+    and symbols recently found to have no quote, fail without an upstream
+    call.
+    """
+    symbol = check_symbol(symbol)
+    if (reason := negative_cache.get(f"quote:{symbol}")) is not None:
+        raise MarketDataUnavailable(reason)
+    quote = await quote_cache.get_or_load(symbol, lambda: _load_quote(symbol))
+    if not quote and not upstream_breaker.closed:
+        quote = quote_cache.peek(symbol)
     if not quote:
         raise MarketDataUnavailable(f"Quote unavailable for {symbol}")
     return quote
+
+
+async def get_quotes(symbols: list[str]) -> tuple[list[dict], dict[str, str]]:
+    """
+    Get quotes for several symbols. In-process and shared cache hits are
+    served directly; all remaining symbols are fetched in a single batched
+    provider call. Like `get_quote`, last known quotes stand in while the
+    upstream circuit is open. Unknown symbols and those in `negative_cache`
+    are reported as errors without being fetched; the batch itself cannot
+    tell a missing symbol from a failed one, so it adds no negative entries.
+
+    Returns (quotes, errors) where errors maps SYMBOL -> reason.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    if not symbols:
+        raise InvalidSymbols("Provide at least one symbol")
+    if len(symbols) > settings.MARKET_MAX_BATCH_SYMBOLS:
+        raise InvalidSymbols(f"At most {settings.MARKET_MAX_BATCH_SYMBOLS} symbols per request")
+
+    rejected = {}
+    for s in symbols:
+        try:
+            check_symbol(s)
+        except UnknownSymbol:
+            rejected[s] = "Unknown symbol"
+    found = {s: q for s in symbols if (q := quote_cache.get(s)) is not None}
+    misses = [s for s in symbols if s not in found and s not in rejected and not negative_cache.get(f"quote:{s}")]
+    if misses:
+        shared = await asyncio.gather(*(market_cache.get(f"quote:{s}") for s in misses))
+        for sym, data in zip(misses, shared):
+            if data is not None:
+                found[sym] = unpack_quote(data)
+                quote_cache.set(sym, found[sym])
+        misses = [s for s in misses if s not in found]
+    if misses:
+        fetched = {s: q for s, q in (await afetch_quotes(misses)).items() if q is not None}
+        filled = await asyncio.gather(*(_with_metadata(q) for q in fetched.values()))
+        for sym, quote in zip(fetched, filled):
+            quote_cache.set(sym, quote)
+            await market_cache.set(f"quote:{sym}", pack_quote(quote), settings.MARKET_QUOTE_TTL)
+            found[sym] = quote
+        if not upstream_breaker.closed:
+            found.update((s, q) for s in misses if s not in found and (q := quote_cache.peek(s)) is not None)
+
+    quotes = [found[s] for s in symbols if s in found]
+    errors = {s: rejected.get(s, "Quote unavailable") for s in symbols if s not in found}
+    return quotes, errors
@@ -0,0 +1,264 @@
+"""Live market data fan-out for the streaming WebSocket endpoints.
+
+A hub runs one poller task per channel (a quote symbol, or a symbol's
+candle series) every few seconds and broadcasts only what changed to
+every subscriber. Upstream cost is O(channels), not O(clients x channels).
+
+Each subscriber has a mailbox holding at most one pending message per
+symbol; newer updates are merged into it. A slow consumer therefore
+receives coalesced, up-to-date state and never blocks the broadcast or
+grows an unbounded queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Hashable
+
+from loguru import logger
+
+from src.core.config import settings
+from src.market import service
+from src.market.provider import afetch_candles
+
+# Quote fields compared between polls; `timestamp` is sent along with any change
+DIFF_FIELDS = ("name", "price", "change", "change_percent", "volume", "market_cap")
+
+# Period covering the last couple of bars, fetched before a candle feed has a tail
+TAIL_PERIODS = {
+    "1m": "1d",
+    "5m": "1d",
+    "15m": "1d",
+    "30m": "1d",
+    "1h": "5d",
+    "1d": "5d",
+    "1wk": "1mo",
+    "1mo": "3mo",
+}
+
+
+def _encode(quote: dict) -> dict:
+    data = {k: quote.get(k) for k in DIFF_FIELDS}
+    data["timestamp"] = quote["timestamp"].isoformat()
+    return data
+
+
+def quote_delta(previous: dict | None, current: dict) -> dict:
+    """Changed fields between two quotes (all fields when there is no previous)."""
+    if previous is None:
+        return _encode(current)
+    delta = {k: current.get(k) for k in DIFF_FIELDS if current.get(k) != previous.get(k)}
+    if delta:
+        delta["timestamp"] = current["timestamp"].isoformat()
+    return delta
+
+
+class Subscription:
+    """One client's channel set and coalescing mailbox."""
+
+    def __init__(self):
+        self.keys: set[Hashable] = set()
+        self._pending: dict[str, dict] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, message: dict) -> None:
+        pending = self._pending.get(message["symbol"])
+        if pending is None or message["type"] == "snapshot":
+            self._pending[message["symbol"]] = {**message, "data": dict(message["data"])}
+        else:
+            pending["data"].update(message["data"])  # keeps "snapshot" type if one is pending
+        self._ready.set()
+
+    def drop(self, symbol: str) -> None:
+        self._pending.pop(symbol, None)
+
+    async def next_batch(self) -> list[dict]:
+        """Wait for and take every pending message."""
+        await self._ready.wait()
+        self._ready.clear()
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+
+class PollingHub(ABC):
+    """
+    Shared pollers keyed by channel. Subclasses implement `poll` (fetch and
+    return the message to broadcast, if anything changed), `snapshot` (the
+    current state for a late subscriber) and `forget` (drop channel state).
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._subscribers: dict[Hashable, set[Subscription]] = defaultdict(set)
+        self._pollers: dict[Hashable, asyncio.Task] = {}
+
+    @abstractmethod
+    async def poll(self, key: Hashable) -> dict | None: ...
+
+    @abstractmethod
+    def snapshot(self, key: Hashable) -> dict | None: ...
+
+    @abstractmethod
+    def forget(self, key: Hashable) -> None: ...
+
+    def subscribe(self, sub: Subscription, keys: list[Hashable]) -> None:
+        for key in keys:
+            if key in sub.keys:
+                continue
+            sub.keys.add(key)
+            self._subscribers[key].add(sub)
+            message = self.snapshot(key)
+            if message is not None:
+                sub.offer(message)
+            if key not in self._pollers:
+                self._pollers[key] = asyncio.create_task(self._poll(key), name=f"stream-poller:{key}")
+
+    def unsubscribe(self, sub: Subscription, keys: list[Hashable] | None = None) -> None:
+        for key in list(sub.keys if keys is None else keys):
+            if key not in sub.keys:
+                continue
+            sub.keys.discard(key)
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    self._stop_poller(key)
+
+    def _stop_poller(self, key: Hashable) -> None:
+        self._subscribers.pop(key, None)
+        self.forget(key)
+        task = self._pollers.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._pollers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+        }
+
+    async def _poll(self, key: Hashable) -> None:
+        while self._subscribers.get(key):
+            try:
+                message = await self.poll(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Stream poll failed for {key}: {e!r}")
+            else:
+                if message is not None:
+                    for sub in list(self._subscribers.get(key, ())):
+                        sub.offer(message)
+            await asyncio.sleep(self.interval)
+
+    async def close(self) -> None:
+        tasks = list(self._pollers.values())
+        for key in list(self._pollers):
+            self._stop_poller(key)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class QuoteHub(PollingHub):
+    """Quote deltas per symbol, read through the quote caches."""
+
+    def __init__(self, fetch: Callable[[str], Awaitable[dict]] | None = None, interval: float | None = None):
+        super().__init__(interval or settings.MARKET_STREAM_POLL_INTERVAL)
+        self._fetch = fetch or service.get_quote
+        self._last: dict[str, dict] = {}
+
+    async def poll(self, symbol: str) -> dict | None:
+        quote = await self._fetch(symbol)
+        previous = self._last.get(symbol)
+        delta = quote_delta(previous, quote)
+        self._last[symbol] = quote
+        if not delta:
+            return None
+        return {"type": "snapshot" if previous is None else "delta", "symbol": symbol, "data": delta}
+
+    def snapshot(self, symbol: str) -> dict | None:
+        if symbol not in self._last:
+            return None
+        return {"type": "snapshot", "symbol": symbol, "data": _encode(self._last[symbol])}
+
+    def forget(self, symbol: str) -> None:
+        self._last.pop(symbol, None)
+
+
+# Candle channel: (symbol, timeframe, time_key) where time_key names the
+# provider field bar times are taken from, matching the client's snapshot
+# ("timestamp" for series served from the DB, "time" for direct fetches)
+CandleKey = tuple[str, str, str]
+
+
+def bar_payload(candle: dict, time_key: str) -> dict:
+    t = candle[time_key]
+    return {
+        "time": t.timestamp() if isinstance(t, datetime) else t,
+        "open": candle["open"],
+        "high": candle["high"],
+        "low": candle["low"],
+        "close": candle["close"],
+        "volume": candle["volume"],
+    }
+
+
+class CandleHub(PollingHub):
+    """
+    Forming-bar updates per (symbol, timeframe).
+
+    Each poll is an incremental fetch from the forming bar's timestamp
+    onwards (the same `start=` fetch `ingest_candles` uses), so it returns
+    the forming bar plus any bars opened since. Only bars whose values
+    changed are broadcast; a bar followed by a newer one has closed.
+    Messages are {"type": "bars", "symbol", "data": {time: bar}} so the
+    mailbox merges repeated updates of the same bar.
+    """
+
+    def __init__(self, fetch: Callable[..., Awaitable[list[dict]]] | None = None, interval: float | None = None):
+        super().__init__(interval or settings.MARKET_CANDLE_STREAM_INTERVAL)
+        self._fetch = fetch or afetch_candles
+        self._tail: dict[CandleKey, list[dict]] = {}
+
+    async def poll(self, key: CandleKey) -> dict | None:
+        symbol, timeframe, time_key = key
+        tail = self._tail.get(key)
+        if tail:
+            start = tail[-1]["timestamp"].replace(tzinfo=None)  # exchange-local; see provider.fetch_candles
+            candles = await self._fetch(symbol, timeframe, TAIL_PERIODS[timeframe], start=start)
+        else:
+            candles = (await self._fetch(symbol, timeframe, TAIL_PERIODS[timeframe]))[-2:]
+        if not candles:
+            return None
+
+        known = {c["timestamp"]: c for c in tail or ()}
+        changed = [c for c in candles if known.get(c["timestamp"]) != c]
+        self._tail[key] = candles[-2:]
+        if not changed:
+            return None
+        return self._message(symbol, changed, time_key)
+
+    def snapshot(self, key: CandleKey) -> dict | None:
+        tail = self._tail.get(key)
+        return self._message(key[0], tail, key[2]) if tail else None
+
+    def forget(self, key: CandleKey) -> None:
+        self._tail.pop(key, None)
+
+    @staticmethod
+    def _message(symbol: str, candles: list[dict], time_key: str) -> dict:
+        bars = (bar_payload(c, time_key) for c in candles)
+        return {"type": "bars", "symbol": symbol, "data": {str(b["time"]): b for b in bars}}
+
+
+def ordered_bars(message: dict) -> dict[str, Any]:
+    """Wire form of a coalesced "bars" message: bars as a list, oldest first."""
+    bars = sorted(message["data"].values(), key=lambda b: b["time"])
+    return {"type": "bars", "symbol": message["symbol"], "bars": bars}
+
+
+quote_hub = QuoteHub()
+candle_hub = CandleHub()
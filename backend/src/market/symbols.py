@@ -0,0 +1,106 @@
+"""Fast rejection of unknown symbols, before any upstream call.
+
+- `check_symbol` normalises a symbol and rejects it (`UnknownSymbol`) when
+  it cannot be a Yahoo ticker, or, when MARKET_SYMBOL_INDEX_PATH is set,
+  when it is neither in that index nor a registered asset.
+- `negative_cache` remembers lookups that came back empty or failed for
+  a reason other than the upstream itself (see
+  `provider.is_upstream_failure`), for MARKET_NEGATIVE_TTL seconds, so
+  typos and delisted tickers cost one upstream call per TTL rather than
+  one per request.
+
+The index file lists one symbol per line (e.g. an exchange listing
+export); anything after the first comma or whitespace, blank lines, lines
+starting with "#" and a "symbol" header are ignored.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from loguru import logger
+
+from src.core.config import settings
+from src.market.exceptions import UnknownSymbol
+from src.market.registry import asset_registry
+
+# Letters, digits and the separators Yahoo uses: BRK-B, BRK.B, EURUSD=X, ^GSPC, M&M.NS
+SYMBOL_PATTERN = re.compile(r"\^?[A-Z0-9][A-Z0-9.=&-]{0,24}")
+
+
+class NegativeCache:
+    """Bounded map of key -> reason with per-entry expiry."""
+
+    def __init__(self, ttl: float | None = None, maxsize: int | None = None):
+        self.ttl = ttl or settings.MARKET_NEGATIVE_TTL
+        self.maxsize = maxsize or settings.MARKET_NEGATIVE_CACHE_SIZE
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def add(self, key: str, reason: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, reason)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def read_symbol_index(path: str | Path) -> frozenset[str]:
+    symbols = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            symbol = re.split(r"[,\s]", line.strip(), maxsplit=1)[0].upper()
+            if symbol and not symbol.startswith("#") and symbol != "SYMBOL":
+                symbols.add(symbol)
+    return frozenset(symbols)
+
+
+class SymbolIndex:
+    """Optional allow-list of symbols, read from `path` on first use."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = path
+        self._symbols: frozenset[str] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def __contains__(self, symbol: str) -> bool:
+        if self._symbols is None:
+            self._symbols = read_symbol_index(self.path)
+            logger.info(f"Loaded {len(self._symbols)} symbols from {self.path}")
+        return symbol in self._symbols
+
+
+def check_symbol(symbol: str) -> str:
+    """Upper-cased `symbol`, or UnknownSymbol if it is malformed or missing from the index."""
+    symbol = symbol.strip().upper()
+    if not SYMBOL_PATTERN.fullmatch(symbol):
+        raise UnknownSymbol(symbol)
+    if symbol_index.enabled and symbol not in symbol_index and not asset_registry.contains(symbol):
+        raise UnknownSymbol(symbol)
+    return symbol
+
+
+negative_cache = NegativeCache()
+symbol_index = SymbolIndex(settings.MARKET_SYMBOL_INDEX_PATH)
@@ -0,0 +1,119 @@
+"""Binary candle encodings and Accept-header negotiation.
+
+Two binary layouts are offered on `/market/candles/{symbol}` besides JSON:
+
+``application/vnd.apache.arrow.stream``
+    Arrow IPC stream with one record batch; float64 columns
+    time/open/high/low/close and int64 volume. Needs the optional
+    `pyarrow` package.
+
+``application/vnd.marketpulse.candles+f64``
+    Packed little-endian float64, column-major: six consecutive planes of
+    `count` values each, in the order time, open, high, low, close, volume.
+    `count` is sent in the `X-Candle-Count` header, so plane i starts at
+    byte offset ``i * count * 8`` (e.g. ``new Float64Array(buf, i*count*8, count)``).
+    Volume is exact up to 2**53.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from starlette.responses import Response
+
+from src.market.series import CANDLE_FIELDS, Columns
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PACKED_F64 = "application/vnd.marketpulse.candles+f64"
+
+
+def _pa():
+    """Lazy optional import of pyarrow; None when it is not installed."""
+    try:
+        import pyarrow as pa
+        return pa
+    except ImportError:
+        return None
+
+
+def offered_media_types() -> list[str]:
+    offered = [JSON, PACKED_F64]
+    if _pa() is not None:
+        offered.append(ARROW_STREAM)
+    return offered
+
+
+def negotiate(accept: str | None, offered: list[str]) -> str:
+    """
+    Pick the offered media type the client prefers most (by q-value, then
+    header order). Falls back to the first offered type.
+    """
+    if not accept:
+        return offered[0]
+    prefs = []
+    for i, part in enumerate(accept.split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            prefs.append((-q, i, media.lower()))
+    for _, _, media in sorted(prefs):
+        if media in offered:
+            return media
+        if media in ("*/*", "application/*"):
+            return offered[0]
+    return offered[0]
+
+
+def encode_packed(cols: Columns) -> memoryview:
+    """Pack columns into one column-major little-endian float64 buffer."""
+    n = cols["time"].shape[0]
+    buf = np.empty((len(CANDLE_FIELDS), n), dtype="<f8")
+    for i, k in enumerate(CANDLE_FIELDS):
+        buf[i] = cols[k]
+    return memoryview(buf).cast("B")
+
+
+def decode_packed(data: bytes | memoryview, count: int) -> Columns:
+    """Inverse of `encode_packed` (views into `data`, no copy except volume)."""
+    planes = np.frombuffer(data, dtype="<f8").reshape(len(CANDLE_FIELDS), count)
+    cols = dict(zip(CANDLE_FIELDS, planes))
+    cols["volume"] = cols["volume"].astype(np.int64)
+    return cols
+
+
+def encode_arrow(cols: Columns) -> memoryview:
+    """Serialise columns as an Arrow IPC stream; NumPy buffers are wrapped, not copied."""
+    pa = _pa()
+    batch = pa.record_batch([pa.array(cols[k]) for k in CANDLE_FIELDS], names=list(CANDLE_FIELDS))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return memoryview(sink.getvalue())
+
+
+class BinaryResponse(Response):
+    """Response whose body is sent from a buffer without an intermediate bytes copy."""
+
+    def render(self, content: bytes | memoryview) -> bytes | memoryview:
+        return content
+
+
+def binary_candles_response(media_type: str, cols: Columns, symbol: str, timeframe: str) -> BinaryResponse:
+    body = encode_arrow(cols) if media_type == ARROW_STREAM else encode_packed(cols)
+    return BinaryResponse(
+        content=body,
+        media_type=media_type,
+        headers={
+            "X-Symbol": symbol,
+            "X-Timeframe": timeframe,
+            "X-Candle-Count": str(cols["time"].shape[0]),
+            "X-Candle-Fields": ",".join(CANDLE_FIELDS),
+            "Vary": "Accept",
+        },
+    )
@@ -0,0 +1,155 @@
+"""Rate limiting and circuit breaking for upstream provider calls.
+
+Every call the async provider facade makes (see `provider._call_upstream`)
+first asks `upstream_breaker` whether the upstream is usable, then takes
+tokens from `upstream_limiter`:
+
+- TokenBucket: MARKET_UPSTREAM_RATE calls per second with bursts of up to
+  MARKET_UPSTREAM_BURST. Callers queue for tokens in arrival order; one
+  that would wait longer than MARKET_UPSTREAM_MAX_WAIT is rejected
+  (`Throttled`) instead of piling onto the queue.
+- CircuitBreaker: opens after MARKET_BREAKER_THRESHOLD consecutive
+  upstream failures and rejects calls (`CircuitOpen`) for
+  MARKET_BREAKER_COOLDOWN seconds, then lets a single probe call through.
+  A successful probe closes it, a failed one re-opens it.
+
+Both are per process and not thread-safe; use them from the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from loguru import logger
+
+from src.core.config import settings
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The call was not sent upstream."""
+
+
+class Throttled(UpstreamUnavailable):
+    """Rejected by the rate limiter: the wait for a token would exceed its maximum."""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Rejected by the circuit breaker while the upstream is failing."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, max_wait: float):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._acquired = 0
+        self._waited = 0
+        self._wait_seconds = 0.0
+        self._max_waited = 0.0
+        self._rejected = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, cost: int = 1) -> float:
+        """
+        Wait until `cost` tokens are available and take them; returns the
+        seconds waited. Tokens are reserved before waiting, so the balance
+        can go negative and later callers queue behind earlier ones.
+        """
+        self._refill()
+        cost = min(cost, self.burst)  # a batch larger than the bucket still gets through
+        wait = max(0.0, (cost - self._tokens) / self.rate)
+        if wait > self.max_wait:
+            self._rejected += 1
+            raise Throttled(f"Upstream rate limit: would wait {wait:.1f}s")
+        self._tokens -= cost
+        self._acquired += 1
+        if wait > 0:
+            self._waited += 1
+            self._wait_seconds += wait
+            self._max_waited = max(self._max_waited, wait)
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 3),
+            "acquired": self._acquired,
+            "waited": self._waited,
+            "wait_seconds": round(self._wait_seconds, 3),
+            "max_wait_seconds": round(self._max_waited, 3),
+            "rejected": self._rejected,
+        }
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"  # closed | open | half_open
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+        self._opened = 0
+        self._rejected = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.state == "closed"
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now. Counts rejections."""
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        # Once the cooldown has passed let one probe through; if a probe never
+        # reports back (e.g. rejected locally), let another through a cooldown later
+        since = now - (self._opened_at if self.state == "open" else self._probe_at)
+        if since >= self.cooldown:
+            self.state = "half_open"
+            self._probe_at = now
+            return True
+        self._rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != "closed":
+            logger.info("Upstream circuit closed")
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self._failures >= self.threshold):
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._opened += 1
+            logger.warning(f"Upstream circuit open for {self.cooldown:.0f}s after {self._failures} failures")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self._opened,
+            "rejected": self._rejected,
+        }
+
+
+upstream_limiter = TokenBucket(
+    rate=settings.MARKET_UPSTREAM_RATE,
+    burst=settings.MARKET_UPSTREAM_BURST,
+    max_wait=settings.MARKET_UPSTREAM_MAX_WAIT,
+)
+upstream_breaker = CircuitBreaker(
+    threshold=settings.MARKET_BREAKER_THRESHOLD,
+    cooldown=settings.MARKET_BREAKER_COOLDOWN,
+)
@@ -10,5 +10,5 @@ from src.blog.models import (  # noqa: F401
     Share,
     Tag,
 )
-from src.market.models import Asset, Candle  # noqa: F401
+from src.market.models import Asset, Candle, CandleSeries, SymbolMetadata  # noqa: F401
 from src.ai.models import ChatConversation, ChatMessage  # noqa: F401
\ No newline at end of file
@@ -61,4 +61,4 @@ class TestAgentCreation:
         assert "llm" in result
         assert "prompt" in result
         assert "tools" in result
-        assert len(result["tools"]) == 3
+        assert len(result["tools"]) == 4
@@ -0,0 +1,101 @@
+"""Tests for blog post-list conditional GETs and API cache headers."""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import Response
+from sqlalchemy.dialects import postgresql
+
+from src.blog import router as blog_router
+from src.blog import service
+from src.core.http_cache import NO_STORE, PRIVATE_REVALIDATE, REVALIDATE, make_etag
+from src.core.pagination import PaginationParams
+
+UPDATED = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+RELATED = (UPDATED, 3, UPDATED, 7, UPDATED, 12, UPDATED)
+
+
+async def _call_list_posts(count=2, related=RELATED, status="published", if_none_match=None):
+    request = MagicMock(headers={"if-none-match": if_none_match} if if_none_match else {})
+    response = Response()
+    with patch.object(blog_router.service, "latest_post_update", AsyncMock(return_value=(count, UPDATED, related))), \
+         patch.object(blog_router.service, "list_posts", AsyncMock(return_value=([], count))) as mock_list:
+        result = await blog_router.list_posts(
+            request, response, AsyncMock(), PaginationParams(page=1, per_page=20),
+            category=None, tag=None, status=status,
+        )
+    return result, response, mock_list
+
+
+class TestPostListETag:
+    @pytest.mark.asyncio
+    async def test_etag_follows_posts_and_embedded_data(self):
+        _, response, _ = await _call_list_posts()
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        assert response.headers["last-modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+
+        _, more_posts, _ = await _call_list_posts(count=3)
+        renamed_tag = (*RELATED[:4], UPDATED + timedelta(seconds=1), *RELATED[5:])
+        _, retagged, _ = await _call_list_posts(related=renamed_tag)
+        assert len({etag, more_posts.headers["etag"], retagged.headers["etag"]}) == 3
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_gets_304_without_listing(self):
+        _, response, _ = await _call_list_posts()
+        result, _, mock_list = await _call_list_posts(if_none_match=response.headers["etag"])
+        assert result.status_code == 304
+        assert result.headers["etag"] == response.headers["etag"]
+        mock_list.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_only_published_listings_are_public(self):
+        _, published, _ = await _call_list_posts()
+        _, drafts, _ = await _call_list_posts(status="draft")
+        assert published.headers["cache-control"] == REVALIDATE
+        assert drafts.headers["cache-control"] == PRIVATE_REVALIDATE
+        result, _, _ = await _call_list_posts(status="draft", if_none_match=drafts.headers["etag"])
+        assert result.headers["cache-control"] == PRIVATE_REVALIDATE
+
+    @pytest.mark.asyncio
+    async def test_latest_post_update_reads_embedded_tables(self):
+        newer = UPDATED + timedelta(days=1)
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(one=lambda: (2, UPDATED, newer, 3, None, 7, UPDATED, 12, UPDATED))
+        count, last_modified, related = await service.latest_post_update(db, tag_slug="python")
+        assert (count, last_modified) == (2, newer)
+        assert related == (newer, 3, None, 7, UPDATED, 12, UPDATED)
+        db.execute.assert_awaited_once()
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        for table in ("users", "categories", "tags", "post_tags"):
+            assert f"FROM {table}" in sql
+
+
+class TestSecurityHeaders:
+    @staticmethod
+    async def _through_middleware(path: str, response: Response) -> Response:
+        from src.main import add_security_headers
+        request = MagicMock()
+        request.url.path = path
+        return await add_security_headers(request, AsyncMock(return_value=response))
+
+    @pytest.mark.asyncio
+    async def test_api_defaults_to_no_store(self):
+        response = await self._through_middleware("/api/v1/posts/", Response())
+        assert response.headers["cache-control"] == NO_STORE
+        assert response.headers["x-content-type-options"] == "nosniff"
+
+    @pytest.mark.asyncio
+    async def test_endpoint_cache_policy_kept(self):
+        etag = make_etag("posts")
+        response = await self._through_middleware(
+            "/api/v1/posts/", Response(headers={"Cache-Control": REVALIDATE, "ETag": etag}),
+        )
+        assert response.headers["cache-control"] == REVALIDATE
+        assert response.headers["etag"] == etag
+
+    @pytest.mark.asyncio
+    async def test_non_api_paths_untouched(self):
+        response = await self._through_middleware("/static/app.js", Response())
+        assert "cache-control" not in response.headers
@@ -1,5 +1,7 @@
 """Tests for the market data provider and tools."""
 
+import threading
+
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -29,6 +31,1884 @@ class TestProviderValidation:
             fetch_candles("AAPL", period="2mo")
 
 
+# ═══════════════════════════════════════════════════════════
+#  DataFrame -> candle conversion
+# ═══════════════════════════════════════════════════════════
+
+from src.market.provider import fetch_candles, frame_to_candles
+
+
+def _frame(rows: int = 50, tz: str | None = "America/New_York"):
+    pd = pytest.importorskip("pandas")
+    import numpy as np
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2024-01-02 09:30", periods=rows, freq="min", tz=tz)
+    return pd.DataFrame(
+        {
+            "Open": rng.random(rows) * 100, "High": rng.random(rows) * 100,
+            "Low": rng.random(rows) * 100, "Close": rng.random(rows) * 100,
+            "Volume": rng.integers(0, 10**6, rows),
+        },
+        index=index,
+    )
+
+
+def _iterrows_reference(df) -> list[dict]:
+    return [
+        {
+            "time": ts.timestamp(),
+            "timestamp": ts.to_pydatetime().replace(tzinfo=timezone.utc),
+            "open": round(row["Open"], 4), "high": round(row["High"], 4),
+            "low": round(row["Low"], 4), "close": round(row["Close"], 4),
+            "volume": int(row.get("Volume", 0)),
+        }
+        for ts, row in df.iterrows()
+    ]
+
+
+class TestFrameToCandles:
+    def test_matches_iterrows_tz_aware(self):
+        df = _frame()
+        assert frame_to_candles(df) == _iterrows_reference(df)
+
+    def test_matches_iterrows_naive(self):
+        df = _frame(tz=None)
+        assert frame_to_candles(df) == _iterrows_reference(df)
+
+    def test_drops_nan_prices_and_fills_volume(self):
+        df = _frame(5)
+        df.iloc[1, df.columns.get_loc("Close")] = float("nan")
+        df["Volume"] = df["Volume"].astype(float)
+        df.iloc[2, df.columns.get_loc("Volume")] = float("nan")
+        candles = frame_to_candles(df)
+        assert len(candles) == 4
+        assert candles[1]["volume"] == 0
+        assert isinstance(candles[0]["volume"], int)
+
+    def test_since_filters_on_stored_timestamp(self):
+        df = _frame(10)
+        since = _iterrows_reference(df)[6]["timestamp"]
+        candles = frame_to_candles(df, since=since)
+        assert [c["timestamp"] for c in candles] == [r["timestamp"] for r in _iterrows_reference(df)[6:]]
+
+    def test_incremental_fetch_starts_at_stored_bar_east_of_utc(self):
+        df = _frame(10, tz="Asia/Tokyo")
+        stored = frame_to_candles(df)[6]["timestamp"]  # 09:36 Tokyo, tagged UTC
+
+        def history(start, interval):
+            # yfinance: naive start is exchange-local, aware start is converted to it
+            start = start.tz_convert(df.index.tz) if start.tzinfo else start.tz_localize(df.index.tz)
+            return df[df.index >= start]
+
+        import pandas as pd
+        ticker = MagicMock(history=lambda start, interval: history(pd.Timestamp(start), interval))
+        with patch("src.market.provider._yf", return_value=MagicMock(Ticker=lambda s: ticker)):
+            candles = fetch_candles("7203.T", "1m", start=stored)
+        assert [c["timestamp"] for c in candles] == [c["timestamp"] for c in frame_to_candles(df)[6:]]
+
+
+# ═══════════════════════════════════════════════════════════
+#  Async provider facade tests
+# ═══════════════════════════════════════════════════════════
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from src.market import provider
+
+
+class TestProviderExecutor:
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        await provider.run_in_provider(time.sleep, 0.1)
+        task.cancel()
+        assert ticks > 5  # loop kept spinning while the blocking call ran
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        with pytest.raises(TimeoutError):
+            await provider.run_in_provider(time.sleep, 0.2, timeout=0.01)
+
+    @pytest.mark.asyncio
+    async def test_queue_full_rejected(self):
+        with patch.object(provider.settings, "MARKET_PROVIDER_MAX_PENDING", 0):
+            with pytest.raises(provider.ProviderBusy):
+                await provider.run_in_provider(time.sleep, 0)
+
+    @pytest.mark.asyncio
+    async def test_afetch_quote_timeout_returns_none(self):
+        with patch("src.market.provider.fetch_quote", side_effect=lambda s, **_: time.sleep(0.2)), \
+             patch.object(provider.settings, "MARKET_PROVIDER_TIMEOUT", 0.01):
+            assert await provider.afetch_quote("AAPL") is None
+
+    @pytest.mark.asyncio
+    async def test_stats_report_queue_depth(self):
+        stats = provider.provider_stats()
+        assert stats["workers"] == provider.settings.MARKET_PROVIDER_WORKERS
+        assert stats["running"] >= 0
+        assert stats["queued"] >= 0
+
+
+# ═══════════════════════════════════════════════════════════
+#  Quote cache tests
+# ═══════════════════════════════════════════════════════════
+
+from src.market.cache import TTLCache
+
+
+class TestTTLCache:
+    @pytest.mark.asyncio
+    async def test_fresh_hit_skips_loader(self):
+        cache = TTLCache(ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return {"price": 1}
+
+        await cache.get_or_load("AAPL", loader)
+        await cache.get_or_load("AAPL", loader)
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesce(self):
+        cache = TTLCache(ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"price": 1}
+
+        results = await asyncio.gather(*(cache.get_or_load("AAPL", loader) for _ in range(20)))
+        assert calls == 1
+        assert all(r == {"price": 1} for r in results)
+
+    @pytest.mark.asyncio
+    async def test_stale_served_while_revalidating(self):
+        cache = TTLCache(ttl=0, stale_ttl=60)
+        cache.set("AAPL", {"price": 1})
+
+        async def loader():
+            return {"price": 2}
+
+        assert await cache.get_or_load("AAPL", loader) == {"price": 1}
+        await asyncio.sleep(0)  # let the background refresh finish
+        assert cache.peek("AAPL") == {"price": 2}
+
+    @pytest.mark.asyncio
+    async def test_none_not_cached(self):
+        cache = TTLCache(ttl=60)
+
+        async def loader():
+            return None
+
+        assert await cache.get_or_load("FAKE", loader) is None
+        assert len(cache) == 0
+
+    def test_maxsize_evicts_oldest(self):
+        cache = TTLCache(ttl=60, maxsize=2)
+        for sym in ("A", "B", "C"):
+            cache.set(sym, sym)
+        assert cache.peek("A") is None
+        assert cache.peek("C") == "C"
+
+
+# ═══════════════════════════════════════════════════════════
+#  Batch quote tests
+# ═══════════════════════════════════════════════════════════
+
+from src.market import service
+from src.market.cache import quote_cache
+from src.market.cache import SharedCache
+from src.market.exceptions import InvalidSymbols
+
+
+def _quote(symbol: str, price: float = 100.0) -> dict:
+    return {
+        "symbol": symbol, "name": symbol, "price": price, "change": 1.0,
+        "change_percent": 1.0, "volume": 10, "market_cap": None,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+class TestBatchQuotes:
+    def test_fetch_quotes_partial(self):
+        with patch("src.market.provider.fetch_quote", side_effect=lambda s, **_: None if s == "FAKE" else _quote(s)):
+            result = provider.fetch_quotes(["aapl", "FAKE", "AAPL"])
+        assert list(result) == ["AAPL", "FAKE"]
+        assert result["AAPL"]["symbol"] == "AAPL"
+        assert result["FAKE"] is None
+
+    @pytest.mark.asyncio
+    async def test_afetch_quotes_split_over_provider_pool(self):
+        calls, threads = [], set()
+
+        def fetch_quotes(symbols):
+            calls.append(symbols)
+            threads.add(threading.current_thread().name)
+            if "FAIL" in symbols:
+                raise ConnectionError("throttled")
+            return {s: _quote(s) for s in symbols}
+
+        provider.set_provider(MagicMock(fetch_quotes=fetch_quotes))
+        try:
+            with patch.object(provider.settings, "MARKET_PROVIDER_WORKERS", 2):
+                result = await provider.afetch_quotes(["A", "B", "C", "FAIL", "E"])
+        finally:
+            provider.set_provider(None)
+        assert sorted(calls) == [["A", "B", "C"], ["FAIL", "E"]]
+        assert all(name.startswith("market-provider") for name in threads)
+        assert [s for s, q in result.items() if q] == ["A", "B", "C"] and list(result) == ["A", "B", "C", "FAIL", "E"]
+
+    @pytest.mark.asyncio
+    async def test_get_quotes_uses_cache_and_one_batch(self):
+        quote_cache.invalidate()
+        quote_cache.set("AAPL", _quote("AAPL"))
+        with patch("src.market.service.afetch_quotes") as mock_batch, \
+             patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: None)):
+            mock_batch.return_value = {"MSFT": _quote("MSFT"), "FAKE": None}
+            quotes, errors = await service.get_quotes(["aapl", "msft", "fake"])
+        mock_batch.assert_called_once_with(["MSFT", "FAKE"])
+        assert [q["symbol"] for q in quotes] == ["AAPL", "MSFT"]
+        assert errors == {"FAKE": "Quote unavailable"}
+        assert quote_cache.get("MSFT") is not None
+        quote_cache.invalidate()
+
+    @pytest.mark.asyncio
+    async def test_get_quotes_validates(self):
+        with pytest.raises(InvalidSymbols):
+            await service.get_quotes([" ", ""])
+        with pytest.raises(InvalidSymbols):
+            await service.get_quotes([f"S{i}" for i in range(service.settings.MARKET_MAX_BATCH_SYMBOLS + 1)])
+
+
+# ═══════════════════════════════════════════════════════════
+#  Replay provider
+# ═══════════════════════════════════════════════════════════
+
+from src.market.replay import ReplayError, ReplayProvider, fixture_path, write_fixture
+
+
+def _replay_dir(tmp_path, days: int = 400):
+    start = datetime(2024, 1, 1, 16, tzinfo=timezone.utc)
+    candles = [
+        {"time": (start + timedelta(days=d)).timestamp() + 4 * 3600, "timestamp": start + timedelta(days=d),
+         "open": 100.0 + d, "high": 101.0 + d, "low": 99.0 + d, "close": 100.0 + d, "volume": 1000 + d}
+        for d in range(days)
+    ]
+    write_fixture(fixture_path(tmp_path, "AAPL", "1d"), candles)
+    return tmp_path, candles
+
+
+class TestReplayProvider:
+    def test_serves_fixture_by_period_and_start(self, tmp_path):
+        directory, candles = _replay_dir(tmp_path)
+        replay = ReplayProvider(directory)
+        year = replay.fetch_candles("aapl", "1d", "1y")
+        assert year[-1] == candles[-1]
+        assert year[0]["timestamp"] >= candles[-1]["timestamp"] - timedelta(days=366)
+        assert len(replay.fetch_candles("AAPL", "1d", "max")) == len(candles)
+        since = replay.fetch_candles("AAPL", "1d", start=candles[-3]["timestamp"])
+        assert since == candles[-3:]
+        assert replay.fetch_candles("MSFT", "1d") == []
+
+    def test_quote_from_last_daily_bars(self, tmp_path):
+        directory, candles = _replay_dir(tmp_path)
+        quote = ReplayProvider(directory).fetch_quote("aapl")
+        assert quote["symbol"] == "AAPL"
+        assert quote["price"] == candles[-1]["close"]
+        assert quote["change"] == 1.0
+        assert quote["volume"] == candles[-1]["volume"]
+        assert ReplayProvider(directory).fetch_quotes(["AAPL", "MSFT"])["MSFT"] is None
+        assert ReplayProvider(directory).fetch_quote("MSFT") is None
+
+    def test_error_injection_is_deterministic(self, tmp_path):
+        directory, _ = _replay_dir(tmp_path, days=5)
+
+        def outcomes(seed):
+            replay = ReplayProvider(directory, error_rate=0.5, seed=seed)
+            failed = []
+            for _ in range(40):
+                try:
+                    failed.append(replay.fetch_quote("AAPL") is None)
+                except ReplayError:
+                    failed.append(True)
+            return failed
+
+        assert outcomes(7) == outcomes(7)
+        assert 0 < sum(outcomes(7)) < 40
+        with pytest.raises(ReplayError):
+            ReplayProvider(directory, error_rate=1.0).fetch_candles("AAPL")
+
+    def test_latency(self, tmp_path):
+        directory, _ = _replay_dir(tmp_path, days=5)
+        t0 = time.perf_counter()
+        ReplayProvider(directory, latency=0.05).fetch_candles("AAPL")
+        assert time.perf_counter() - t0 >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_async_facade_uses_installed_provider(self, tmp_path):
+        directory, candles = _replay_dir(tmp_path, days=5)
+        provider.set_provider(ReplayProvider(directory))
+        try:
+            assert provider.get_provider().name == "replay"
+            assert await provider.afetch_candles("AAPL", "1d", "max") == candles
+            assert (await provider.afetch_quote("AAPL"))["price"] == candles[-1]["close"]
+        finally:
+            provider.set_provider(None)
+        with patch.object(provider.settings, "MARKET_PROVIDER", "yfinance"):
+            assert provider.get_provider().name == "yfinance"
+        provider.set_provider(None)
+
+    @pytest.mark.asyncio
+    async def test_throughput_benchmark_runs_offline(self):
+        from benchmarks.market_throughput import run
+
+        results = await run(None, symbols=3, days=30, requests=20, concurrency=4, latency=0.0, error_rate=0.0)
+        assert set(results) == {"get_candles cold", "get_candles warm", "get_quote cold", "get_quote warm"}
+        assert all(r["errors"] == 0 and r["rps"] > 0 for r in results.values())
+        assert provider.get_provider().name != "replay"
+        provider.set_provider(None)
+
+
+# ═══════════════════════════════════════════════════════════
+#  Upstream rate limiter and circuit breaker
+# ═══════════════════════════════════════════════════════════
+
+from unittest.mock import AsyncMock
+
+from src.market.upstream import CircuitBreaker, CircuitOpen, Throttled, TokenBucket
+
+
+class TestUpstreamGuards:
+    @pytest.mark.asyncio
+    async def test_bucket_waits_then_rejects(self):
+        bucket = TokenBucket(rate=100, burst=2, max_wait=0.015)
+        assert await bucket.acquire() == 0 and await bucket.acquire() == 0
+        assert await bucket.acquire() > 0  # bucket empty: waits ~10ms for a token
+        with pytest.raises(Throttled):
+            await bucket.acquire(cost=2)  # would wait ~20ms
+        stats = bucket.stats()
+        assert stats["acquired"] == 3 and stats["waited"] == 1 and stats["rejected"] == 1
+
+    def test_breaker_opens_probes_and_closes(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open" and not breaker.allow()
+        time.sleep(0.06)
+        assert breaker.allow() and breaker.state == "half_open"
+        assert not breaker.allow()  # one probe at a time
+        breaker.record_failure()
+        assert breaker.state == "open"
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.closed and breaker.stats()["opened"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_open_circuit_and_skip_provider(self, tmp_path):
+        directory, _ = _replay_dir(tmp_path, days=5)
+        replay = ReplayProvider(directory, error_rate=1.0)
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        provider.set_provider(replay)
+        try:
+            with patch("src.market.provider.upstream_breaker", breaker):
+                assert await provider.afetch_quote("AAPL") is None
+                assert await provider.afetch_quotes(["AAPL"]) == {"AAPL": None}
+                assert breaker.state == "open"
+                with patch.object(replay, "fetch_candles") as mock_fetch, pytest.raises(CircuitOpen):
+                    await provider.afetch_candles("AAPL")
+                mock_fetch.assert_not_called()
+        finally:
+            provider.set_provider(None)
+
+    @pytest.mark.asyncio
+    async def test_stale_quote_served_while_open(self):
+        quote_cache.invalidate()
+        quote_cache.set("AAPL", _quote("AAPL"))
+        quote_cache._entries["AAPL"] = (0.0, quote_cache.peek("AAPL"))  # long expired
+        breaker = CircuitBreaker(threshold=1, cooldown=60)
+        breaker.record_failure()
+        with patch("src.market.service.upstream_breaker", breaker), \
+             patch("src.market.service.afetch_quote", AsyncMock(side_effect=CircuitOpen("open"))), \
+             patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: None)):
+            assert (await service.get_quote("aapl"))["symbol"] == "AAPL"
+            quotes, errors = await service.get_quotes(["AAPL", "MSFT"])
+        assert [q["symbol"] for q in quotes] == ["AAPL"] and list(errors) == ["MSFT"]
+        quote_cache.invalidate()
+
+
+# ═══════════════════════════════════════════════════════════
+#  Symbol metadata
+# ═══════════════════════════════════════════════════════════
+
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from types import SimpleNamespace
+
+from src.market.metadata import MetadataStore
+
+
+def _metadata_db(row=None):
+    db = MagicMock()
+    db.get = AsyncMock(return_value=row)
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+
+    @asynccontextmanager
+    async def factory():
+        yield db
+    return db, factory
+
+
+def _metadata_row(age: timedelta):
+    return SimpleNamespace(
+        symbol="AAPL", name="Apple Inc.", exchange="NMS", currency="USD", market_cap=3e12,
+        refreshed_at=datetime.now(timezone.utc) - age,
+    )
+
+
+class TestSymbolMetadata:
+    def test_quote_skips_ticker_info(self):
+        ticker = MagicMock()
+        ticker.fast_info = {"lastPrice": 110.0, "previousClose": 100.0, "lastVolume": 5}
+        type(ticker).info = property(lambda self: pytest.fail("quote fetched ticker.info"))
+        with patch("src.market.provider._yf") as yf:
+            yf.return_value.Ticker.return_value = ticker
+            quote = provider.fetch_quote("aapl")
+        assert quote["price"] == 110.0 and quote["change_percent"] == 10.0
+        assert quote["name"] == "AAPL" and quote["market_cap"] is None
+
+    @pytest.mark.asyncio
+    async def test_fresh_row_served_without_upstream(self):
+        db, factory = _metadata_db(_metadata_row(timedelta(days=1)))
+        store = MetadataStore(session_factory=factory)
+        with patch("src.market.metadata.afetch_metadata", AsyncMock()) as mock_fetch:
+            assert (await store.get("aapl"))["name"] == "Apple Inc."
+            await store.get("AAPL")
+        mock_fetch.assert_not_called()
+        db.get.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_row_refetched_and_stored(self):
+        db, factory = _metadata_db(_metadata_row(timedelta(days=30)))
+        store = MetadataStore(session_factory=factory)
+        meta = {"symbol": "AAPL", "name": "Apple", "exchange": "NMS", "currency": "USD", "market_cap": 4e12}
+        with patch("src.market.metadata.afetch_metadata", AsyncMock(return_value=meta)):
+            assert (await store.get("AAPL"))["market_cap"] == 4e12
+        db.execute.assert_awaited_once()
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_upstream_failure_falls_back(self):
+        failing = AsyncMock(side_effect=ConnectionError("throttled"))
+        _, stale = _metadata_db(_metadata_row(timedelta(days=30)))
+        _, empty = _metadata_db(None)
+        with patch("src.market.metadata.afetch_metadata", failing):
+            assert (await MetadataStore(session_factory=stale).get("AAPL"))["name"] == "Apple Inc."
+            assert await MetadataStore(session_factory=empty).get("ZZZZ") == {"symbol": "ZZZZ"}
+
+    @pytest.mark.asyncio
+    async def test_quote_gets_name_from_metadata(self):
+        quote_cache.invalidate()
+        store = MagicMock(get=AsyncMock(return_value={"symbol": "AAPL", "name": "Apple Inc.", "market_cap": 3e12}))
+        with patch("src.market.service.metadata_store", store), \
+             patch("src.market.service.afetch_quote", AsyncMock(return_value=_quote("AAPL"))), \
+             patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: None)):
+            quote = await service.get_quote("AAPL")
+        assert quote["name"] == "Apple Inc." and quote["market_cap"] == 3e12
+        quote_cache.invalidate()
+
+    def test_replay_metadata_fixture(self, tmp_path):
+        (tmp_path / "metadata.csv").write_text("symbol,name,exchange,currency,market_cap\nAAPL,Apple Inc.,NMS,USD,\n")
+        replay = ReplayProvider(tmp_path)
+        assert replay.fetch_metadata("aapl") == {
+            "symbol": "AAPL", "name": "Apple Inc.", "exchange": "NMS", "currency": "USD", "market_cap": None,
+        }
+        assert replay.fetch_metadata("MSFT") is None
+
+
+# ═══════════════════════════════════════════════════════════
+#  Incremental candle ingestion tests
+# ═══════════════════════════════════════════════════════════
+
+import uuid
+from datetime import timedelta
+from unittest.mock import ANY, AsyncMock
+
+from sqlalchemy.dialects import postgresql
+
+
+def _candle(ts: datetime, close: float = 1.0) -> dict:
+    return {"time": ts.timestamp(), "timestamp": ts, "open": close, "high": close,
+            "low": close, "close": close, "volume": 1}
+
+
+class TestCandleIngestion:
+    def test_upsert_uses_on_conflict(self):
+        now = datetime.now(timezone.utc)
+        stmt = service._upsert_candles_stmt(uuid.uuid4(), "1d", [_candle(now)])
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (asset_id, timeframe, timestamp) DO UPDATE" in sql
+
+    def test_is_stale(self):
+        now = datetime.now(timezone.utc)
+        assert not service.is_stale(now - timedelta(seconds=30), "1m", now)
+        assert service.is_stale(now - timedelta(seconds=61), "1m", now)
+        # Daily bars are capped at MARKET_CANDLE_MAX_STALENESS, not a full day
+        assert service.is_stale(now - timedelta(hours=1), "1d", now)
+        # Series migrated without a recorded refresh
+        assert service.is_stale(None, "1d", now)
+
+    @pytest.mark.asyncio
+    async def test_ingest_fetches_only_from_latest(self):
+        now = datetime.now(timezone.utc)
+        latest_ts = now - timedelta(days=2)
+        asset = MagicMock(id=uuid.uuid4(), symbol="AAPL")
+        db = AsyncMock()
+        fresh = [_candle(latest_ts), _candle(latest_ts + timedelta(days=1))]
+        with patch("src.market.service.latest_candle", AsyncMock(return_value=(latest_ts, now - timedelta(hours=1), None))), \
+             patch("src.market.service.earliest_candle_time", AsyncMock(return_value=latest_ts - timedelta(days=4000))), \
+             patch("src.market.service.afetch_candles", AsyncMock(return_value=fresh)) as mock_fetch, \
+             patch("src.market.service.upsert_candles", AsyncMock()) as mock_upsert:
+            written = await service.ingest_candles(db, asset, "1d", "max")
+        mock_fetch.assert_awaited_once_with("AAPL", "1d", "max", start=latest_ts.replace(tzinfo=None))
+        mock_upsert.assert_awaited_once_with(db, asset.id, "1d", fresh, full_period=None)
+        db.commit.assert_awaited_once()
+        assert written == fresh
+
+    @pytest.mark.asyncio
+    async def test_ingest_skips_when_fresh(self):
+        now = datetime.now(timezone.utc)
+        asset = MagicMock(id=uuid.uuid4(), symbol="AAPL")
+        with patch("src.market.service.latest_candle", AsyncMock(return_value=(now, now, None))), \
+             patch("src.market.service.earliest_candle_time", AsyncMock(return_value=now - timedelta(days=400))), \
+             patch("src.market.service.afetch_candles", AsyncMock()) as mock_fetch:
+            assert await service.ingest_candles(AsyncMock(), asset, "1d") == []
+        mock_fetch.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_ingest_backfills_fresh_series_shorter_than_period(self):
+        # The refresher keeps 1d fresh at "1y"; a 5y request must still backfill
+        now = datetime.now(timezone.utc)
+        asset = MagicMock(id=uuid.uuid4(), symbol="AAPL")
+        with patch("src.market.service.latest_candle", AsyncMock(return_value=(now, now, "1y"))), \
+             patch("src.market.service.earliest_candle_time", AsyncMock(return_value=now - timedelta(days=366))), \
+             patch("src.market.service.afetch_candles", AsyncMock(return_value=[_candle(now)])) as mock_fetch, \
+             patch("src.market.service.upsert_candles", AsyncMock()) as mock_upsert:
+            await service.ingest_candles(AsyncMock(), asset, "1d", "5y")
+        mock_fetch.assert_awaited_once_with("AAPL", "1d", "5y", start=None)
+        assert mock_upsert.await_args.kwargs == {"full_period": "5y"}
+
+
+    @pytest.mark.asyncio
+    async def test_ingest_backfills_when_period_not_covered(self):
+        now = datetime.now(timezone.utc)
+        asset = MagicMock(id=uuid.uuid4(), symbol="AAPL")
+        with patch("src.market.service.latest_candle", AsyncMock(return_value=(now, now - timedelta(hours=1), None))), \
+             patch("src.market.service.earliest_candle_time", AsyncMock(return_value=now - timedelta(days=180))), \
+             patch("src.market.service.afetch_candles", AsyncMock(return_value=[_candle(now)])) as mock_fetch, \
+             patch("src.market.service.upsert_candles", AsyncMock()) as mock_upsert:
+            await service.ingest_candles(AsyncMock(), asset, "1d", "5y")
+        mock_fetch.assert_awaited_once_with("AAPL", "1d", "5y", start=None)
+        assert mock_upsert.await_args.kwargs == {"full_period": "5y"}  # recorded as fetched in full
+
+    @pytest.mark.asyncio
+    async def test_ingest_tops_up_series_shorter_than_period(self):
+        # A young listing fetched in full for "max" has only 180 days; that is all there is
+        now = datetime.now(timezone.utc)
+        asset = MagicMock(id=uuid.uuid4(), symbol="ETH-USD")
+        with patch("src.market.service.latest_candle", AsyncMock(return_value=(now, now - timedelta(hours=1), "max"))), \
+             patch("src.market.service.earliest_candle_time", AsyncMock(return_value=now - timedelta(days=180))), \
+             patch("src.market.service.afetch_candles", AsyncMock(return_value=[_candle(now)])) as mock_fetch, \
+             patch("src.market.service.upsert_candles", AsyncMock()) as mock_upsert:
+            await service.ingest_candles(AsyncMock(), asset, "1d", "max")
+        mock_fetch.assert_awaited_once_with("ETH-USD", "1d", "max", start=now.replace(tzinfo=None))
+        assert mock_upsert.await_args.kwargs == {"full_period": None}
+
+
+# ═══════════════════════════════════════════════════════════
+#  Period-sliced candle reads
+# ═══════════════════════════════════════════════════════════
+
+from src.market.exceptions import InvalidPeriod
+
+
+class TestCandleReads:
+    def test_covers_period(self):
+        latest = datetime(2024, 6, 28, tzinfo=timezone.utc)
+        assert service.covers_period(latest - timedelta(days=183), latest, "1d", "6mo")
+        assert not service.covers_period(latest - timedelta(days=30), latest, "1d", "6mo")
+        assert not service.covers_period(latest - timedelta(days=365), latest, "1d", "max")
+        assert service.covers_period(latest - timedelta(days=59), latest, "5m", "1y", full_period="1y")
+        assert service.covers_period(latest - timedelta(days=365), latest, "1d", "5y", full_period="max")
+        assert not service.covers_period(latest - timedelta(days=30), latest, "1d", "1y", full_period="6mo")
+
+    @staticmethod
+    def _db_returning(rows):
+        db = AsyncMock()
+        result = MagicMock()
+        result.all.return_value = rows
+        db.execute.return_value = result
+        return db
+
+    @pytest.mark.asyncio
+    async def test_period_range_pushed_into_sql(self):
+        db = self._db_returning([])
+        await service.read_candles(db, uuid.uuid4(), "1d", "1mo")
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "candles.timestamp >= (SELECT max(candles.timestamp)" in sql
+        assert "LIMIT" not in sql
+
+    @pytest.mark.asyncio
+    async def test_limit_returns_newest_oldest_first(self):
+        ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        rows = [(ts + timedelta(days=d), 1, 1, 1, d, 1) for d in (2, 1)]
+        db = self._db_returning(rows)
+        candles = await service.read_candles(db, uuid.uuid4(), "1d", "max", limit=2)
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ORDER BY candles.timestamp DESC" in sql and "LIMIT" in sql
+        assert "max(candles.timestamp)" not in sql
+        assert candles["close"].tolist() == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_invalid_period(self):
+        with pytest.raises(InvalidPeriod):
+            await service.get_candles(AsyncMock(), "AAPL", "1d", "2mo")
+
+
+# ═══════════════════════════════════════════════════════════
+#  Ad-hoc symbol candle tier
+# ═══════════════════════════════════════════════════════════
+
+from src.market.adhoc import AdhocCandleCache, AdhocSeries
+
+
+def _daily_candles(days: int, close: float = 1.0, start: datetime | None = None) -> list[dict]:
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [_candle(start + timedelta(days=d), close) for d in range(days)]
+
+
+class TestAdhocCandles:
+    @pytest.mark.asyncio
+    async def test_cached_series_serves_shorter_periods(self):
+        fetch = AsyncMock(return_value=_daily_candles(400))
+        with patch("src.market.service.adhoc_candles", AdhocCandleCache()), \
+             patch("src.market.service.afetch_candles", fetch):
+            year = await service.load_adhoc_candles("NVDA", "1d", "1y")
+            month = await service.load_adhoc_candles("nvda", "1d", "1mo")
+            assert fetch.await_count == 1
+            assert year["time"].size == 367 and month["time"].size == 32
+            assert month["time"][-1] == year["time"][-1]
+            await service.load_adhoc_candles("NVDA", "1d", "2y")  # not covered: full fetch
+            assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_series_topped_up_from_last_bar(self):
+        cache = AdhocCandleCache()
+        candles = _daily_candles(10)
+        cache.set("NVDA", "1d", AdhocSeries.from_candles(candles, "1mo", datetime(2000, 1, 1, tzinfo=timezone.utc)))
+        fresh = [_candle(candles[-1]["timestamp"], 5.0), _candle(candles[-1]["timestamp"] + timedelta(days=1), 6.0)]
+        fetch = AsyncMock(return_value=fresh)
+        with patch("src.market.service.adhoc_candles", cache), patch("src.market.service.afetch_candles", fetch):
+            cols = await service.load_adhoc_candles("NVDA", "1d", "1mo")
+        assert fetch.await_args.kwargs["start"] == candles[-1]["timestamp"].replace(tzinfo=None)
+        assert cols["close"].tolist() == [1.0] * 9 + [5.0, 6.0]
+
+        fetch.side_effect = ConnectionError("throttled")
+        cache.get("NVDA", "1d").fetched_at = datetime(2000, 1, 1, tzinfo=timezone.utc)
+        with patch("src.market.service.adhoc_candles", cache), patch("src.market.service.afetch_candles", fetch):
+            assert (await service.load_adhoc_candles("NVDA", "1d", "1mo"))["time"].size == 11
+
+    def test_lru_eviction_and_promotion_count(self):
+        cache = AdhocCandleCache(maxsize=2, promote_after=3, promote_window=60)
+        entry = AdhocSeries.from_candles(_daily_candles(2), "1mo", datetime.now(timezone.utc))
+        for sym in ("A", "B"):
+            cache.set(sym, "1d", entry)
+        cache.get("A", "1d")
+        cache.set("C", "1d", entry)
+        assert cache.get("B", "1d") is None and cache.get("A", "1d") is not None
+        assert [cache.record_request("nvda") for _ in range(4)] == [False, False, True, False]
+        cache.promotion_failed("NVDA")
+        assert cache.record_request("NVDA") is False
+
+    @pytest.mark.asyncio
+    async def test_popular_symbol_promoted_with_cached_series(self):
+        cache = AdhocCandleCache()
+        cache.set("NVDA", "1d", AdhocSeries.from_candles(_daily_candles(5), "1mo", datetime.now(timezone.utc)))
+        asset = SimpleNamespace(id=uuid.uuid4(), symbol="NVDA")
+        metadata = MagicMock(get=AsyncMock(return_value={"symbol": "NVDA", "name": "NVIDIA Corporation"}))
+        with patch("src.market.service.adhoc_candles", cache), \
+             patch("src.market.service.metadata_store", metadata), \
+             patch("src.market.service.create_asset", AsyncMock(return_value=asset)) as mock_create, \
+             patch("src.market.service.upsert_candles", AsyncMock()) as mock_upsert:
+            assert await service.promote_symbol("nvda", session_factory=_session_factory()) is asset
+        mock_create.assert_awaited_once_with(ANY, "NVDA", "NVIDIA Corporation", "unknown")
+        _, asset_id, timeframe, records = mock_upsert.await_args.args
+        assert (asset_id, timeframe, len(records)) == (asset.id, "1d", 5)
+        assert mock_upsert.await_args.kwargs == {"full_period": "1mo"}
+        assert records[0]["timestamp"] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_symbol_never_served_not_promoted(self):
+        with patch("src.market.service.adhoc_candles", AdhocCandleCache()), \
+             patch("src.market.service.create_asset", AsyncMock()) as mock_create:
+            assert await service.promote_symbol("AAPLL", session_factory=_session_factory()) is None
+        mock_create.assert_not_awaited()
+
+
+# ═══════════════════════════════════════════════════════════
+#  Unknown symbols
+# ═══════════════════════════════════════════════════════════
+
+from src.market.exceptions import UnknownSymbol
+from src.market.symbols import NegativeCache, SymbolIndex, check_symbol
+
+
+class TestUnknownSymbols:
+    def test_check_symbol_syntax(self):
+        assert [check_symbol(s) for s in (" aapl", "BRK-B", "EURUSD=X", "^GSPC", "M&M.NS")] == [
+            "AAPL", "BRK-B", "EURUSD=X", "^GSPC", "M&M.NS",
+        ]
+        for bad in ("", "AA PL", "-X", "A" * 30, "<script>"):
+            with pytest.raises(UnknownSymbol):
+                check_symbol(bad)
+
+    def test_symbol_index_accepts_listed_and_registered(self, tmp_path):
+        path = tmp_path / "symbols.csv"
+        path.write_text("Symbol,Name\n# comment\naapl,Apple Inc.\nMSFT\n")
+        with patch("src.market.symbols.symbol_index", SymbolIndex(path)), \
+             patch("src.market.symbols.asset_registry", MagicMock(contains=lambda s: s == "NVDA")):
+            assert check_symbol("AAPL") == "AAPL" and check_symbol("nvda") == "NVDA"
+            with pytest.raises(UnknownSymbol):
+                check_symbol("AAPLL")
+
+    def test_negative_cache_expires_and_evicts(self):
+        cache = NegativeCache(ttl=60, maxsize=2)
+        cache.add("a", "gone")
+        cache.add("b", "gone")
+        cache.add("c", "gone")
+        assert cache.get("a") is None and cache.get("c") == "gone"
+        cache._entries["c"] = (0.0, "gone")  # long expired
+        assert cache.get("c") is None and len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_candles_not_refetched(self):
+        fetch = AsyncMock(return_value=[])
+        with patch("src.market.service.adhoc_candles", AdhocCandleCache()), \
+             patch("src.market.service.negative_cache", NegativeCache()), \
+             patch("src.market.service.afetch_candles", fetch):
+            for _ in range(3):
+                with pytest.raises(MarketDataUnavailable):
+                    await service.load_adhoc_candles("AAPLL", "1d", "6mo")
+            assert fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_upstream_failures_not_remembered(self):
+        fetch = AsyncMock(side_effect=ConnectionError("throttled"))
+        quote = AsyncMock(side_effect=CircuitOpen("open"))
+        with patch("src.market.service.adhoc_candles", AdhocCandleCache()), \
+             patch("src.market.service.negative_cache", NegativeCache()) as negative, \
+             patch("src.market.service.afetch_candles", fetch), \
+             patch("src.market.service.afetch_quote", quote), \
+             patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: None)):
+            with pytest.raises(MarketDataUnavailable):
+                await service.load_adhoc_candles("AAPL", "1d", "6mo")
+            assert await service._load_quote("AAPL") is None
+            assert len(negative) == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_quote_not_refetched(self):
+        quote_cache.invalidate()
+        fetch = AsyncMock(return_value=None)
+        with patch("src.market.service.negative_cache", NegativeCache()), \
+             patch("src.market.service.afetch_quote", fetch), \
+             patch("src.market.service.afetch_quotes", AsyncMock()) as batch, \
+             patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: None)):
+            for _ in range(2):
+                with pytest.raises(MarketDataUnavailable):
+                    await service.get_quote("AAPLL")
+            with pytest.raises(UnknownSymbol):
+                await service.get_quote("AA PL")
+            quotes, errors = await service.get_quotes(["AAPLL", "AA PL"])
+        assert fetch.await_count == 1 and not batch.called
+        assert quotes == [] and errors == {"AAPLL": "Quote unavailable", "AA PL": "Unknown symbol"}
+
+
+# ═══════════════════════════════════════════════════════════
+#  Columnar candle format
+# ═══════════════════════════════════════════════════════════
+
+import json
+
+from fastapi import Response
+
+from src.market import series
+from src.market import router as market_router
+from src.market.schemas import CandlesColumnarResponse, CandlesResponse
+
+
+async def _call_candles_route(cols, fmt="rows", accept=None, if_none_match=None, response=None, version=None):
+    request = MagicMock()
+    request.headers = {"accept": accept} if accept else {}
+    if if_none_match:
+        request.headers["if-none-match"] = if_none_match
+    with patch("src.market.router.service.get_candles", AsyncMock(return_value=("AAPL", cols))), \
+         patch("src.market.router.service.candles_version", AsyncMock(return_value=version)):
+        return await market_router.get_candles(
+            "aapl", request, response or Response(), AsyncMock(),
+            timeframe="1d", period="6mo", limit=None, format=fmt,
+        )
+
+
+def _sample_columns(n: int = 3):
+    ts = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    rows = [(ts + timedelta(days=i), 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 100 + i) for i in range(n)]
+    return series.rows_to_columns(rows)
+
+
+class TestColumnarCandles:
+    def test_rows_to_columns(self):
+        cols = _sample_columns()
+        assert cols["time"][0] == datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp()
+        assert cols["close"].tolist() == [1.5, 2.5, 3.5]
+        assert cols["volume"].dtype == series.np.int64
+        assert series.length(series.rows_to_columns([])) == 0
+
+    def test_records_round_trip(self):
+        cols = _sample_columns()
+        records = series.columns_to_records(cols)
+        assert records[1] == {"time": cols["time"][1], "open": 2.0, "high": 3.0, "low": 1.5, "close": 2.5, "volume": 101}
+        back = series.records_to_columns(records)
+        assert all((back[k] == cols[k]).all() for k in series.CANDLE_FIELDS)
+
+    @pytest.mark.asyncio
+    async def test_columnar_matches_rows(self):
+        cols = _sample_columns()
+        rows = await _call_candles_route(cols, "rows")
+        columnar = await _call_candles_route(cols, "columnar")
+        body = CandlesColumnarResponse.model_validate(json.loads(columnar.body))
+        assert isinstance(rows, CandlesResponse)
+        assert body.count == rows.count == 3
+        assert body.close == [c.close for c in rows.candles]
+        assert body.time == [c.time for c in rows.candles]
+
+    def test_quote_stream_subscribes_only_valid_symbols(self):
+        from fastapi import FastAPI
+        from starlette.testclient import TestClient
+        app = FastAPI()
+        app.include_router(market_router.market_route)
+        hub = MagicMock()
+        with patch.object(market_router, "quote_hub", hub), \
+             patch("src.market.router.negative_cache", NegativeCache(ttl=60)) as negative:
+            negative.add("quote:DELSTD", "Quote unavailable for DELSTD")
+            with TestClient(app).websocket_connect("/market/stream") as ws:
+                ws.send_json({"action": "subscribe", "symbols": ["aapl", "NOT A TICKER", "DELSTD"]})
+                first, second = ws.receive_json(), ws.receive_json()
+        assert first == {"type": "error", "symbol": "NOT A TICKER", "content": "Unknown symbol: NOT A TICKER"}
+        assert second == {"type": "error", "symbol": "DELSTD", "content": "Quote unavailable for DELSTD"}
+        hub.subscribe.assert_called_once_with(ANY, ["AAPL"])
+
+    def test_quote_stream_survives_malformed_frames(self):
+        from fastapi import FastAPI
+        from starlette.testclient import TestClient
+        app = FastAPI()
+        app.include_router(market_router.market_route)
+        hub = MagicMock()
+        with patch.object(market_router, "quote_hub", hub):
+            with TestClient(app).websocket_connect("/market/stream") as ws:
+                ws.send_text("{not json")
+                assert ws.receive_json() == {"type": "error", "content": "Expected a JSON message"}
+                ws.send_bytes(b"\x00")
+                assert ws.receive_json() == {"type": "error", "content": "Expected a JSON message"}
+                ws.send_json({"action": "subscribe", "symbols": ["AAPL"]})
+                ws.send_json({"action": "ping"})  # still connected and answering
+                assert ws.receive_json()["content"] == "Expected {action, symbols}"
+        hub.subscribe.assert_called_once_with(ANY, ["AAPL"])
+
+    def test_candle_stream_reports_unexpected_errors(self):
+        from fastapi import FastAPI
+        from starlette.testclient import TestClient
+        from starlette.websockets import WebSocketDisconnect as ClientDisconnect
+
+        async def session():
+            yield AsyncMock()
+
+        app = FastAPI()
+        app.include_router(market_router.market_route)
+        with patch("src.market.router.get_session", session), \
+             patch("src.market.router.service.get_candles", AsyncMock(side_effect=RuntimeError("db down"))):
+            with TestClient(app).websocket_connect("/market/candles/AAPL/stream") as ws:
+                assert ws.receive_json() == {"type": "error", "content": "Internal error"}
+                with pytest.raises(ClientDisconnect) as closed:
+                    ws.receive_json()
+        assert closed.value.code == 1011
+
+    def test_polling_hub_is_abstract(self):
+        from src.market.stream import PollingHub
+        with pytest.raises(TypeError):
+            PollingHub(1.0)
+
+    def test_openapi_documents_every_shape(self):
+        from fastapi import FastAPI
+        app = FastAPI()
+        app.include_router(market_router.market_route)
+        content = app.openapi()["paths"]["/market/candles/{symbol}"]["get"]["responses"]["200"]["content"]
+        refs = {s["$ref"].rsplit("/", 1)[-1] for s in content["application/json"]["schema"]["anyOf"]}
+        assert refs == {"CandlesResponse", "CandlesColumnarResponse"}
+        assert {transport.PACKED_F64, transport.ARROW_STREAM} <= set(content)
+
+
+# ═══════════════════════════════════════════════════════════
+#  Binary candle transport
+# ═══════════════════════════════════════════════════════════
+
+from src.core.http_cache import etag_matches, make_etag
+from src.market import transport
+
+
+class TestBinaryCandles:
+    def test_negotiate(self):
+        offered = [transport.JSON, transport.PACKED_F64, transport.ARROW_STREAM]
+        assert transport.negotiate(None, offered) == transport.JSON
+        assert transport.negotiate("*/*", offered) == transport.JSON
+        assert transport.negotiate(transport.PACKED_F64, offered) == transport.PACKED_F64
+        assert transport.negotiate(
+            f"application/json;q=0.5, {transport.ARROW_STREAM}", offered
+        ) == transport.ARROW_STREAM
+        assert transport.negotiate(transport.ARROW_STREAM, offered[:2]) == transport.JSON
+
+    @pytest.mark.asyncio
+    async def test_packed_round_trip_matches_json(self):
+        cols = _sample_columns(50)
+        as_json = await _call_candles_route(cols, "rows")
+        packed = await _call_candles_route(cols, accept=transport.PACKED_F64)
+        assert packed.media_type == transport.PACKED_F64
+        count = int(packed.headers["X-Candle-Count"])
+        decoded = transport.decode_packed(bytes(packed.body), count)
+        assert series.columns_to_records(decoded) == [c.model_dump() for c in as_json.candles]
+
+    @pytest.mark.asyncio
+    async def test_arrow_round_trip_matches_json(self):
+        pa = pytest.importorskip("pyarrow")
+        cols = _sample_columns(50)
+        as_json = await _call_candles_route(cols, "rows")
+        resp = await _call_candles_route(cols, accept=transport.ARROW_STREAM)
+        assert resp.media_type == transport.ARROW_STREAM
+        table = pa.ipc.open_stream(bytes(resp.body)).read_all()
+        assert table.to_pylist() == [c.model_dump() for c in as_json.candles]
+
+    def test_packed_is_built_from_one_buffer(self):
+        cols = _sample_columns(4)
+        body = transport.encode_packed(cols)
+        assert body.nbytes == 6 * 4 * 8
+        assert isinstance(body.obj, series.np.ndarray)
+
+
+class TestConditionalCandles:
+    @pytest.mark.asyncio
+    async def test_etag_revalidates_to_304(self):
+        cols = _sample_columns()
+        response = Response()
+        await _call_candles_route(cols, response=response)
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"') and response.headers["cache-control"] == "public, max-age=300"
+
+        cached = await _call_candles_route(cols, if_none_match=f'"other", {etag.removeprefix("W/")}')
+        assert cached.status_code == 304 and cached.headers["etag"] == etag and not cached.body
+
+        packed = await _call_candles_route(cols, accept=transport.PACKED_F64)
+        assert packed.headers["etag"] != etag and packed.headers["vary"] == "Accept"
+
+    @pytest.mark.asyncio
+    async def test_forming_bar_update_changes_etag(self):
+        cols = _sample_columns()
+        before = (await _call_candles_route(cols, "columnar")).headers["etag"]
+        cols["close"][-1] += 1.0
+        assert (await _call_candles_route(cols, "columnar", if_none_match=before)).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_fresh_series_revalidates_before_reading_rows(self):
+        response = Response()
+        await _call_candles_route(_sample_columns(), response=response, version=("1d@1.0", True))
+        etag = response.headers["etag"]
+
+        request = MagicMock(headers={"if-none-match": etag})
+        with patch("src.market.router.service.get_candles", AsyncMock()) as mock_candles, \
+             patch("src.market.router.service.candles_version", AsyncMock(return_value=("1d@1.0", True))):
+            cached = await market_router.get_candles(
+                "aapl", request, Response(), AsyncMock(), timeframe="1d", period="6mo", limit=None, format="rows",
+            )
+        assert cached.status_code == 304
+        mock_candles.assert_not_awaited()
+
+        # A stale series is read (and refreshed) first; its new version is a new ETag
+        versions = AsyncMock(side_effect=[("1d@1.0", False), ("1d@2.0", True)])
+        with patch("src.market.router.service.get_candles", AsyncMock(return_value=("AAPL", _sample_columns()))), \
+             patch("src.market.router.service.candles_version", versions):
+            fresh = await market_router.get_candles(
+                "aapl", request, Response(), AsyncMock(), timeframe="1d", period="6mo", limit=None, format="columnar",
+            )
+        assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_series_version(self):
+        refreshed = datetime.now(timezone.utc)
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(all=lambda: [("1h", refreshed), ("5m", refreshed - timedelta(days=1))])
+        version, fresh = await service.series_version(db, uuid.uuid4(), "1h")
+        assert version == f"1h@{refreshed.timestamp()},5m@{(refreshed - timedelta(days=1)).timestamp()}"
+        assert not fresh  # the 5m base is due a refresh
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "candle_series.timeframe IN" in sql
+        db.execute.return_value = MagicMock(all=lambda: [])
+        assert await service.series_version(db, uuid.uuid4(), "1h") is None
+
+    def test_etag_matching(self):
+        request = MagicMock(headers={"if-none-match": "*"})
+        assert etag_matches(request, make_etag("a"))
+        request.headers = {"if-none-match": make_etag("b")}
+        assert not etag_matches(request, make_etag("a"))
+        assert not etag_matches(MagicMock(headers={}), make_etag("a"))
+
+
+# ═══════════════════════════════════════════════════════════
+#  Candle resampling
+# ═══════════════════════════════════════════════════════════
+
+from src.market.resample import resample
+
+
+def _bars(times: list[datetime]):
+    rows = [(t, 10.0 + i, 20.0 + i, 1.0 + i, 11.0 + i, 100) for i, t in enumerate(times)]
+    return series.rows_to_columns(rows)
+
+
+class TestResample:
+    def test_intraday_anchored_at_session_open(self):
+        open_ = datetime(2024, 3, 4, 9, 30, tzinfo=timezone.utc)
+        cols = _bars([open_ + timedelta(minutes=m) for m in range(120)])
+        hourly = resample(cols, "1h")
+        assert [datetime.fromtimestamp(t, timezone.utc).strftime("%H:%M") for t in hourly["time"]] == ["09:30", "10:30"]
+        assert hourly["open"].tolist() == [10.0, 70.0]
+        assert hourly["close"].tolist() == [11.0 + 59, 11.0 + 119]
+        assert hourly["high"].tolist() == [20.0 + 59, 20.0 + 119]
+        assert hourly["low"].tolist() == [1.0, 61.0]
+        assert hourly["volume"].tolist() == [6000, 6000]
+
+    def test_five_minute_buckets(self):
+        open_ = datetime(2024, 3, 4, 9, 30, tzinfo=timezone.utc)
+        # A missing minute must not shift later buckets
+        minutes = [m for m in range(15) if m != 7]
+        cols = _bars([open_ + timedelta(minutes=m) for m in minutes])
+        five = resample(cols, "5m")
+        assert series.length(five) == 3
+        assert five["volume"].tolist() == [500, 400, 500]
+
+    def test_weekly_starts_monday(self):
+        days = [datetime(2024, 1, d, tzinfo=timezone.utc) for d in (3, 4, 5, 8, 9)]  # Wed..Fri, Mon, Tue
+        weekly = resample(_bars(days), "1wk")
+        starts = [datetime.fromtimestamp(t, timezone.utc).date().isoformat() for t in weekly["time"]]
+        assert starts == ["2024-01-01", "2024-01-08"]
+        assert weekly["open"].tolist() == [10.0, 13.0]
+        assert weekly["close"].tolist() == [13.0, 15.0]
+
+    def test_monthly_calendar_buckets(self):
+        days = [datetime(2024, 1, 30, tzinfo=timezone.utc), datetime(2024, 1, 31, tzinfo=timezone.utc),
+                datetime(2024, 2, 1, tzinfo=timezone.utc), datetime(2024, 3, 1, tzinfo=timezone.utc)]
+        monthly = resample(_bars(days), "1mo")
+        assert monthly["time"].tolist() == [
+            datetime(2024, m, 1, tzinfo=timezone.utc).timestamp() for m in (1, 2, 3)
+        ]
+        assert monthly["volume"].tolist() == [200, 100, 100]
+
+    def test_empty(self):
+        assert series.length(resample(series.empty_columns(), "1h")) == 0
+
+    @pytest.mark.asyncio
+    async def test_capped_base_not_used_for_longer_period(self):
+        # 5m fetched in full for "max" holds only Yahoo's ~60-day intraday window
+        now = datetime.now(timezone.utc)
+        asset = MagicMock(id=uuid.uuid4(), symbol="AAPL")
+        stored = {"5m": (now, now, "max")}
+        with patch("src.market.service.latest_candle", AsyncMock(side_effect=lambda db, _, tf: stored.get(tf))), \
+             patch("src.market.service.earliest_candle_time", AsyncMock(return_value=now - timedelta(days=60))):
+            assert await service.find_resample_base(AsyncMock(), asset, "1h", "1y") is None
+            assert await service.find_resample_base(AsyncMock(), asset, "1h", "1mo") == "5m"
+
+    @pytest.mark.asyncio
+    async def test_get_candles_serves_derived_timeframe_from_base(self):
+        open_ = datetime(2024, 3, 4, 9, 30, tzinfo=timezone.utc)
+        base_cols = _bars([open_ + timedelta(minutes=m) for m in range(60)])
+        asset = MagicMock(id=uuid.uuid4(), symbol="AAPL")
+        with patch("src.market.service.get_asset_by_symbol", AsyncMock(return_value=asset)), \
+             patch("src.market.service.find_resample_base", AsyncMock(return_value="1m")), \
+             patch("src.market.service.series_version", AsyncMock(return_value=None)), \
+             patch("src.market.service.refresh_candles", AsyncMock()) as mock_refresh, \
+             patch("src.market.service.read_candles", AsyncMock(return_value=base_cols)) as mock_read:
+            _, cols = await service.get_candles(AsyncMock(), "AAPL", "5m", "1d")
+        mock_refresh.assert_awaited_once_with(ANY, asset, "1m", "1d")
+        assert mock_read.await_args.args[2] == "1m"
+        assert series.length(cols) == 12
+
+
+# ═══════════════════════════════════════════════════════════
+#  Background refresher
+# ═══════════════════════════════════════════════════════════
+
+from contextlib import asynccontextmanager
+
+from src.market.refresher import MarketRefresher, refresh_interval
+
+
+def _session_factory():
+    @asynccontextmanager
+    async def factory():
+        yield AsyncMock()
+    return factory
+
+
+class TestMarketRefresher:
+    def test_interval_matches_bar_size(self):
+        assert refresh_interval("1m") == 60
+        assert refresh_interval("5m") == 300
+        assert refresh_interval("1d") == service.settings.MARKET_CANDLE_MAX_STALENESS
+
+    def test_backoff_doubles_and_caps(self):
+        r = MarketRefresher(timeframes=["1m"], session_factory=_session_factory())
+        with patch("src.market.refresher.random.uniform", return_value=0):
+            assert r.next_delay("1m", 0) == 60
+            assert r.next_delay("1m", 3) == 480
+            assert r.next_delay("1m", 30) == service.settings.MARKET_REFRESH_MAX_BACKOFF
+
+    @pytest.mark.asyncio
+    async def test_tick_refreshes_due_series_once(self):
+        assets = [MagicMock(id=uuid.uuid4(), symbol="AAPL"), MagicMock(id=uuid.uuid4(), symbol="MSFT")]
+        r = MarketRefresher(timeframes=["1m", "1d"], session_factory=_session_factory())
+        with patch("src.market.refresher.service.list_assets", AsyncMock(return_value=assets)), \
+             patch("src.market.refresher.service.ingest_candles", AsyncMock(return_value=[])) as mock_ingest, \
+             patch("src.market.refresher.random.uniform", return_value=0):
+            tasks = await r.tick()
+            await asyncio.gather(*tasks)
+            assert mock_ingest.await_count == 4
+            # Nothing is due again until the next interval
+            assert await r.tick() == []
+        called = {(c.args[1].symbol, c.args[2]) for c in mock_ingest.await_args_list}
+        assert called == {("AAPL", "1m"), ("AAPL", "1d"), ("MSFT", "1m"), ("MSFT", "1d")}
+
+    @pytest.mark.asyncio
+    async def test_failure_backs_off(self):
+        asset = MagicMock(id=uuid.uuid4(), symbol="AAPL")
+        r = MarketRefresher(timeframes=["1m"], session_factory=_session_factory())
+        with patch("src.market.refresher.service.list_assets", AsyncMock(return_value=[asset])), \
+             patch("src.market.refresher.service.ingest_candles", AsyncMock(side_effect=RuntimeError("429"))), \
+             patch("src.market.refresher.random.uniform", return_value=0):
+            await asyncio.gather(*await r.tick())
+        assert r._failures[("AAPL", "1m")] == 1
+        assert r._next_due[("AAPL", "1m")] - time.monotonic() > 100  # 2 x 60s
+
+    @pytest.mark.asyncio
+    async def test_tick_checks_partitions_periodically(self):
+        r = MarketRefresher(timeframes=["1m"], session_factory=_session_factory())
+        with patch("src.market.refresher.service.list_assets", AsyncMock(return_value=[])), \
+             patch("src.market.refresher.ensure_candle_partitions", AsyncMock(return_value=[])) as mock_ensure:
+            await r.tick()
+            mock_ensure.assert_not_awaited()  # checked at startup
+            r._partitions_checked_at -= service.settings.MARKET_PARTITION_CHECK_INTERVAL
+            await r.tick()
+            await r.tick()
+        mock_ensure.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_start_stop(self):
+        r = MarketRefresher(timeframes=["1m"], session_factory=_session_factory())
+        with patch("src.market.refresher.service.list_assets", AsyncMock(return_value=[])):
+            r.start()
+            await asyncio.sleep(0)
+            await r.stop()
+        assert r._task is None
+
+
+# ═══════════════════════════════════════════════════════════
+#  Shared (Redis) market cache
+# ═══════════════════════════════════════════════════════════
+
+from src.market.cache import SharedCache, pack_quote, unpack_quote
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for redis.asyncio.Redis (get / set with px)."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.data: dict[str, tuple[float, bytes]] = {}
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        entry = self.data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    async def set(self, key, value, px=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = (time.monotonic() + (px / 1000 if px else 1e9), bytes(value))
+
+
+class TestSharedCache:
+    @pytest.mark.asyncio
+    async def test_shared_between_instances(self):
+        redis = FakeRedis()
+        worker_a = SharedCache(redis_factory=lambda: redis)
+        worker_b = SharedCache(redis_factory=lambda: redis)
+        await worker_a.set("k", b"v", ttl=60)
+        assert await worker_b.get("k") == b"v"
+        assert "marketpulse:k" in redis.data
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        redis = FakeRedis()
+        cache = SharedCache(redis_factory=lambda: redis)
+        await cache.set("k", b"v", ttl=0.001)
+        await asyncio.sleep(0.01)
+        assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_local_fallback_without_redis(self):
+        cache = SharedCache(redis_factory=lambda: None)
+        await cache.set("k", b"v", ttl=60)
+        assert await cache.get("k") == b"v"
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back_and_backs_off(self):
+        redis = FakeRedis(fail=True)
+        calls = 0
+
+        def factory():
+            nonlocal calls
+            calls += 1
+            return redis
+
+        cache = SharedCache(redis_factory=factory)
+        await cache.set("k", b"v", ttl=60)
+        assert await cache.get("k") == b"v"
+        assert calls == 1  # no Redis attempts during the back-off window
+
+    def test_quote_codec_round_trip(self):
+        q = _quote("BTC-USD", 65000.5)
+        q["timestamp"] = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        data = pack_quote(q)
+        assert len(data) < 80
+        assert unpack_quote(data) == q
+
+    @pytest.mark.asyncio
+    async def test_candles_served_from_shared_cache(self):
+        redis = FakeRedis()
+        cols = _sample_columns(5)
+        loader = AsyncMock(return_value=("AAPL", cols))
+        adhoc = AdhocCandleCache(promote_after=2)
+        with patch("src.market.service._load_candles", loader), \
+             patch("src.market.service.get_asset_by_symbol", AsyncMock(return_value=None)), \
+             patch("src.market.service.adhoc_candles", adhoc), \
+             patch("src.market.service.promote_symbol", MagicMock()) as mock_promote, \
+             patch("src.market.service._spawn"):
+            for _ in range(2):  # two workers
+                with patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: redis)):
+                    _, got = await service.get_candles(AsyncMock(), "aapl", "1d", "1y")
+                    assert series.columns_to_records(got) == series.columns_to_records(cols)
+        loader.assert_awaited_once()
+        mock_promote.assert_called_once_with("AAPL")  # shared-cache hits count towards promotion
+
+    @pytest.mark.asyncio
+    async def test_stored_candles_cached_per_series_version(self):
+        redis = FakeRedis()
+        loader = AsyncMock(return_value=("AAPL", _sample_columns(5)))
+        versions = AsyncMock(side_effect=[("1d@1.0", True)] * 3 + [("1d@2.0", True)] * 3)
+        with patch("src.market.service._load_candles", loader), \
+             patch("src.market.service.get_asset_by_symbol", AsyncMock(return_value=MagicMock(id=uuid.uuid4()))), \
+             patch("src.market.service.series_version", versions), \
+             patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: redis)):
+            for _ in range(3):  # miss, hit, then the series is written: miss
+                await service.get_candles(AsyncMock(), "AAPL", "1d", "1y")
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_quote_served_from_shared_cache(self):
+        redis = FakeRedis()
+        quote_cache.invalidate()
+        with patch("src.market.service.market_cache", SharedCache(redis_factory=lambda: redis)), \
+             patch("src.market.service.afetch_quote", AsyncMock(return_value=_quote("AAPL"))) as mock_fetch:
+            await service.get_quote("AAPL")
+            quote_cache.invalidate()  # another worker: empty in-process cache
+            await service.get_quote("AAPL")
+        mock_fetch.assert_awaited_once()
+        quote_cache.invalidate()
+
+
+# ═══════════════════════════════════════════════════════════
+#  Live quote stream
+# ═══════════════════════════════════════════════════════════
+
+from src.market.stream import CandleHub, QuoteHub, Subscription, ordered_bars, quote_delta
+
+
+class TestQuoteStream:
+    def test_delta_only_changed_fields(self):
+        a = _quote("AAPL", 100.0)
+        b = {**a, "price": 101.0, "timestamp": datetime.now(timezone.utc)}
+        delta = quote_delta(a, b)
+        assert set(delta) == {"price", "timestamp"}
+        assert quote_delta(b, {**b, "timestamp": datetime.now(timezone.utc)}) == {}
+        assert set(quote_delta(None, a)) >= {"price", "name", "volume"}
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_coalesced_state(self):
+        sub = Subscription()
+        sub.offer({"type": "snapshot", "symbol": "AAPL", "data": {"price": 1, "volume": 5}})
+        for price in (2, 3, 4):
+            sub.offer({"type": "delta", "symbol": "AAPL", "data": {"price": price}})
+        sub.offer({"type": "delta", "symbol": "MSFT", "data": {"price": 9}})
+        batch = await sub.next_batch()
+        assert batch == [
+            {"type": "snapshot", "symbol": "AAPL", "data": {"price": 4, "volume": 5}},
+            {"type": "delta", "symbol": "MSFT", "data": {"price": 9}},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_one_poller_fans_out_to_all_subscribers(self):
+        prices = iter(range(100, 1000))
+        fetch = AsyncMock(side_effect=lambda s: _quote(s, float(next(prices))))
+        hub = QuoteHub(fetch=fetch, interval=0.01)
+        subs = [Subscription() for _ in range(50)]
+        for sub in subs:
+            hub.subscribe(sub, ["AAPL"])
+        await asyncio.sleep(0.035)
+        polls = fetch.await_count
+        assert 1 <= polls <= 5  # independent of the 50 subscribers
+        assert hub.stats() == {"channels": 1, "subscriptions": 50}
+        first, last = await subs[0].next_batch(), await subs[-1].next_batch()
+        assert first == last and first[0]["symbol"] == "AAPL"
+
+        for sub in subs:
+            hub.unsubscribe(sub)
+        await asyncio.sleep(0.02)
+        assert hub.stats() == {"channels": 0, "subscriptions": 0}
+        assert fetch.await_count <= polls + 1
+        await hub.close()
+
+    @pytest.mark.asyncio
+    async def test_late_subscriber_gets_snapshot(self):
+        hub = QuoteHub(fetch=AsyncMock(return_value=_quote("AAPL")), interval=10)
+        hub.subscribe(Subscription(), ["AAPL"])
+        await asyncio.sleep(0)
+        late = Subscription()
+        hub.subscribe(late, ["AAPL"])
+        (msg,) = await late.next_batch()
+        assert msg["type"] == "snapshot" and msg["data"]["price"] == 100.0
+        await hub.close()
+
+
+class TestCandleStream:
+    KEY = ("AAPL", "5m", "timestamp")
+
+    @staticmethod
+    def _bar(i: int, close: float = 100.0) -> dict:
+        # Stored timestamps are exchange-local wall clock, so `time` differs
+        candle = _candle(datetime(2024, 6, 3, 9, 30, tzinfo=timezone.utc) + timedelta(minutes=5 * i), close)
+        candle["time"] += 4 * 3600
+        return candle
+
+    def _tail(self, n: int) -> list[dict]:
+        return [self._bar(i, close=100.0 + i) for i in range(n)]
+
+    @pytest.mark.asyncio
+    async def test_first_poll_sends_tail_then_only_changed_bars(self):
+        fetch = AsyncMock(return_value=self._tail(5))
+        hub = CandleHub(fetch=fetch, interval=10)
+
+        first = await hub.poll(self.KEY)
+        assert [b["close"] for b in ordered_bars(first)["bars"]] == [103.0, 104.0]
+        assert "start" not in fetch.await_args.kwargs
+
+        # Forming bar unchanged, one new bar opened
+        forming = self._tail(5)[-1]
+        fetch.return_value = [forming, self._bar(5, close=200.0)]
+        second = await hub.poll(self.KEY)
+        assert fetch.await_args.kwargs["start"] == forming["timestamp"].replace(tzinfo=None)
+        assert [b["close"] for b in ordered_bars(second)["bars"]] == [200.0]
+
+        fetch.return_value = [self._bar(5, close=200.0)]
+        assert await hub.poll(self.KEY) is None
+        await hub.close()
+
+    @pytest.mark.asyncio
+    async def test_bar_time_follows_channel_clock(self):
+        candle = self._bar(0)
+        hub = CandleHub(fetch=AsyncMock(return_value=[candle]), interval=10)
+        stored = await hub.poll(("AAPL", "1d", "timestamp"))
+        direct = await hub.poll(("AAPL", "1d", "time"))
+        assert ordered_bars(stored)["bars"][0]["time"] == candle["timestamp"].timestamp()
+        assert ordered_bars(direct)["bars"][0]["time"] == candle["time"]
+
+    @pytest.mark.asyncio
+    async def test_updates_to_one_bar_coalesce(self):
+        sub = Subscription()
+        hub = CandleHub(fetch=AsyncMock(), interval=10)
+        for close in (1.0, 2.0, 3.0):
+            sub.offer(hub._message("AAPL", [self._bar(0, close=close)], "time"))
+        sub.offer(hub._message("AAPL", [self._bar(1, close=4.0)], "time"))
+        (msg,) = await sub.next_batch()
+        assert [b["close"] for b in ordered_bars(msg)["bars"]] == [3.0, 4.0]
+
+    @pytest.mark.asyncio
+    async def test_late_subscriber_gets_current_tail(self):
+        hub = CandleHub(fetch=AsyncMock(return_value=self._tail(3)), interval=10)
+        hub.subscribe(Subscription(), [self.KEY])
+        await asyncio.sleep(0)
+        late = Subscription()
+        hub.subscribe(late, [self.KEY])
+        (msg,) = await late.next_batch()
+        assert len(ordered_bars(msg)["bars"]) == 2
+        await hub.close()
+
+
+# ═══════════════════════════════════════════════════════════
+#  Bulk candle writer tests
+# ═══════════════════════════════════════════════════════════
+
+from src.market import bulk
+
+
+class TestBulkCandleWriter:
+    def test_records_follow_copy_columns(self):
+        asset_id = uuid.uuid4()
+        ts = datetime(2024, 1, 2, tzinfo=timezone.utc)
+        (record,) = bulk.candle_records(asset_id, "1d", [_candle(ts, 5.0)])
+        row = dict(zip(bulk.COPY_COLUMNS, record))
+        assert row["asset_id"] == asset_id
+        assert row["timeframe"] == "1d"
+        assert row["timestamp"] == ts
+        assert row["close"] == 5.0
+
+    @pytest.mark.asyncio
+    async def test_large_writes_use_copy(self):
+        now = datetime.now(timezone.utc)
+        rows = [_candle(now + timedelta(minutes=i)) for i in range(3)]
+        with patch.object(service.settings, "MARKET_BULK_COPY_THRESHOLD", 3), \
+             patch("src.market.service.copy_candles", AsyncMock(return_value=3)) as mock_copy, \
+             patch("src.market.service.insert_candles", AsyncMock()) as mock_insert:
+            await service.upsert_candles(AsyncMock(), uuid.uuid4(), "1m", rows)
+            await service.upsert_candles(AsyncMock(), uuid.uuid4(), "1m", rows[:2])
+        mock_copy.assert_awaited_once()
+        mock_insert.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_upsert_marks_series_refreshed(self):
+        now = datetime.now(timezone.utc)
+        db = AsyncMock()
+        await service.upsert_candles(db, uuid.uuid4(), "1d", [_candle(now)])
+        assert db.execute.await_count == 2
+        sql = str(db.execute.await_args_list[-1].args[0].compile(dialect=postgresql.dialect()))
+        assert "INSERT INTO candle_series" in sql
+        assert "ON CONFLICT (asset_id, timeframe) DO UPDATE" in sql
+
+    @pytest.mark.asyncio
+    async def test_insert_dedupes_timestamps(self):
+        now = datetime.now(timezone.utc)
+        db = AsyncMock()
+        written = await service.insert_candles(db, uuid.uuid4(), "1d", [_candle(now, 1.0), _candle(now, 2.0)])
+        assert written == 1
+        db.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_copy_merge_keeps_last_staged_row(self):
+        pg = AsyncMock()
+        raw = MagicMock(driver_connection=pg)
+        conn = MagicMock(get_raw_connection=AsyncMock(return_value=raw))
+        db = MagicMock(connection=AsyncMock(return_value=conn))
+        now = datetime.now(timezone.utc)
+        await bulk.copy_candles(db, uuid.uuid4(), "1d", [_candle(now, 1.0), _candle(now, 2.0)])
+
+        statements = [c.args[0] for c in pg.execute.await_args_list]
+        create = next(s for s in statements if s.startswith("CREATE TEMP TABLE"))
+        assert f"{bulk.STAGING_SEQ} bigserial" in create
+        assert bulk.STAGING_SEQ not in pg.copy_records_to_table.await_args.kwargs["columns"]
+        assert f'ORDER BY "timestamp", {bulk.STAGING_SEQ} DESC' in statements[-2]
+
+
+# ═══════════════════════════════════════════════════════════
+#  Compact candle storage
+# ═══════════════════════════════════════════════════════════
+
+from sqlalchemy import BigInteger
+from src.market import partitions
+from src.market.models import Candle
+
+
+class TestCandleStorage:
+    def test_compact_layout(self):
+        table = Candle.__table__
+        assert [c.name for c in table.primary_key.columns] == ["asset_id", "timeframe", "timestamp"]
+        assert not {"id", "created_at", "updated_at"} & set(table.columns.keys())
+        assert isinstance(table.c.volume.type, BigInteger)
+        assert table.dialect_options["postgresql"]["partition_by"] == "RANGE (timestamp)"
+        assert not table.indexes  # the primary key is the only index
+
+    def test_partition_ranges(self):
+        sql = partitions.create_partition_sql(2025)
+        assert "candles_y2025 PARTITION OF candles" in sql
+        assert "FROM ('2025-01-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')" in sql
+
+    @pytest.mark.asyncio
+    async def test_ensure_creates_only_missing_partitions(self):
+        year = datetime.now(timezone.utc).year
+        db = AsyncMock()
+        db.scalar.side_effect = [partitions.partition_name(year), None]  # this year exists
+        assert await partitions.ensure_candle_partitions(db) == [partitions.partition_name(year + 1)]
+        db.execute.assert_awaited_once()
+        db.commit.assert_awaited_once()
+
+
+# ═══════════════════════════════════════════════════════════
+#  Asset registry
+# ═══════════════════════════════════════════════════════════
+
+from types import SimpleNamespace
+
+from src.market.registry import AssetRegistry
+
+
+def _asset_db(*assets) -> MagicMock:
+    db = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(assets)
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+class TestAssetRegistry:
+    ASSETS = (
+        SimpleNamespace(symbol="AAPL", asset_type="stock"),
+        SimpleNamespace(symbol="BTC-USD", asset_type="crypto"),
+        SimpleNamespace(symbol="MSFT", asset_type="stock"),
+    )
+
+    @pytest.mark.asyncio
+    async def test_lookups_and_filters_hit_db_once(self):
+        db = _asset_db(*self.ASSETS)
+        registry = AssetRegistry(ttl=60)
+        assert (await registry.get(db, "aapl")).symbol == "AAPL"
+        assert await registry.get(db, "TSLA") is None
+        assert [a.symbol for a in await registry.list(db, "stock")] == ["AAPL", "MSFT"]
+        assert len(await registry.list(db)) == 3
+        assert await registry.list(db, "forex") == []
+        db.execute.assert_awaited_once()
+        assert db.expunge.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidate_and_ttl_trigger_reload(self):
+        db = _asset_db(*self.ASSETS)
+        registry = AssetRegistry(ttl=60)
+        await registry.get(db, "AAPL")
+        registry.invalidate()
+        await registry.get(db, "AAPL")
+        assert db.execute.await_count == 2
+
+        registry.ttl = 0
+        await registry.get(db, "AAPL")
+        assert db.execute.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_load_forces_another_load(self):
+        registry = AssetRegistry(ttl=60)
+        db = _asset_db(*self.ASSETS)
+        original = db.execute.return_value
+
+        async def racing_execute(*_):
+            registry.invalidate()  # e.g. create_asset committed mid-read
+            return original
+
+        db.execute.side_effect = racing_execute
+        await registry.load(db)
+        assert not registry.is_fresh
+
+    @pytest.mark.asyncio
+    async def test_create_and_delete_invalidate(self):
+        db = AsyncMock()
+        db.add = MagicMock()
+        db.execute.return_value.scalar_one_or_none = MagicMock(return_value=None)
+        with patch.object(service.asset_registry, "invalidate") as mock_invalidate:
+            await service.create_asset(db, "nvda", "NVIDIA", "stock")
+            await service.delete_asset(db, uuid.uuid4())
+        assert mock_invalidate.call_count == 2
+
+
+# ═══════════════════════════════════════════════════════════
+#  Technical indicators
+# ═══════════════════════════════════════════════════════════
+
+import numpy as np
+
+from src.market import indicators
+from src.market.exceptions import InvalidIndicators
+from src.market.indicators import IndicatorCache, parse_indicator_set
+
+
+def _prices(n: int, seed: int = 0) -> np.ndarray:
+    return 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, n))
+
+
+class TestIndicators:
+    def test_parse_fills_defaults_and_dedupes(self):
+        specs = parse_indicator_set("SMA:20, rsi, macd:5:10, sma:20")
+        assert [s.key for s in specs] == ["sma:20", "rsi:14", "macd:5:10:9"]
+
+    @pytest.mark.parametrize("raw", ["", "foo:3", "sma:0", "sma:2.5", "sma:x", "bb:20:0", "macd:26:12", "ema:1:2"])
+    def test_parse_rejects(self, raw):
+        with pytest.raises(ValueError):
+            parse_indicator_set(raw)
+
+    def test_sma_and_rsi_match_reference(self):
+        x = _prices(200)
+        sma = indicators.sma(x, 10)
+        assert np.isnan(sma[:9]).all()
+        np.testing.assert_allclose(sma[9:], [x[i - 9:i + 1].mean() for i in range(9, 200)])
+
+        # Wilder's RSI, bar by bar
+        n, d = 14, np.diff(x)
+        gain, loss = np.maximum(d, 0), np.maximum(-d, 0)
+        ag, al = gain[:n].mean(), loss[:n].mean()
+        expected = [100 - 100 / (1 + ag / al)]
+        for g, l in zip(gain[n:], loss[n:]):
+            ag, al = (ag * (n - 1) + g) / n, (al * (n - 1) + l) / n
+            expected.append(100 - 100 / (1 + ag / al))
+        rsi = indicators.compute(parse_indicator_set("rsi:14")[0], x)["rsi"]
+        np.testing.assert_allclose(rsi[n:], expected)
+
+    def test_ema_matches_recursion(self):
+        x = _prices(1000)  # spans several closed-form blocks
+        out = indicators.ema(x, 12)
+        alpha, value = 2 / 13, x[:12].mean()
+        for i in range(12, 1000):
+            value = alpha * x[i] + (1 - alpha) * value
+        assert np.isnan(out[:11]).all()
+        assert out[-1] == pytest.approx(value)
+
+    @pytest.mark.parametrize("raw", ["sma:20", "ema:20", "rsi:14", "macd:12:26:9", "bb:20:2"])
+    def test_continuation_matches_full_computation(self, raw):
+        spec, x = parse_indicator_set(raw)[0], _prices(600)
+        full = indicators.compute(spec, x)
+        tail = indicators.compute(spec, x, 500, {k: v[:500] for k, v in full.items()})
+        for line, values in tail.items():
+            np.testing.assert_allclose(values, full[line][500:])
+
+    def test_cache_extends_and_revises_forming_bar(self):
+        spec = parse_indicator_set("macd")[0]
+        x, t = _prices(400), np.arange(400, dtype=np.float64) * 60
+        cache = IndicatorCache(ttl=60, maxsize=8)
+        cache.get("AAPL", "1m", spec, t[:300], x[:300])
+
+        with patch("src.market.indicators.compute", wraps=indicators.compute) as spy:
+            # Same last bar and close: served as is
+            cache.get("AAPL", "1m", spec, t[:300], x[:300])
+            spy.assert_not_called()
+            # Forming bar moved and new bars arrived: only bars from 299 on are computed
+            x2 = x.copy()
+            x2[299] += 1.5
+            lines = cache.get("AAPL", "1m", spec, t, x2)
+        assert spy.call_args.args[2] == 299
+        for line, values in indicators.compute(spec, x2).items():
+            np.testing.assert_allclose(lines[line], values)
+
+    def test_cache_recomputes_when_history_changes(self):
+        spec = parse_indicator_set("ema:5")[0]
+        x, t = _prices(50), np.arange(50, dtype=np.float64)
+        cache = IndicatorCache(ttl=60, maxsize=8)
+        cache.get("AAPL", "1d", spec, t[10:], x[10:])
+        with patch("src.market.indicators.compute", wraps=indicators.compute) as spy:
+            cache.get("AAPL", "1d", spec, t, x)  # backfilled older bars
+        assert spy.call_args.args[2:] == ()
+
+    def test_cache_recomputes_when_earlier_close_revised(self):
+        spec = parse_indicator_set("ema:5")[0]
+        x, t = _prices(50), np.arange(50, dtype=np.float64)
+        cache = IndicatorCache(ttl=60, maxsize=8)
+        cache.get("AAPL", "1d", spec, t, x)
+        x2 = x.copy()
+        x2[20] += 1.0  # same bar times and last close, mid-series revision
+        with patch("src.market.indicators.compute", wraps=indicators.compute) as spy:
+            lines = cache.get("AAPL", "1d", spec, t, x2)
+        assert spy.call_args.args[2:] == ()
+        np.testing.assert_allclose(lines["ema"], indicators.compute(spec, x2)["ema"])
+
+    @pytest.mark.asyncio
+    async def test_service_slices_period_after_warmup(self):
+        t = np.arange(100, dtype=np.float64) * 86400
+        cols = {"time": t, "close": _prices(100)}
+        with patch("src.market.service.get_candles", AsyncMock(return_value=("AAPL", cols))) as mock_candles, \
+             patch.object(service, "indicator_cache", IndicatorCache(ttl=60, maxsize=8)):
+            _, time, results = await service.get_indicators(AsyncMock(), "aapl", "sma:20,rsi", "1d", "1mo")
+        assert mock_candles.await_args.args[3] == "6mo"  # 1mo plus RSI's warm-up, not the full history
+        assert time[0] == t[-1] - 31 * 86400 and time.size == 32
+        assert set(results) == {"sma:20", "rsi:14"}
+        assert set(results["rsi:14"]) == {"rsi"}  # internal state is not exposed
+        assert not np.isnan(results["sma:20"]["sma"]).any()
+
+    def test_lookback_covers_longest_warmup(self):
+        specs = parse_indicator_set("sma:20,rsi,macd")
+        assert [spec.warmup for spec in specs] == [19, 56, 140]
+        assert service.indicator_lookback("1mo", "1d", 19) == "3mo"
+        assert service.indicator_lookback("1mo", "1d", 140) == "1y"
+        assert service.indicator_lookback("1d", "1m", 56) == "5d"
+        assert service.indicator_lookback("10y", "1d", 19) == "max"
+        assert service.indicator_lookback("max", "1d", 0) == "max"
+
+    @pytest.mark.asyncio
+    async def test_invalid_set_is_422(self):
+        with pytest.raises(InvalidIndicators):
+            await service.get_indicators(AsyncMock(), "AAPL", "sma:0")
+
+    @pytest.mark.asyncio
+    async def test_route_emits_null_for_warmup(self):
+        lines = {"sma:3": {"sma": np.array([np.nan, np.nan, 2.0])}}
+        with patch.object(market_router.service, "get_indicators",
+                          AsyncMock(return_value=("AAPL", np.array([1.0, 2.0, 3.0]), lines))):
+            response = await market_router.get_indicators("AAPL", AsyncMock(), "sma:3", "1d", "6mo", None)
+        body = json.loads(response.body)
+        assert body["indicators"]["sma:3"]["sma"] == [None, None, 2.0]
+        assert body["count"] == 3
+
+
+# ═══════════════════════════════════════════════════════════
+#  Multi-symbol analytics
+# ═══════════════════════════════════════════════════════════
+
+from src.market import analytics
+from src.market.exceptions import MarketDataUnavailable
+
+
+def _daily(days: list[int], closes, hour: int = 0) -> dict:
+    t = np.array([d * 86400 + hour * 3600 for d in days], dtype=np.float64)
+    return {"time": t, "close": np.asarray(closes, dtype=np.float64)}
+
+
+@asynccontextmanager
+async def _no_session():
+    yield None
+
+
+class TestAnalytics:
+    def test_align_matches_daily_bars_by_date(self):
+        # Equity bars stamped 04:00 UTC, crypto at midnight, crypto trades on day 2
+        stock = _daily([0, 1, 3], [10, 11, 12], hour=4)
+        crypto = _daily([0, 1, 2, 3], [1, 2, 3, 4])
+        time, closes = analytics.align_closes({"AAPL": stock, "BTC-USD": crypto}, "1d")
+        assert time.tolist() == [0, 86400, 3 * 86400]
+        assert closes.tolist() == [[10, 1], [11, 2], [12, 4]]
+
+    def test_align_registered_with_adhoc_series(self):
+        # Both listed in Tokyo: one stored (exchange-local clock), one ad-hoc
+        pd = pytest.importorskip("pandas")
+        for freq, timeframe in (("min", "1m"), ("D", "1d")):
+            index = pd.date_range("2024-01-04 09:00", periods=5, freq=freq, tz="Asia/Tokyo")
+            df = pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": np.arange(5.0), "Volume": 1}, index=index)
+            candles = frame_to_candles(df)
+            stored = series.rows_to_columns([
+                (c["timestamp"], c["open"], c["high"], c["low"], c["close"], c["volume"]) for c in candles
+            ])
+            adhoc = AdhocSeries.from_candles(candles, "1mo", datetime.now(timezone.utc)).window("1mo", local_time=True)
+            time, closes = analytics.align_closes({"7203.T": stored, "6758.T": adhoc}, timeframe)
+            assert time.size == 5, timeframe
+            assert closes[:, 0].tolist() == closes[:, 1].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    def test_compute(self):
+        rng = np.random.default_rng(0)
+        base = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))
+        closes = np.column_stack([base, base * 2, 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))])
+        result = analytics.compute_analytics(["A", "B", "C"], np.arange(60.0), closes, "1d", 20)
+
+        corr = np.array(result["correlation"])
+        assert corr[0, 1] == pytest.approx(1.0)
+        np.testing.assert_allclose(np.diag(corr), 1.0)
+        assert result["cumulative_returns"]["B"][-1] == pytest.approx(base[-1] / base[0] - 1)
+
+        rolling = result["rolling_volatility"]["A"]
+        assert rolling[:20] == [None] * 20
+        returns = np.diff(np.log(base))
+        assert rolling[-1] == pytest.approx(returns[-20:].std(ddof=1) * np.sqrt(252))
+        assert result["summary"]["A"]["volatility"] == pytest.approx(returns.std(ddof=1) * np.sqrt(252))
+
+    @pytest.mark.asyncio
+    async def test_reads_concurrently_memoises_and_reports_errors(self):
+        walk = np.cumsum(np.random.default_rng(1).normal(0, 0.01, 30))
+        series_by_symbol = {"AAPL": _daily(range(30), 10 * np.exp(walk)),
+                            "MSFT": _daily(range(30), 10 * np.exp(-walk))}
+        in_flight = peak = 0
+
+        async def fake_get_candles(db, symbol, timeframe, period, local_time=False):
+            nonlocal in_flight, peak
+            assert local_time  # one clock for registered and ad-hoc series
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if symbol not in series_by_symbol:
+                raise MarketDataUnavailable(f"No data available for {symbol}")
+            return symbol, series_by_symbol[symbol]
+
+        with patch.object(analytics, "analytics_cache", TTLCache(ttl=60)), \
+             patch("src.market.analytics.service.get_candles", side_effect=fake_get_candles) as mock_read:
+            first, second = await asyncio.gather(
+                analytics.get_analytics(["msft", "AAPL", "FAKE"], session_factory=_no_session),
+                analytics.get_analytics(["AAPL", "FAKE", "MSFT"], session_factory=_no_session),
+            )
+        assert first is second
+        assert mock_read.await_count == 3 and peak == 3
+        assert first["symbols"] == ["AAPL", "MSFT"]
+        assert first["correlation"][0][1] == pytest.approx(-1.0)
+        assert set(first["errors"]) == {"FAKE"}
+
+    @pytest.mark.asyncio
+    async def test_validates_before_reading(self):
+        with pytest.raises(InvalidSymbols):
+            await analytics.get_analytics([" "])
+        with pytest.raises(InvalidPeriod):
+            await analytics.get_analytics(["AAPL"], period="7y")
+
+    @pytest.mark.asyncio
+    async def test_agent_tool_uses_shared_analytics(self):
+        from src.ai.tools import analyze_stocks
+        walk = np.concatenate(([0.0], np.cumsum(np.random.default_rng(1).normal(0, 0.01, 29))))
+        result = analytics.compute_analytics(
+            ["AAPL", "MSFT"], np.arange(30.0),
+            np.column_stack([10 * np.exp(walk), 10 * np.exp(-walk)]), "1d", 20,
+        )
+        result.update(period="1y", errors={})
+        with patch("src.ai.tools.get_analytics", AsyncMock(return_value=result)) as mock_analytics:
+            text = await analyze_stocks.ainvoke({"symbols": "AAPL,MSFT"})
+        mock_analytics.assert_awaited_once_with(["AAPL", "MSFT"], "1d", "1y")
+        assert "AAPL/MSFT: -1.00" in text
+        assert f"**MSFT**: return {result['summary']['MSFT']['total_return'] * 100:+.2f}%" in text
+
+
 # ═══════════════════════════════════════════════════════════
 #  Market schemas tests
 # ═══════════════════════════════════════════════════════════
@@ -90,10 +1970,15 @@ class TestMarketExceptions:
 from src.ai.tools import get_stock_quote, get_price_history, compare_stocks
 
 
+@asynccontextmanager
+async def _tool_session():
+    yield MagicMock()
+
+
 class TestAITools:
-    @patch("src.ai.tools.fetch_quote")
-    def test_get_stock_quote_success(self, mock_quote):
-        mock_quote.return_value = {
+    @pytest.mark.asyncio
+    async def test_get_stock_quote_success(self):
+        quote = {
             "symbol": "AAPL",
             "name": "Apple Inc",
             "price": 150.00,
@@ -101,45 +1986,92 @@ class TestAITools:
             "change_percent": 1.70,
             "volume": 50000000,
         }
-        result = get_stock_quote.invoke({"symbol": "AAPL"})
-        assert "AAPL" in result
+        with patch("src.ai.tools.service.get_quote", AsyncMock(return_value=quote)) as mock_quote:
+            result = await get_stock_quote.ainvoke({"symbol": "AAPL"})
+        mock_quote.assert_awaited_once_with("AAPL")
+        assert "**AAPL** (Apple Inc)" in result
         assert "$150.00" in result
         assert "📈" in result
 
-    @patch("src.ai.tools.fetch_quote")
-    def test_get_stock_quote_not_found(self, mock_quote):
-        mock_quote.return_value = None
-        result = get_stock_quote.invoke({"symbol": "FAKE"})
+    @pytest.mark.asyncio
+    async def test_get_stock_quote_name_from_metadata(self):
+        quote_cache.invalidate()
+        service.negative_cache.clear()
+        upstream = _quote("AAPL", 150.0)  # the provider only knows the symbol
+        shared = MagicMock(get=AsyncMock(return_value=None), set=AsyncMock())
+        with patch("src.market.service.market_cache", shared), \
+             patch("src.market.service.afetch_quote", AsyncMock(return_value=upstream)), \
+             patch("src.market.service.metadata_store.get", AsyncMock(return_value={"name": "Apple Inc."})):
+            result = await get_stock_quote.ainvoke({"symbol": "AAPL"})
+        quote_cache.invalidate()
+        assert "**AAPL** (Apple Inc.)" in result
+
+    @pytest.mark.asyncio
+    async def test_get_stock_quote_without_metadata_name(self):
+        quote = {"symbol": "AAPL", "name": "AAPL", "price": 150.0, "change": 1.0, "change_percent": 0.5, "volume": 10}
+        with patch("src.ai.tools.service.get_quote", AsyncMock(return_value=quote)):
+            result = await get_stock_quote.ainvoke({"symbol": "AAPL"})
+        assert "**AAPL**\n" in result
+        assert "(AAPL)" not in result
+
+    @pytest.mark.asyncio
+    async def test_get_stock_quote_not_found(self):
+        with patch("src.ai.tools.service.get_quote", AsyncMock(side_effect=MarketDataUnavailable())):
+            result = await get_stock_quote.ainvoke({"symbol": "FAKE"})
         assert "Could not retrieve" in result
 
-    @patch("src.ai.tools.fetch_candles")
-    def test_get_price_history_success(self, mock_candles):
-        mock_candles.return_value = [
-            {"close": 100, "high": 105, "low": 95, "open": 98, "volume": 1000, "time": 1},
-            {"close": 110, "high": 115, "low": 100, "open": 100, "volume": 1200, "time": 2},
-        ]
-        result = get_price_history.invoke({"symbol": "AAPL"})
-        assert "AAPL" in result
+    @pytest.mark.asyncio
+    async def test_get_price_history_success(self):
+        cols = series.rows_to_columns([
+            (datetime(2024, 1, 2, tzinfo=timezone.utc), 98, 105, 95, 100, 1000),
+            (datetime(2024, 1, 3, tzinfo=timezone.utc), 100, 115, 100, 110, 1200),
+        ])
+        with patch("src.ai.tools.SessionLocal", _tool_session), \
+             patch("src.ai.tools.service.get_candles", AsyncMock(return_value=("AAPL", cols))) as mock_candles:
+            result = await get_price_history.ainvoke({"symbol": "aapl"})
+        mock_candles.assert_awaited_once_with(ANY, "aapl", "1d", "1mo")
+        assert "**AAPL**" in result
         assert "2 candles" in result
+        assert "Period High: $115.00 | Period Low: $95.00" in result
 
-    @patch("src.ai.tools.fetch_candles")
-    def test_get_price_history_empty(self, mock_candles):
-        mock_candles.return_value = []
-        result = get_price_history.invoke({"symbol": "FAKE"})
+    @pytest.mark.asyncio
+    async def test_get_price_history_empty(self):
+        with patch("src.ai.tools.SessionLocal", _tool_session), \
+             patch("src.ai.tools.service.get_candles", AsyncMock(return_value=("FAKE", series.empty_columns()))):
+            result = await get_price_history.ainvoke({"symbol": "FAKE"})
         assert "No price history" in result
 
-    @patch("src.ai.tools.fetch_quote")
-    def test_compare_stocks(self, mock_quote):
-        mock_quote.side_effect = [
+    @pytest.mark.asyncio
+    async def test_get_price_history_unknown_symbol(self):
+        with patch("src.ai.tools.SessionLocal", _tool_session), \
+             patch("src.ai.tools.service.get_candles", AsyncMock(side_effect=UnknownSymbol("FAKE"))):
+            result = await get_price_history.ainvoke({"symbol": "FAKE"})
+        assert "No price history" in result
+
+    @pytest.mark.asyncio
+    async def test_compare_stocks(self):
+        quotes = [
             {"symbol": "AAPL", "price": 150, "change": 2, "change_percent": 1.5},
             {"symbol": "MSFT", "price": 400, "change": -3, "change_percent": -0.8},
         ]
-        result = compare_stocks.invoke({"symbols": "AAPL,MSFT"})
+        with patch("src.ai.tools.service.get_quotes", AsyncMock(return_value=(quotes, {}))):
+            result = await compare_stocks.ainvoke({"symbols": "AAPL,MSFT"})
         assert "AAPL" in result
         assert "MSFT" in result
         assert "🟢" in result
         assert "🔴" in result
 
-    def test_compare_stocks_empty(self):
-        result = compare_stocks.invoke({"symbols": ""})
+    @pytest.mark.asyncio
+    async def test_compare_stocks_partial(self):
+        quotes = [{"symbol": "AAPL", "price": 150, "change": 2, "change_percent": 1.5}]
+        with patch(
+            "src.ai.tools.service.get_quotes", AsyncMock(return_value=(quotes, {"FAKE": "Quote unavailable"})),
+        ) as mock_quotes:
+            result = await compare_stocks.ainvoke({"symbols": "AAPL,FAKE"})
+        mock_quotes.assert_awaited_once_with(["AAPL", "FAKE"])
+        assert "FAKE**: data unavailable" in result
+
+    @pytest.mark.asyncio
+    async def test_compare_stocks_empty(self):
+        result = await compare_stocks.ainvoke({"symbols": ""})
         assert "at least one" in result
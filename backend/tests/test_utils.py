@@ -1,4 +1,4 @@
-"""Tests for utility modules — slug, markdown, og_meta, pagination, rbac."""
+"""Tests for utility modules — slug, markdown, og_meta, pagination, rbac, compression."""
 
 import pytest
 from unittest.mock import MagicMock
@@ -132,3 +132,97 @@ class TestOgMeta:
         assert "linkedin.com" in urls["linkedin"]
         assert "threads.net" in urls["threads"]
 
+
+
+# ═══════════════════════════════════════════════════════════
+#  Response compression tests
+# ═══════════════════════════════════════════════════════════
+
+import gzip
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.testclient import TestClient
+
+from src.core.compression import CompressionMiddleware, is_compressible, make_encoder, negotiate_encoding
+
+
+def _compressed_app(**kwargs) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, **kwargs)
+
+    @app.get("/big")
+    async def big():
+        return {"values": list(range(500))}
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/binary")
+    async def binary():
+        return PlainTextResponse("x" * 1000, media_type="application/octet-stream")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield ("chunk %d " % i) * 50
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return TestClient(app)
+
+
+class TestCompression:
+    def test_negotiate_encoding(self):
+        offered = ["zstd", "br", "gzip"]
+        assert negotiate_encoding("gzip, deflate, br, zstd", offered) == "zstd"
+        assert negotiate_encoding("gzip;q=1.0, br;q=0.5", offered) == "gzip"
+        assert negotiate_encoding("*;q=0.1, zstd;q=0", offered) == "br"
+        assert negotiate_encoding("identity", offered) is None
+        assert negotiate_encoding(None, offered) is None
+
+    def test_is_compressible(self):
+        assert is_compressible("application/json")
+        assert is_compressible("text/html; charset=utf-8")
+        assert is_compressible("application/problem+json")
+        assert not is_compressible("text/event-stream")
+        assert not is_compressible("application/octet-stream")
+
+    def test_large_json_gzipped(self):
+        client = _compressed_app()
+        r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in r.headers["vary"].lower()
+        assert r.json()["values"][-1] == 499  # decoded transparently by the client
+
+    def test_small_and_binary_bodies_untouched(self):
+        client = _compressed_app()
+        for path in ("/small", "/binary"):
+            r = client.get(path, headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in r.headers
+        assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+    def test_stream_chunks_decodable_on_arrival(self):
+        encoder = make_encoder("gzip", gzip_level=6)
+        first = encoder.compress(b"chunk 0 " * 50)
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert decoder.decompress(first) == b"chunk 0 " * 50  # no finish() needed
+        rest = encoder.compress(b"tail") + encoder.finish()
+        assert gzip.decompress(first + rest) == b"chunk 0 " * 50 + b"tail"
+
+        r = _compressed_app().get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.text == "".join(("chunk %d " % i) * 50 for i in range(3))
+
+    @pytest.mark.parametrize("coding", ["zstd", "br"])
+    def test_optional_codings_round_trip(self, coding):
+        module = pytest.importorskip("zstandard" if coding == "zstd" else "brotli")
+        encoder = make_encoder(coding)
+        payload = b'{"close": 1.5}' * 200
+        body = encoder.compress(payload[:1000]) + encoder.compress(payload[1000:]) + encoder.finish()
+        if coding == "zstd":
+            assert module.ZstdDecompressor().decompressobj().decompress(body) == payload
+        else:
+            assert module.decompress(body) == payload
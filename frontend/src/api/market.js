@@ -11,7 +11,26 @@ export const marketApi = {
             params: { timeframe, period },
         }),
 
+    /** Get indicator lines, e.g. set = 'sma:20,rsi:14' */
+    getIndicators: (symbol, set, { timeframe = '1d', period = '6mo' } = {}) =>
+        api.get(`/market/indicators/${encodeURIComponent(symbol)}`, {
+            params: { set, timeframe, period },
+        }),
+
+    /** Open a live chart stream: columnar snapshot, then forming/closed bar updates */
+    streamCandles: (symbol, { timeframe = '1d', period = '6mo' } = {}) => {
+        const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const params = new URLSearchParams({ timeframe, period });
+        return new WebSocket(
+            `${proto}://${window.location.host}/api/v1/market/candles/${encodeURIComponent(symbol)}/stream?${params}`,
+        );
+    },
+
     /** Get live quote */
     getQuote: (symbol) =>
         api.get(`/market/quote/${encodeURIComponent(symbol)}`),
+
+    /** Get live quotes for several symbols in one request */
+    getQuotes: (symbols) =>
+        api.get('/market/quotes', { params: { symbols: symbols.join(',') } }),
 };
@@ -1,16 +1,24 @@
 import { useEffect, useRef } from 'react';
 import { createChart, ColorType, CandlestickSeries, HistogramSeries } from 'lightweight-charts';
 
+const volumeBar = (c) => ({
+    time: c.time,
+    value: c.volume,
+    color: c.close >= c.open ? 'rgba(16,185,129,0.25)' : 'rgba(239,68,68,0.25)',
+});
+
 /**
  * TradingView Lightweight Charts wrapper (v5 API).
  *
  * Props:
  *   candles — array of { time, open, high, low, close, volume }
+ *   liveBars — optional array of bars to apply on top (forming bar + newly closed bars)
  *   height — optional chart height (default: 450)
  */
-export default function CandlestickChart({ candles = [], height = 450 }) {
+export default function CandlestickChart({ candles = [], liveBars = [], height = 450 }) {
     const containerRef = useRef(null);
     const chartRef = useRef(null);
+    const lastTimeRef = useRef(null); // time of the newest bar on the chart
 
     useEffect(() => {
         if (!containerRef.current) return;
@@ -90,16 +98,25 @@ export default function CandlestickChart({ candles = [], height = 450 }) {
             })),
         );
 
-        volumeSeries.setData(
-            candles.map((c) => ({
-                time: c.time,
-                value: c.volume,
-                color: c.close >= c.open ? 'rgba(16,185,129,0.25)' : 'rgba(239,68,68,0.25)',
-            })),
-        );
+        volumeSeries.setData(candles.map(volumeBar));
+        lastTimeRef.current = candles[candles.length - 1].time;
 
         chart.timeScale().fitContent();
     }, [candles]);
 
+    // Apply streamed bars in place instead of resetting the whole series
+    useEffect(() => {
+        if (!chartRef.current || liveBars.length === 0) return;
+        const { candleSeries, volumeSeries } = chartRef.current;
+
+        for (const b of liveBars) {
+            // update() throws for bars older than the newest one; those are already closed on the chart
+            if (lastTimeRef.current !== null && b.time < lastTimeRef.current) continue;
+            candleSeries.update({ time: b.time, open: b.open, high: b.high, low: b.low, close: b.close });
+            volumeSeries.update(volumeBar(b));
+            lastTimeRef.current = b.time;
+        }
+    }, [liveBars]);
+
     return <div ref={containerRef} className="chart-container" />;
 }
@@ -18,11 +18,13 @@ export default function MarketDashboard() {
     const [activeSymbol, setActiveSymbol] = useState('AAPL');
     const [activeTf, setActiveTf] = useState(TIMEFRAMES[3]); // 1D
     const [candles, setCandles] = useState([]);
+    const [liveBars, setLiveBars] = useState([]);
     const [quotes, setQuotes] = useState({});
     const [chartLoading, setChartLoading] = useState(false);
     const [searchInput, setSearchInput] = useState('');
 
-    // Fetch chart data
+    // Stream chart data: a snapshot, then only the bars that change.
+    // Falls back to a one-off REST load if the socket fails before the snapshot.
     const loadCandles = useCallback(async () => {
         setChartLoading(true);
         try {
@@ -37,16 +39,55 @@ export default function MarketDashboard() {
         setChartLoading(false);
     }, [activeSymbol, activeTf]);
 
-    useEffect(() => { loadCandles(); }, [loadCandles]);
+    useEffect(() => {
+        let gotSnapshot = false;
+        setChartLoading(true);
+        setLiveBars([]);
+
+        const ws = marketApi.streamCandles(activeSymbol, {
+            timeframe: activeTf.value,
+            period: activeTf.period,
+        });
+        ws.onmessage = (event) => {
+            const msg = JSON.parse(event.data);
+            if (msg.type === 'snapshot') {
+                gotSnapshot = true;
+                setCandles(msg.time.map((time, i) => ({
+                    time,
+                    open: msg.open[i],
+                    high: msg.high[i],
+                    low: msg.low[i],
+                    close: msg.close[i],
+                    volume: msg.volume[i],
+                })));
+                setChartLoading(false);
+            } else if (msg.type === 'bars') {
+                setLiveBars(msg.bars);
+            } else if (msg.type === 'error' && !gotSnapshot) {
+                gotSnapshot = true;
+                setCandles([]);
+                setChartLoading(false);
+            }
+        };
+        ws.onclose = () => {
+            if (!gotSnapshot) loadCandles();
+            gotSnapshot = true;
+        };
+
+        return () => {
+            gotSnapshot = true;
+            ws.close();
+        };
+    }, [activeSymbol, activeTf, loadCandles]);
 
     // Load quotes for default symbols
     useEffect(() => {
-        DEFAULT_SYMBOLS.forEach(async (sym) => {
+        (async () => {
             try {
-                const { data } = await marketApi.getQuote(sym);
-                setQuotes((prev) => ({ ...prev, [sym]: data }));
+                const { data } = await marketApi.getQuotes(DEFAULT_SYMBOLS);
+                setQuotes(Object.fromEntries(data.quotes.map((q) => [q.symbol, q])));
             } catch { /* skip */ }
-        });
+        })();
     }, []);
 
     function handleSearch(e) {
@@ -132,7 +173,7 @@ export default function MarketDashboard() {
                         <p>Could not load chart data for {activeSymbol}</p>
                     </div>
                 ) : (
-                    <CandlestickChart candles={candles} height={450} />
+                    <CandlestickChart candles={candles} liveBars={liveBars} height={450} />
                 )}
             </div>
         </div>
@@ -18,6 +18,10 @@ export default defineConfig({
         target: 'ws://localhost:8000',
         ws: true,
       },
+      '^/api/v1/market/(stream|candles/[^/]+/stream)': {
+        target: 'ws://localhost:8000',
+        ws: true,
+      },
     },
   },
 })